@@ -1,18 +1,42 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from db import db
-from werkzeug.security import generate_password_hash, check_password_hash
 from bson.objectid import ObjectId
+from pymongo.errors import BulkWriteError
 from config import UPLOAD_FOLDER
 import os
-import re
 import json
+from utils.media_index import (
+    record_activity_media, sync_activity_media, detach_owner, detach_owner_type, owner_ref, ACTIVITY_URL_FIELDS
+)
+from utils.idempotency import idempotent
+from utils.auth_engine import hash_password, PASSWORD_HASH_METHOD, PASSWORD_SALT_LENGTH
+from utils.user_import import iter_rows, validate_row, detect_format, chunked, PasswordHasher
+from utils.batch_ops import validate_operation, build_write, MAX_BATCH_OPERATIONS
+from utils.export_import import EXPORT_COLLECTIONS, iter_export, iter_records, import_records, detect_import_format
+from utils.content_store import (
+    prepare_content, find_id_by_title, update_content, delete_content, parse_object_id, AmbiguousTitle
+)
+from utils.activity_dates import parse_activity_date, render_activity_dates
+from utils.content_events import notify_change
+from utils.list_query import ListSpec, run_list_query, list_response
+from utils.snapshot import snapshot_fallback
+from utils.claims_cache import get_user_claims, invalidate_user_claims, bump_token_version
+from utils.stats import record_change, flag_stale, STATS_SECTIONS
 
 admin_bp = Blueprint('admin', __name__)
+
 users_col = db['users']
 announcements_col = db['announcements']
 highlight_collection = db['highlights']  # or whatever your MongoDB collection name is
 
+
+@admin_bp.errorhandler(AmbiguousTitle)
+def ambiguous_title(e):
+    # Legacy title-based update/delete routes: never guess between duplicates
+    return jsonify({"error": str(e), "ids": e.ids}), 409
+
+
 def convert_objectid_to_str(obj):
     """Convert ObjectId to string for JSON serialization"""
     if isinstance(obj, ObjectId):
@@ -30,8 +54,10 @@ def admin_required(f):
     @wraps(f)
     @jwt_required()
     def decorated_function(*args, **kwargs):
-        claims = get_jwt()
-        if claims.get('role') != 'admin':
+        # Check the user's current role rather than the one baked into the token;
+        # revoked/outdated tokens were already rejected by is_token_revoked
+        user_claims = get_user_claims(get_jwt_identity())
+        if not user_claims or user_claims['role'] != 'admin':
             return jsonify({'error': 'Admin access required'}), 403
         return f(*args, **kwargs)
     return decorated_function
@@ -41,6 +67,7 @@ def admin_required(f):
 
 @admin_bp.route('/add-user', methods=['POST'])
 @admin_required
+@idempotent
 def add_user():
     data = request.json
     email = data.get('email')
@@ -57,7 +84,7 @@ def add_user():
     if users_col.find_one({'email': email}):
         return jsonify({"error": "User already exists"}), 400
 
-    hashed_pw = generate_password_hash(password)
+    hashed_pw = hash_password(password)
 
     # Build user object
     user_doc = {
@@ -70,9 +97,97 @@ def add_user():
         user_doc['vertical'] = vertical
 
     users_col.insert_one(user_doc)
+    record_change('users', after=user_doc)
+    invalidate_user_claims(email)  # drop a cached "user not found"
+    notify_change('users', email)
     return jsonify({"message": f"User {email} added"}), 201
 
 
+def _import_user_chunks(stream, fmt):
+    """Validate, de-duplicate, hash and insert users chunk by chunk, yielding per-row results"""
+    seen = set()
+    with PasswordHasher(PASSWORD_HASH_METHOD, PASSWORD_SALT_LENGTH) as hasher:
+        for chunk in chunked(iter_rows(stream, fmt)):
+            results = []
+            valid = []
+            for number, row, error in chunk:
+                user = None
+                if not error:
+                    user, error = validate_row(row)
+                if not error and user['email'] in seen:
+                    error = "Duplicate email in file"
+                if error:
+                    email = row.get('email') if isinstance(row, dict) else None
+                    results.append({'row': number, 'email': email, 'status': 'error', 'error': error})
+                    continue
+                seen.add(user['email'])
+                valid.append((number, user))
+
+            # One $in query per chunk instead of a find_one per user
+            emails = [user['email'] for _, user in valid]
+            existing = {u['email'] for u in users_col.find({'email': {'$in': emails}}, {'email': 1})} if emails else set()
+            to_insert = []
+            for number, user in valid:
+                if user['email'] in existing:
+                    results.append({'row': number, 'email': user['email'], 'status': 'skipped', 'error': 'User already exists'})
+                else:
+                    to_insert.append((number, user))
+
+            if to_insert:
+                hashes = hasher.hash_many([user['password'] for _, user in to_insert])
+                docs = [dict(user, password=hashed) for (_, user), hashed in zip(to_insert, hashes)]
+                write_errors = {}
+                try:
+                    users_col.insert_many(docs, ordered=False)
+                except BulkWriteError as e:
+                    write_errors = {err['index']: err for err in e.details.get('writeErrors', [])}
+                for i, (number, user) in enumerate(to_insert):
+                    err = write_errors.get(i)
+                    if err is None:
+                        results.append({'row': number, 'email': user['email'], 'status': 'created'})
+                    elif err.get('code') == 11000:
+                        results.append({'row': number, 'email': user['email'], 'status': 'skipped', 'error': 'User already exists'})
+                    else:
+                        results.append({'row': number, 'email': user['email'], 'status': 'error', 'error': err.get('errmsg')})
+                invalidate_user_claims(*[user['email'] for _, user in to_insert])
+                notify_change('users')
+
+            results.sort(key=lambda r: r['row'])
+            yield results
+
+
+@admin_bp.route('/import-users', methods=['POST'])
+@admin_required
+def import_users():
+    """Bulk-create users from a CSV (email,password,role,vertical) or NDJSON upload"""
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+    fmt = detect_format(upload.filename if upload else None, request.content_type, request.args.get('format'))
+
+    if request.args.get('stream') == 'true':
+        # Progress lines for large files, one per chunk, then a summary
+        def generate():
+            totals = {'processed': 0, 'created': 0, 'skipped': 0, 'failed': 0}
+            for results in _import_user_chunks(stream, fmt):
+                totals['processed'] += len(results)
+                for r in results:
+                    totals['created' if r['status'] == 'created' else 'skipped' if r['status'] == 'skipped' else 'failed'] += 1
+                yield json.dumps({'progress': dict(totals), 'results': results}) + '\n'
+            yield json.dumps({'done': True, **totals}) + '\n'
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    try:
+        results = [r for chunk in _import_user_chunks(stream, fmt) for r in chunk]
+    except Exception as e:
+        return jsonify({"error": f"Import failed: {e}"}), 400
+    return jsonify({
+        "created": sum(1 for r in results if r['status'] == 'created'),
+        "skipped": sum(1 for r in results if r['status'] == 'skipped'),
+        "failed": sum(1 for r in results if r['status'] == 'error'),
+        "results": results
+    }), 200
+
+
 @admin_bp.route('/update-user', methods=['PUT'])
 @admin_required
 def update_user():
@@ -91,7 +206,7 @@ def update_user():
     if new_email:
         update_data['email'] = new_email
     if new_password:
-        update_data['password'] = generate_password_hash(new_password)
+        update_data['password'] = hash_password(new_password)
     if new_role:
         update_data['role'] = new_role
         # If new role is verticalhead, vertical name must be provided
@@ -104,7 +219,17 @@ def update_user():
             update_data['vertical'] = None
 
 
-    users_col.update_one({'email': existing_email}, {'$set': update_data})
+    update = {'$set': update_data}
+    if new_email or new_password or new_role:
+        # Tokens issued before this change no longer reflect the account
+        update['$inc'] = {'token_version': 1}
+    users_col.update_one({'email': existing_email}, update)
+    if new_role:
+        record_change('users', user, dict(user, **update_data))
+    invalidate_user_claims(existing_email, new_email)
+    if new_email and new_email != existing_email:
+        notify_change('users', existing_email)
+    notify_change('users', new_email or existing_email)
     return jsonify({"message": "User updated"}), 200
 
 
@@ -114,29 +239,59 @@ def delete_user():
     data = request.json
     email = data.get('email')
 
-    result = users_col.delete_one({'email': email})
-    if result.deleted_count == 0:
+    deleted = users_col.find_one_and_delete({'email': email}, projection={'role': 1, 'vertical': 1})
+    invalidate_user_claims(email)
+    if deleted is None:
         return jsonify({"error": "User not found"}), 404
+    record_change('users', before=deleted)
+    notify_change('users', email)
     return jsonify({"message": "User deleted"}), 200
 
 
+@admin_bp.route('/revoke-user-tokens', methods=['POST'])
+@admin_required
+def revoke_user_tokens():
+    data = request.json or {}
+    email = data.get('email')
+    if not email:
+        return jsonify({"error": "email is required"}), 400
+    if not get_user_claims(email):
+        return jsonify({"error": "User not found"}), 404
+
+    bump_token_version(email)
+    return jsonify({"message": f"All sessions for {email} revoked"}), 200
+
+
+USER_LIST_SPEC = ListSpec(
+    sorts={'created': [], 'email': [('email', 1)], 'role': [('role', 1), ('email', 1)]},
+    default_sort='created',
+    fields=('email', 'role', 'vertical'),
+    hidden=('password',)
+)
+
+
 @admin_bp.route('/get-users', methods=['GET'])
 @admin_required
 def get_users():
-    users = list(users_col.find({}, {'password': 0}))  # hide password
+    try:
+        users, next_cursor = run_list_query(users_col, USER_LIST_SPEC, request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     for user in users:
         user['_id'] = str(user['_id'])
-    return jsonify(users), 200
+    return list_response(users, next_cursor)
 
 # ------------------------ Announcement APIs ------------------------
 
 @admin_bp.route('/add-announcement', methods=['POST'])
 @admin_required
+@idempotent
 def add_announcement():
     data = request.json
     name = data.get('ActivityName')
     text = data.get('ActivityDescription')
-    announcements_col.insert_one({'activityName': name, 'activityDescription': text})
+    result = announcements_col.insert_one(prepare_content('announcements', {'activityName': name, 'activityDescription': text}))
+    notify_change('announcements', result.inserted_id, 0)
     return jsonify({"message": "Announcement added"}), 201
 
 
@@ -148,11 +303,8 @@ def update_announcement():
     new_name = data.get('newName')
     new_text = data.get('newText')
 
-    result = announcements_col.update_one(
-        {'activityName': old_name},
-        {'$set': {'activityName': new_name, 'activityDescription': new_text}}
-    )
-    if result.modified_count:
+    announcement_id = find_id_by_title('announcements', old_name)
+    if announcement_id and update_content('announcements', announcement_id, {'activityName': new_name, 'activityDescription': new_text}):
         return jsonify({"message": "Announcement updated"}), 200
     else:
         return jsonify({"error": "No announcement updated. Check name."}), 404
@@ -164,38 +316,61 @@ def delete_announcement():
     data = request.json
     name = data.get('Activity')
 
-    result = announcements_col.delete_one({'activityName': name})
-    if result.deleted_count:
+    announcement_id = find_id_by_title('announcements', name)
+    if announcement_id and delete_content('announcements', announcement_id):
         return jsonify({"message": "Announcement deleted"}), 200
     else:
         return jsonify({"error": "No announcement deleted. Check name."}), 404
 
 
+ANNOUNCEMENT_LIST_SPEC = ListSpec(
+    sorts={'created': [], 'name': [('title_key', 1)]},
+    default_sort='created',
+    fields=('activityName', 'activityDescription', 'version')
+)
+
+
 @admin_bp.route('/get-announcements', methods=['GET'])
 @admin_required
 def get_announcements():
-    anns = list(announcements_col.find())
+    try:
+        anns, next_cursor = run_list_query(announcements_col, ANNOUNCEMENT_LIST_SPEC, request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     for ann in anns:
         ann['_id'] = str(ann['_id'])
-    return jsonify(anns), 200
+    return list_response(anns, next_cursor)
 
 
 
 #-------------------------Highlights/Trending-------------------------------
+HIGHLIGHT_LIST_SPEC = ListSpec(
+    sorts={'created': [], 'title': [('title_key', 1)]},
+    default_sort='created',
+    fields=('title', 'description', 'version')
+)
+
+
 @admin_bp.route('/get-trending', methods=['GET'])
+@snapshot_fallback
 def get_highlights():
-    highlights = list(highlight_collection.find())
+    try:
+        highlights, next_cursor = run_list_query(highlight_collection, HIGHLIGHT_LIST_SPEC, request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     for h in highlights:
         h['_id'] = str(h['_id'])  # Convert ObjectId to string
-    return jsonify(highlights)
+    return list_response(highlights, next_cursor)
 
 @admin_bp.route('/add-trending', methods=['POST'])
 @admin_required
+@idempotent
 def add_highlight():
     data = request.get_json()
     title= data.get('title')
     description = data.get('description')
-    highlight_collection.insert_one({'title':title,'description':description})
+    result = highlight_collection.insert_one(prepare_content('highlights', {'title':title,'description':description}))
+    notify_change('highlights', result.inserted_id, 0)
     return jsonify({"message": "Highlight added"}), 200
 
 @admin_bp.route('/update-trending', methods=['PUT'])
@@ -205,13 +380,9 @@ def update_highlight():
     name = data.get('oldTitle')
     Title = data.get('newTitle')
     desc = data.get('newDescription')
-    # Try exact match first
-    result = highlight_collection.update_one({"title": name}, {"$set":{'title' : Title , 'description' : desc}})
-    # Fallback to case-insensitive exact (ignoring casing/whitespace differences)
-    if result.modified_count == 0 and name:
-        ci_query = {"title": {"$regex": f"^{re.escape(name.strip())}$", "$options": "i"}}
-        result = highlight_collection.update_one(ci_query, {"$set":{'title' : Title , 'description' : desc}})
-    if result.modified_count:
+    # title_key matching ignores casing/whitespace differences
+    highlight_id = find_id_by_title('highlights', name)
+    if highlight_id and update_content('highlights', highlight_id, {'title' : Title , 'description' : desc}):
         return jsonify({"message": "Highlight updated"}), 200
     else:
         return jsonify({"error": "No highlight updated. Check old title ."}), 404
@@ -224,23 +395,12 @@ def delete_highlight():
     # Support deletion by Mongo _id if provided
     highlight_id = data.get('id')
     if highlight_id:
-        try:
-            result = highlight_collection.delete_one({"_id": ObjectId(highlight_id)})
-            if result.deleted_count:
-                return jsonify({"message": "Highlight deleted"}), 200
-            else:
-                return jsonify({"error": "No highlight deleted. Check id."}), 404
-        except Exception:
-            return jsonify({"error": "Invalid id format"}), 400
+        return delete_highlight_by_id()
 
     name = data.get('title')
-    # Try exact match first
-    result = highlight_collection.delete_one({"title": name})
-    # Fallback to case-insensitive exact match
-    if result.deleted_count == 0 and name:
-        ci_query = {"title": {"$regex": f"^{re.escape(name.strip())}$", "$options": "i"}}
-        result = highlight_collection.delete_one(ci_query)
-    if result.deleted_count:
+    # title_key matching ignores casing/whitespace differences
+    highlight_id = find_id_by_title('highlights', name)
+    if highlight_id and delete_content('highlights', highlight_id):
         return jsonify({"message": "Highlight deleted"}), 200
     else:
         return jsonify({"error": "No highlight deleted. Check title ."}), 404
@@ -253,19 +413,18 @@ def delete_highlight_by_id():
     highlight_id = data.get('id')
     if not highlight_id:
         return jsonify({"error": "id is required"}), 400
-    try:
-        result = highlight_collection.delete_one({"_id": ObjectId(highlight_id)})
-        if result.deleted_count:
-            return jsonify({"message": "Highlight deleted"}), 200
-        else:
-            return jsonify({"error": "No highlight deleted. Check id."}), 404
-    except Exception:
+    object_id = parse_object_id(highlight_id)
+    if object_id is None:
         return jsonify({"error": "Invalid id format"}), 400
+    if delete_content('highlights', object_id):
+        return jsonify({"message": "Highlight deleted"}), 200
+    return jsonify({"error": "No highlight deleted. Check id."}), 404
     
 
 # ------------------------ Activity APIs ------------------------
 @admin_bp.route('/add-activity', methods=['POST'])
 @admin_required
+@idempotent
 def add_activity():
     data = request.get_json()
     
@@ -276,22 +435,28 @@ def add_activity():
             return jsonify({"error": f"{field} is required"}), 400
 
     # Prepare activity data for database
-    activity_data = {
-        "title": data['title'],
-        "description": data['description'],
-        "date": data['date'],
-        "photos": data.get('photos', []),
-        "reports": data.get('reports', []),
-        "location": data.get('location', 'SSN Campus'),
-        "status": data.get('status', 'upcoming')
-    }
+    try:
+        activity_data = prepare_content('activities', {
+            "title": data['title'],
+            "description": data['description'],
+            "date": data['date'],
+            "photos": data.get('photos', []),
+            "reports": data.get('reports', []),
+            "location": data.get('location', 'SSN Campus'),
+            "status": data.get('status', 'upcoming')
+        })
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     # Insert into database
     result = activities_col.insert_one(activity_data)
     
     if result.inserted_id:
+        record_activity_media(activity_data)
+        record_change('activities', after=activity_data)
+        notify_change('activities', result.inserted_id, 0)
         # Convert ObjectId to string for JSON serialization
-        safe_activity_data = convert_objectid_to_str(activity_data)
+        safe_activity_data = render_activity_dates([convert_objectid_to_str(activity_data)])[0]
         return jsonify({
             "message": "Activity added successfully",
             "activity_id": str(result.inserted_id),
@@ -339,13 +504,15 @@ def update_activity():
     if data.get("newDescription"): update_data["description"] = data["newDescription"]
     if data.get("newDate"): update_data["date"] = data["newDate"]
     if data.get("newImageUrl"): update_data["imageUrl"] = data["newImageUrl"]
+    if "date" in update_data:
+        try:
+            update_data["date"] = parse_activity_date(update_data["date"])
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
     if old_title:
-        result = activities_col.update_one(
-            {"title": old_title},
-            {"$set": update_data}
-        )
-        if result.modified_count:
+        activity_id = find_id_by_title('activities', old_title)
+        if activity_id and update_content('activities', activity_id, update_data):
             return jsonify({"message": "Activity updated successfully"}), 200
         else:
             return jsonify({"error": "No activity found with that title"}), 404
@@ -353,11 +520,8 @@ def update_activity():
     # Fallback to id-based if provided (legacy clients)
     activity_id = data.get("id")
     if activity_id:
-        result = activities_col.update_one(
-            {"_id": ObjectId(activity_id)},
-            {"$set": update_data}
-        )
-        if result.modified_count:
+        object_id = parse_object_id(activity_id)
+        if object_id and update_content('activities', object_id, update_data):
             return jsonify({"message": "Activity updated"}), 200
         else:
             return jsonify({"error": "No activity updated. Check ID."}), 404
@@ -373,8 +537,8 @@ def delete_activity():
     # Prefer title-based deletion to match frontend
     title = data.get("title")
     if title:
-        result = activities_col.delete_one({"title": title})
-        if result.deleted_count:
+        activity_id = find_id_by_title('activities', title)
+        if activity_id and delete_content('activities', activity_id):
             return jsonify({"message": "Activity deleted successfully"}), 200
         else:
             return jsonify({"error": "No activity found with that title"}), 404
@@ -382,8 +546,8 @@ def delete_activity():
     # Fallback to id-based deletion (legacy)
     activity_id = data.get("id")
     if activity_id:
-        result = activities_col.delete_one({"_id": ObjectId(activity_id)})
-        if result.deleted_count:
+        object_id = parse_object_id(activity_id)
+        if object_id and delete_content('activities', object_id):
             return jsonify({"message": "Activity deleted"}), 200
         else:
             return jsonify({"error": "No activity deleted. Check ID."}), 404
@@ -396,6 +560,8 @@ def delete_activity():
 @admin_required
 def clear_activities():
     result = activities_col.delete_many({})
+    detach_owner_type("activity")
+    notify_change('activities')
     return jsonify({
         "message": "All activities deleted",
         "deletedCount": result.deleted_count
@@ -403,6 +569,172 @@ def clear_activities():
 
 
 
+# ------------------------ Batch mutations ------------------------
+
+def _existing_targets(collection, ops):
+    """One query per collection to find which update/delete targets exist"""
+    ids = [op['filter']['_id'] for op in ops if '_id' in op['filter']]
+    emails = [op['filter']['email'] for op in ops if 'email' in op['filter']]
+    clauses = []
+    if ids:
+        clauses.append({'_id': {'$in': ids}})
+    if emails:
+        clauses.append({'email': {'$in': emails}})
+    if not clauses:
+        return {}, {}
+    # version: content change events carry the version each write produced
+    projection = {'_id': 1, 'email': 1, 'version': 1}
+    if collection == 'activities':
+        # Prior media, so updates can detach assets they no longer reference
+        projection.update({field: 1 for field in ('photos', 'reports', *ACTIVITY_URL_FIELDS)})
+    found = list(db[collection].find({'$or': clauses}, projection))
+    return {doc['_id']: doc for doc in found}, {doc.get('email'): doc for doc in found if doc.get('email')}
+
+
+def _batch_side_effects(executed):
+    """Keep caches, stats and the media index in line with what the batch changed"""
+    # A batch is a bulk write: recompute the affected dashboard sections once
+    flag_stale(*{op['collection'] for op in executed} & set(STATS_SECTIONS))
+    for op in executed:
+        collection, target = op['collection'], op.get('target') or {}
+        if collection == 'users':
+            invalidate_user_claims(target.get('email'), op['data'].get('email'))
+        elif collection == 'activities':
+            activity_id = op.get('inserted_id') or target.get('_id')
+            if op['op'] == 'delete':
+                detach_owner(owner_ref("activity", activity_id))
+            elif op['op'] == 'update' and set(op['data']) & {'photos', 'reports', *ACTIVITY_URL_FIELDS}:
+                sync_activity_media(target, dict(target, **op['data']))
+            elif op['data'].get('photos') or op['data'].get('reports') or op['data'].get('imageUrl'):
+                record_activity_media(dict(op['data'], _id=activity_id))
+        if collection == 'users':
+            if target.get('email') and op['data'].get('email') not in (None, target.get('email')):
+                notify_change(collection, op['data']['email'])
+            notify_change(collection, target.get('email') or op['data'].get('email'))
+        elif op['op'] == 'insert':
+            notify_change(collection, op['inserted_id'], 0)
+        else:
+            # Updates $inc the version; a delete reports the version it removed
+            version = target.get('version', 0) + (1 if op['op'] == 'update' else 0)
+            notify_change(collection, target.get('_id'), version)
+
+
+@admin_bp.route('/batch', methods=['POST'])
+@admin_required
+@idempotent
+def batch_mutations():
+    """Apply many insert/update/delete operations with one bulk_write per collection"""
+    data = request.get_json(silent=True) or {}
+    operations = data.get('operations')
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"error": "operations must be a non-empty list"}), 400
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return jsonify({"error": f"At most {MAX_BATCH_OPERATIONS} operations per batch"}), 400
+
+    # Validate everything up front; nothing is written if any operation is malformed
+    ops, errors = [], []
+    for index, raw in enumerate(operations):
+        op, error = validate_operation(raw)
+        if error:
+            errors.append({"index": index, "status": "error", "error": error})
+        ops.append(op)
+    if errors:
+        return jsonify({"error": "Invalid operations", "results": errors}), 400
+
+    results = [{"index": index, "status": "ok"} for index in range(len(ops))]
+    by_collection = {}
+    for index, op in enumerate(ops):
+        by_collection.setdefault(op['collection'], []).append((index, op))
+
+    writes = {}
+    for collection, indexed_ops in by_collection.items():
+        by_id, by_email = _existing_targets(collection, [op for _, op in indexed_ops if op['op'] != 'insert'])
+        models = []
+        for index, op in indexed_ops:
+            if op['op'] != 'insert':
+                key = op['filter']
+                op['target'] = by_id.get(key['_id']) if '_id' in key else by_email.get(key['email'])
+                if op['target'] is None:
+                    results[index] = {"index": index, "status": "not_found"}
+                    continue
+            models.append((index, build_write(op, hash_password)))
+            if op['op'] == 'insert':
+                results[index]['id'] = str(op['inserted_id'])
+        writes[collection] = models
+
+    def apply_writes(session=None):
+        for collection, models in writes.items():
+            if not models:
+                continue
+            try:
+                db[collection].bulk_write([model for _, model in models], ordered=False, session=session)
+            except BulkWriteError as e:
+                if session is not None:
+                    raise
+                for err in e.details.get('writeErrors', []):
+                    index = models[err['index']][0]
+                    results[index] = {"index": index, "status": "error", "error": err.get('errmsg')}
+
+    try:
+        if data.get('transaction'):
+            with db.client.start_session() as session:
+                session.with_transaction(apply_writes)
+        else:
+            apply_writes()
+    except Exception as e:
+        return jsonify({"error": f"Batch failed, no changes applied: {e}" if data.get('transaction') else str(e)}), 500
+
+    _batch_side_effects([op for op, result in zip(ops, results) if result['status'] == 'ok'])
+    return jsonify({
+        "applied": sum(1 for r in results if r['status'] == 'ok'),
+        "results": results
+    }), 200
+
+
+# ------------------------ Export / Import ------------------------
+
+@admin_bp.route('/export/<collection>', methods=['GET'])
+@admin_required
+def export_collection(collection):
+    """Stream a collection as NDJSON or CSV (gzip-compressed unless ?gzip=false)"""
+    if collection not in EXPORT_COLLECTIONS:
+        return jsonify({"error": f"Export supports: {', '.join(EXPORT_COLLECTIONS)}"}), 404
+
+    fmt = 'csv' if request.args.get('format') == 'csv' else 'ndjson'
+    compress = request.args.get('gzip', 'true') != 'false'
+    filename = f"{collection}.{fmt}" + (".gz" if compress else "")
+    if compress:
+        mimetype = 'application/gzip'
+    else:
+        mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+
+    return Response(
+        stream_with_context(iter_export(db[collection], collection, fmt, compress)),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@admin_bp.route('/import/<collection>', methods=['POST'])
+@admin_required
+def import_collection(collection):
+    """Upsert records from an NDJSON/CSV export (plain or gzip) keyed by _id"""
+    if collection not in EXPORT_COLLECTIONS:
+        return jsonify({"error": f"Import supports: {', '.join(EXPORT_COLLECTIONS)}"}), 404
+
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+    fmt = detect_import_format(upload.filename if upload else None, request.args.get('format'))
+    try:
+        totals = import_records(db[collection], iter_records(stream, collection, fmt))
+    except Exception as e:
+        return jsonify({"error": f"Import failed: {e}"}), 400
+    finally:
+        # A failed import may still have written earlier chunks
+        notify_change(collection)
+    return jsonify({"message": "Import completed", **totals}), 200
+
+
 # ------------------------ Run Server ------------------------
 
 if __name__ == '__main__':
@@ -7,11 +7,23 @@ from config import JWT_SECRET_KEY
 from routes.auth import auth_bp
 from admin_register_user import admin_bp
 import os
+import logging
 from config import UPLOAD_FOLDER
 from routes.album import albums_bp
 from routes.contact import contact_bp
 from routes.activities import activities_bp
 from routes.photos import photos_bp
+from routes.media import media_bp
+from routes.content import content_bp
+from routes.search import search_bp
+from routes.home import home_bp
+from routes.stats import stats_bp
+from routes.events import events_bp
+from setup_database import ensure_indexes
+from utils.revocation import is_token_revoked
+from utils.publisher import init_publisher
+from utils.invalidation_bus import init_invalidation_bus
+from utils.compression import init_compression
 from flask import send_from_directory, jsonify
 
 app = Flask(__name__)
@@ -27,8 +39,14 @@ CORS(app, origins=[
     "http://localhost:3001",  # Alternative React port
     "http://127.0.0.1:3001",  # Alternative React port
     # Add production domains here when deploying
-], supports_credentials=True)
+], supports_credentials=True, expose_headers=['X-Next-Cursor', 'ETag', 'Retry-After'])
 jwt = JWTManager(app)
+# gzip/brotli for large JSON and text responses
+init_compression(app)
+
+@jwt.token_in_blocklist_loader
+def check_if_token_revoked(jwt_header, jwt_payload):
+    return is_token_revoked(jwt_payload)
 
 # Explicitly load the .env file
 dotenv_path = os.path.join(os.path.dirname(__file__), '.env')
@@ -40,6 +58,11 @@ except Exception as e:
 
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+try:
+    ensure_indexes()
+except Exception as e:
+    logging.warning(f"Could not create database indexes: {e}")
+
 # Add error handling for database connection
 @app.errorhandler(500)
 def internal_error(error):
@@ -77,7 +100,6 @@ def home():
 def favicon():
     return '', 204  # No content response for favicon
 
-import logging
 from flask import abort
 
 @app.route('/uploads/<filename>')
@@ -91,6 +113,17 @@ def uploaded_file(filename):
 app.register_blueprint(contact_bp, url_prefix='/api')
 app.register_blueprint(activities_bp, url_prefix='/api')
 app.register_blueprint(photos_bp)
+app.register_blueprint(media_bp, url_prefix='/admin')
+app.register_blueprint(content_bp, url_prefix='/api')
+app.register_blueprint(search_bp, url_prefix='/api')
+app.register_blueprint(home_bp, url_prefix='/api')
+app.register_blueprint(stats_bp, url_prefix='/admin')
+app.register_blueprint(events_bp, url_prefix='/api')
+
+# Static JSON copies of the public read models, regenerated after writes
+init_publisher(app)
+# Evict this worker's caches when another worker commits a write
+init_invalidation_bus()
 
 
 if __name__ == '__main__':
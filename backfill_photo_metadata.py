@@ -0,0 +1,78 @@
+import os
+import sys
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from db import db
+from config import UPLOAD_FOLDER
+from utils.image_metadata import map_metadata, METADATA_FIELDS
+
+FETCH_TIMEOUT = 30
+FETCH_WORKERS = 8
+
+
+def load_photo_bytes(photo):
+    """Fetch the original bytes for a stored photo (Cloudinary URL or local upload)"""
+    url = photo.get('url') or ''
+    try:
+        if url.startswith('http'):
+            r = requests.get(url, timeout=FETCH_TIMEOUT)
+            if r.status_code == 200:
+                return r.content
+            return None
+        path = os.path.join(UPLOAD_FOLDER, photo.get('filename', ''))
+        if os.path.isfile(path):
+            with open(path, 'rb') as f:
+                return f.read()
+    except Exception as e:
+        print(f"  Could not fetch {url or photo.get('filename')}: {e}")
+    return None
+
+
+def _fetch_and_extract(photo):
+    data = load_photo_bytes(photo)
+    return map_metadata([data])[0] if data else {}
+
+
+def backfill_collection(col, label, pool, force=False):
+    updated = 0
+
+    for doc in col.find({'photos.0': {'$exists': True}}, {'photos': 1, 'name': 1, 'title': 1}):
+        photos = doc.get('photos', [])
+        todo = [
+            (i, photo) for i, photo in enumerate(photos)
+            if isinstance(photo, dict) and (force or 'placeholder' not in photo)
+        ]
+        if not todo:
+            continue
+
+        # Downloads are I/O bound, extraction runs on the shared metadata pool
+        results = list(pool.map(lambda item: _fetch_and_extract(item[1]), todo))
+
+        update = {}
+        guard = {'_id': doc['_id']}
+        for (i, photo), meta in zip(todo, results):
+            for field in METADATA_FIELDS:
+                if field in meta:
+                    update[f'photos.{i}.{field}'] = meta[field]
+            # Only write if the photo at this index has not changed meanwhile
+            guard[f'photos.{i}.url'] = photo.get('url')
+
+        if update:
+            col.update_one(guard, {'$set': update})
+            updated += len(todo)
+            print(f"{label} '{doc.get('name') or doc.get('title')}': {len(todo)} photos updated")
+
+    return updated
+
+
+def backfill_photo_metadata(force=False):
+    print("Backfilling photo metadata...")
+    # One download pool for the whole run rather than one per document
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+        total = backfill_collection(db['albums'], 'Album', pool, force)
+        total += backfill_collection(db['activities'], 'Activity', pool, force)
+    print(f"Backfill completed! {total} photos processed")
+
+
+if __name__ == '__main__':
+    backfill_photo_metadata(force='--force' in sys.argv)
@@ -0,0 +1,85 @@
+"""
+Response compression benchmark.
+Compresses synthetic JSON bodies shaped like /api/activities, /api/albums and
+/admin/get-users (no database needed) with each gzip level / brotli quality
+and reports CPU time per response against bytes saved, plus the cost of a
+repeat hit served from the precompressed cache.
+
+    python bench_compression.py [--sizes 1,10,100,1000] [--repeat 50]
+"""
+import argparse
+import gzip
+import json
+import random
+import time
+from utils.compression import CompressedCache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def synthetic_activities(count, rng):
+    return [{
+        '_id': f'{rng.getrandbits(96):024x}',
+        'title': f'Activity {i}',
+        'description': 'Volunteers participated in a community service drive organised by NSS. ' * rng.randint(1, 4),
+        'date': f'2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}',
+        'status': 'completed' if i % 3 else 'upcoming',
+        'photos': [{
+            'url': f'https://res.cloudinary.com/demo/image/upload/v1/nss/activities/photos/{i}_{p}.jpg',
+            'width': 1600, 'height': 1067,
+            'srcset': ', '.join(f'https://res.cloudinary.com/demo/image/upload/w_{w}/nss/activities/photos/{i}_{p}.jpg {w}w'
+                                for w in (320, 640, 960, 1280)),
+        } for p in range(rng.randint(0, 4))],
+    } for i in range(count)]
+
+
+def synthetic_users(count, rng):
+    return [{'email': f'student{i}@ssn.edu.in', 'role': rng.choice(['volunteer', 'verticalhead', 'admin']),
+             'vertical': rng.choice(['', 'blood', 'environment', 'health'])} for i in range(count)]
+
+
+def encoders():
+    yield 'gzip-1', lambda body: gzip.compress(body, 1, mtime=0)
+    yield 'gzip-6', lambda body: gzip.compress(body, 6, mtime=0)
+    yield 'gzip-9', lambda body: gzip.compress(body, 9, mtime=0)
+    if brotli is not None:
+        yield 'br-1', lambda body: brotli.compress(body, quality=1)
+        yield 'br-5', lambda body: brotli.compress(body, quality=5)
+        yield 'br-11', lambda body: brotli.compress(body, quality=11)
+
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - started) / repeat, result
+
+
+def run(sizes, repeat):
+    rng = random.Random(42)
+    print(f"{'body':<22}{'encoder':<9}{'size':>11}{'saved':>9}{'ms/resp':>10}{'MB/s':>9}{'cached us':>11}")
+    for kind, make in (('activities', synthetic_activities), ('users', synthetic_users)):
+        for count in sizes:
+            body = json.dumps(make(count, rng)).encode()
+            for name, encode in encoders():
+                runs = max(1, repeat // max(1, len(body) // 100000))
+                seconds, compressed = timed(lambda: encode(body), runs)
+                # Repeat hit: digest + LRU lookup instead of compressing again
+                cache = CompressedCache(64 * 1024 * 1024)
+                cache.compress(body, 'gzip')
+                hit_seconds, _ = timed(lambda: cache.compress(body, 'gzip'), runs)
+                saved = 1 - len(compressed) / len(body)
+                print(f"{kind + ' x' + str(count):<22}{name:<9}{len(compressed):>11,}{saved:>8.1%}"
+                      f"{seconds * 1000:>10.2f}{len(body) / seconds / 1e6:>9.1f}{hit_seconds * 1e6:>11.1f}")
+            print(f"{'':<22}{'identity':<9}{len(body):>11,}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1,10,100,1000', help='documents per response, comma separated')
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+    run([int(s) for s in args.sizes.split(',')], args.repeat)
@@ -0,0 +1,57 @@
+"""
+Export throughput benchmark.
+Runs the streaming export encoder over synthetic activity documents (no
+database needed) and reports documents/s and output size.
+
+    python bench_export.py [--docs 1000000] [--format ndjson|csv] [--no-gzip] [--trace-memory]
+"""
+import argparse
+import time
+import tracemalloc
+from bson.objectid import ObjectId
+from utils.export_import import iter_export
+
+
+def synthetic_activities(count):
+    for i in range(count):
+        yield {
+            '_id': ObjectId(),
+            'title': f'Activity {i}',
+            'description': 'Volunteers participated in a community service drive organised by NSS. ' * 2,
+            'date': f'2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}',
+            'location': 'SSN Campus',
+            'status': 'completed' if i % 3 else 'upcoming',
+            'photos': [{
+                'filename': f'nss/activities/photos/{i}',
+                'url': f'https://res.cloudinary.com/demo/image/upload/v1/nss/activities/photos/{i}.jpg',
+                'original_name': f'IMG_{i}.jpg'
+            }],
+            'reports': []
+        }
+
+
+def run(count, fmt, compress, trace_memory=False):
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    size = 0
+    for chunk in iter_export(None, 'activities', fmt, compress, docs=synthetic_activities(count)):
+        size += len(chunk)
+    elapsed = time.perf_counter() - started
+    line = (f"{count} docs as {fmt}{'.gz' if compress else ''}: {elapsed:.1f}s, "
+            f"{count / elapsed:,.0f} docs/s, {size / 1e6:.1f} MB output")
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        line += f", peak traced memory {peak / 1e6:.1f} MB"
+    print(line)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--docs', type=int, default=1000000)
+    parser.add_argument('--format', choices=['ndjson', 'csv'], default='ndjson')
+    parser.add_argument('--no-gzip', action='store_true')
+    parser.add_argument('--trace-memory', action='store_true', help='report peak memory (much slower)')
+    args = parser.parse_args()
+    run(args.docs, args.format, not args.no_gzip, args.trace_memory)
@@ -0,0 +1,95 @@
+"""
+Login throughput benchmark.
+Seeds benchmark users, then fires concurrent POST /auth/login requests through
+the Flask test client and reports throughput and latency percentiles.
+
+Only runs against a dedicated database: set DB_NAME to a throwaway name
+(anything but the default nss_portal). The seeded users are volunteers, which
+the login route rejects with 403 *after* checking the password, so every
+request still pays the full hashing cost without minting privileged tokens.
+Seeded users are always removed afterwards.
+
+    DB_NAME=nss_bench python bench_login.py [--users 200] [--concurrency 16] [--requests 400]
+
+Run it once per PASSWORD_HASH_METHOD setting to compare hashing costs, e.g.
+PASSWORD_HASH_METHOD=pbkdf2:sha256:100000 DB_NAME=nss_bench python bench_login.py
+"""
+import argparse
+import os
+import secrets
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# All test-client traffic comes from 127.0.0.1, so the per-IP login limit
+# would turn most requests into 429s; the benchmark measures hashing, not limits
+os.environ['RATE_LIMIT_ENABLED'] = 'false'
+
+BENCH_DOMAIN = 'loginbench.nss'
+BENCH_ROLE = 'volunteer'
+# Expected response for a correct password on a non-admin/vertical-head account
+VERIFIED_STATUS = 403
+PRODUCTION_DB_NAME = 'nss_portal'
+
+
+def require_bench_database():
+    db_name = os.getenv('DB_NAME')
+    if not db_name or db_name == PRODUCTION_DB_NAME:
+        sys.exit("Refusing to run: set DB_NAME to a dedicated benchmark database (not nss_portal)")
+    return db_name
+
+
+# Random per run (letters + digits to pass validate_password)
+BENCH_PASSWORD = f"bench{secrets.token_hex(8)}1"
+
+
+def seed_users(count):
+    cleanup()  # the password is random per run, so never reuse earlier users
+    hashed = hash_password(BENCH_PASSWORD)
+    users_col.insert_many([
+        {'email': f'user{i}@{BENCH_DOMAIN}', 'password': hashed, 'role': BENCH_ROLE}
+        for i in range(count)
+    ])
+
+
+def run(users, concurrency, total):
+    seed_users(users)
+    client = app.test_client()
+
+    def login(i):
+        started = time.perf_counter()
+        r = client.post('/auth/login', json={'email': f'user{i % users}@{BENCH_DOMAIN}', 'password': BENCH_PASSWORD})
+        return time.perf_counter() - started, r.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(login, range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in results)
+    failures = sum(1 for _, status in results if status != VERIFIED_STATUS)
+    print(f"Hash method: {PASSWORD_HASH_METHOD}")
+    print(f"{total} logins, concurrency {concurrency}: {total / elapsed:.1f} logins/s, {failures} failures")
+    print(f"p50 {statistics.median(latencies) * 1000:.1f} ms, "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms, "
+          f"max {latencies[-1] * 1000:.1f} ms")
+
+
+def cleanup():
+    users_col.delete_many({'email': {'$regex': f'@{BENCH_DOMAIN}$'}})
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=400)
+    args = parser.parse_args()
+    require_bench_database()
+    from app import app
+    from utils.auth_engine import users_col, hash_password, PASSWORD_HASH_METHOD
+    try:
+        run(args.users, args.concurrency, args.requests)
+    finally:
+        cleanup()
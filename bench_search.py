@@ -0,0 +1,70 @@
+"""
+Search latency benchmark.
+Builds the in-process inverted index over synthetic activities/announcements
+(no database needed) and reports build time and per-query latency for exact,
+prefix and misspelled queries.
+
+    python bench_search.py [--docs 20000] [--queries 500]
+"""
+import argparse
+import random
+import statistics
+import time
+from utils.search import InvertedIndex, SEARCH_SOURCES, tokenize
+
+WORDS = ('blood donation camp beach cleanup drive tree plantation awareness rally village '
+         'maintenance visit volunteers students campus hospital marine pollution literacy '
+         'health checkup sapling environment community survey orientation workshop yoga '
+         'sanitation water conservation road safety election voters digital fitness').split()
+
+
+def synthetic_docs(count, rng):
+    for i in range(count):
+        title = ' '.join(rng.choices(WORDS, k=3)).title()
+        description = ' '.join(rng.choices(WORDS, k=40)) + f' batch{i % 500}'
+        if i % 3:
+            yield 'activities', {'_id': i, 'title': title, 'description': description, 'location': 'SSN Campus'}
+        else:
+            yield 'announcements', {'_id': i, 'activityName': title, 'activityDescription': description}
+
+
+def misspell(word, rng):
+    i = rng.randrange(1, len(word))
+    return word[:i] + word[i + 1:]
+
+
+def run(count, queries, seed=1):
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    index = InvertedIndex()
+    for collection, doc in synthetic_docs(count, rng):
+        source = SEARCH_SOURCES[collection]
+        index.add((source['type'], doc['_id']), doc, source['weights'])
+    vocabulary = index.vocabulary
+    print(f"Indexed {count} docs, {len(vocabulary.terms)} terms in {time.perf_counter() - started:.2f}s")
+
+    kinds = {
+        'exact': lambda: ' '.join(rng.sample(WORDS, 2)),
+        'prefix': lambda: rng.choice(WORDS)[:4],
+        'typo': lambda: misspell(rng.choice([w for w in WORDS if len(w) >= 6]), rng),
+    }
+    for name, make_query in kinds.items():
+        timings = []
+        for _ in range(queries):
+            query = make_query()
+            t0 = time.perf_counter()
+            expanded = [e for e in (vocabulary.expand(w) for w in tokenize(query)) if e]
+            scores = index.search(expanded)
+            sorted(scores.items(), key=lambda kv: -kv[1])[:10]
+            timings.append((time.perf_counter() - t0) * 1000)
+        timings.sort()
+        print(f"{name:>6}: p50 {statistics.median(timings):.2f} ms, "
+              f"p95 {timings[int(len(timings) * 0.95) - 1]:.2f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--docs', type=int, default=20000)
+    parser.add_argument('--queries', type=int, default=500)
+    args = parser.parse_args()
+    run(args.docs, args.queries)
@@ -1,4 +1,5 @@
 from db import db
+from utils.activity_dates import format_activity_date
 
 def check_database():
     print("Checking database contents...")
@@ -15,7 +16,7 @@ def check_database():
     activities = list(activities_col.find({}, {"_id": 0}))
     print(f"Activities: {len(activities)} found")
     for activity in activities:
-        print(f"  - {activity['title']} ({activity['date']})")
+        print(f"  - {activity['title']} ({format_activity_date(activity.get('date'))})")
 
 if __name__ == '__main__':
     check_database()
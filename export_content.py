@@ -0,0 +1,55 @@
+import argparse
+import sys
+import time
+from db import db
+from utils.export_import import EXPORT_COLLECTIONS, iter_export, iter_records, import_records, detect_import_format
+
+
+def export_collection(collection, fmt, output, compress):
+    started = time.perf_counter()
+    written = 0
+    out = open(output, 'wb') if output != '-' else sys.stdout.buffer
+    try:
+        for chunk in iter_export(db[collection], collection, fmt, compress):
+            out.write(chunk)
+            written += len(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    elapsed = time.perf_counter() - started
+    print(f"Exported {collection} to {output}: {written / 1e6:.1f} MB in {elapsed:.1f}s", file=sys.stderr)
+
+
+def import_collection(collection, fmt, path):
+    started = time.perf_counter()
+    with open(path, 'rb') as f:
+        totals = import_records(db[collection], iter_records(f, collection, detect_import_format(path, fmt)))
+    elapsed = time.perf_counter() - started
+    print(f"Imported {totals['processed']} records into {collection} in {elapsed:.1f}s "
+          f"({totals['upserted']} new, {totals['modified']} updated, {totals['inserted']} without _id)")
+    if totals['ignored_fields']:
+        print(f"Ignored fields not allowed in {collection}: {', '.join(totals['ignored_fields'])}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export or import content collections as NDJSON/CSV")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    exp = sub.add_parser('export', help='stream a collection to a file')
+    exp.add_argument('collection', choices=EXPORT_COLLECTIONS)
+    exp.add_argument('-f', '--format', choices=['ndjson', 'csv'], default='ndjson')
+    exp.add_argument('-o', '--output', help="output file ('-' for stdout)")
+    exp.add_argument('--no-gzip', action='store_true')
+
+    imp = sub.add_parser('import', help='upsert records from an export file (plain or .gz)')
+    imp.add_argument('collection', choices=EXPORT_COLLECTIONS)
+    imp.add_argument('path')
+    imp.add_argument('-f', '--format', choices=['ndjson', 'csv'])
+
+    args = parser.parse_args()
+    if args.command == 'export':
+        compress = not args.no_gzip
+        output = args.output or f"{args.collection}.{args.format}" + (".gz" if compress else "")
+        export_collection(args.collection, args.format, output, compress)
+    else:
+        import_collection(args.collection, args.format, args.path)
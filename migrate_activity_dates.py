@@ -0,0 +1,39 @@
+"""
+Convert activity `date` strings (YYYY-MM-DD) to BSON dates and create the
+(status, date) / (date) indexes used by /api/activities range queries.
+Documents whose date can't be parsed are reported and left untouched.
+
+    python migrate_activity_dates.py
+"""
+from pymongo import UpdateOne
+from db import db
+from utils.activity_dates import ensure_activity_indexes, parse_activity_date
+
+BATCH_SIZE = 500
+
+
+def migrate_activity_dates():
+    print("Migrating activity dates...")
+    col = db['activities']
+    ops, converted, skipped = [], 0, 0
+    for doc in col.find({'date': {'$type': 'string'}}, {'title': 1, 'date': 1}):
+        try:
+            date = parse_activity_date(doc['date'])
+        except ValueError:
+            print(f"Skipping '{doc.get('title')}': unparseable date {doc['date']!r}")
+            skipped += 1
+            continue
+        # Guard on the old value so a concurrent edit isn't overwritten
+        ops.append(UpdateOne({'_id': doc['_id'], 'date': doc['date']}, {'$set': {'date': date}}))
+        if len(ops) >= BATCH_SIZE:
+            converted += col.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        converted += col.bulk_write(ops, ordered=False).modified_count
+
+    ensure_activity_indexes()
+    print(f"Migration completed! {converted} dates converted, {skipped} skipped")
+
+
+if __name__ == '__main__':
+    migrate_activity_dates()
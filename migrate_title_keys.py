@@ -0,0 +1,18 @@
+"""
+Populate title_key on activities, announcements and highlights written before
+id-based addressing existed, and create the title_key indexes.
+
+    python migrate_title_keys.py
+"""
+from utils.content_store import ensure_content_indexes, backfill_title_keys
+
+
+def migrate_title_keys():
+    print("Migrating title keys...")
+    ensure_content_indexes()
+    total = backfill_title_keys()
+    print(f"Migration completed! {total} documents updated")
+
+
+if __name__ == '__main__':
+    migrate_title_keys()
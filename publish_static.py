@@ -0,0 +1,19 @@
+"""
+Render every public read model into the static publish directory
+(see utils/publisher.py). Run after deploys or bulk database changes made
+outside the API.
+
+    PUBLISH_BASE_URL=https://nss.example.org python publish_static.py
+"""
+from app import app
+from utils.publisher import publish_all, PUBLISH_DIR
+
+
+def publish_static():
+    print(f"Publishing public read models to {PUBLISH_DIR}...")
+    published = publish_all(app)
+    print(f"Publishing completed! {len(published)} models updated")
+
+
+if __name__ == '__main__':
+    publish_static()
@@ -0,0 +1,101 @@
+import os
+from datetime import datetime
+from pymongo import UpdateOne
+from db import db
+from config import UPLOAD_FOLDER
+from utils.media_index import (
+    media_col, ensure_media_indexes, media_key, owner_ref, local_file_item, media_fields
+)
+from utils.stats import flag_stale
+
+BATCH_SIZE = 500
+
+
+def _parse_uploaded_at(value):
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def collect_entries():
+    """Walk albums, activities and the uploads folder and build one entry per asset"""
+    entries = {}
+
+    def add(item, kind, owner=None):
+        backend, asset_id = media_key(item)
+        if not asset_id:
+            return
+        entry = entries.setdefault((backend, asset_id), {
+            'fields': media_fields(item, kind),
+            'owners': [],
+            'created_at': _parse_uploaded_at(item.get('uploaded_at'))
+        })
+        if item.get('bytes') is not None:
+            entry['fields']['size'] = item['bytes']
+        if owner and owner not in entry['owners']:
+            entry['owners'].append(owner)
+
+    for album in db['albums'].find({}, {'name': 1, 'photos': 1}):
+        for photo in album.get('photos', []):
+            if isinstance(photo, dict):
+                add(photo, 'photo', owner_ref('album', album['name']))
+
+    for activity in db['activities'].find({}, {'photos': 1, 'reports': 1}):
+        owner = owner_ref('activity', activity['_id'])
+        for photo in activity.get('photos', []):
+            if isinstance(photo, dict):
+                add(photo, 'photo', owner)
+        for report in activity.get('reports', []):
+            if isinstance(report, dict):
+                add(report, 'report', owner)
+
+    if os.path.exists(UPLOAD_FOLDER):
+        for filename in os.listdir(UPLOAD_FOLDER):
+            path = os.path.join(UPLOAD_FOLDER, filename)
+            if os.path.isfile(path):
+                item = local_file_item(filename)
+                add(item, 'photo')
+                entry = entries[media_key(item)]
+                entry['fields']['size'] = item['bytes']
+                entry['created_at'] = entry['created_at'] or datetime.utcfromtimestamp(os.path.getmtime(path))
+
+    return entries
+
+
+def rebuild_media_index():
+    print("Rebuilding media index...")
+    ensure_media_indexes()
+    started = datetime.utcnow()
+    entries = collect_entries()
+
+    ops = []
+    for (backend, asset_id), entry in entries.items():
+        ops.append(UpdateOne(
+            {'backend': backend, 'asset_id': asset_id},
+            {
+                '$set': dict(entry['fields'], owners=entry['owners'], indexed_at=started),
+                '$setOnInsert': {'created_at': entry['created_at'] or started}
+            },
+            upsert=True
+        ))
+        if len(ops) >= BATCH_SIZE:
+            media_col.bulk_write(ops, ordered=False)
+            ops = []
+    if ops:
+        media_col.bulk_write(ops, ordered=False)
+
+    # Entries not touched by this run are no longer referenced anywhere.
+    # Local files were all scanned, so those are gone; remote assets may still
+    # exist and are kept as unowned for the orphan reconciliation job.
+    not_seen = {'$or': [{'indexed_at': {'$lt': started}}, {'indexed_at': {'$exists': False}}]}
+    removed = media_col.delete_many({'$and': [not_seen, {'backend': 'local'}]})
+    unowned = media_col.update_many(not_seen, {'$set': {'owners': [], 'indexed_at': started}})
+    print(f"Indexed {len(entries)} assets, removed {removed.deleted_count} missing local files, "
+          f"{unowned.modified_count} remote assets no longer referenced")
+    flag_stale('media')  # dashboard totals are recomputed on the next read
+    print("Media index rebuild completed!")
+
+
+if __name__ == '__main__':
+    rebuild_media_index()
@@ -0,0 +1,29 @@
+import sys
+from utils.reconcile import reconcile
+
+
+def reconcile_media(apply=False):
+    mode = "Deleting" if apply else "Dry run: listing"
+    print(f"{mode} orphaned media...")
+
+    report = reconcile(dry_run=not apply)
+
+    for folder in report['folders']:
+        print(f"{folder['folder']} ({folder['resource_type']}): "
+              f"{folder['scanned']} scanned, {len(folder['orphans'])} orphaned, {folder['deleted']} deleted")
+        for public_id in folder['orphans']:
+            print(f"  - {public_id}")
+
+    local = report['local']
+    if local:
+        print(f"uploads/: {local['scanned']} scanned, {len(local['orphans'])} orphaned, {local['deleted']} deleted")
+        for name in local['orphans']:
+            print(f"  - {name}")
+
+    if not apply:
+        print("Nothing deleted. Re-run with --apply to remove the orphans above.")
+    print("Reconciliation completed!")
+
+
+if __name__ == '__main__':
+    reconcile_media(apply='--apply' in sys.argv)
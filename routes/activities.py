@@ -2,6 +2,16 @@ from flask import Blueprint, request, jsonify
 from db import db
 from datetime import datetime
 from bson.objectid import ObjectId
+from pymongo.errors import PyMongoError
+from utils.image_urls import add_responsive_urls, resolve_preset
+from utils.media_index import record_activity_media
+from utils.idempotency import idempotent
+from utils.content_store import prepare_content
+from utils.content_events import notify_change
+from utils.stats import record_change
+from utils.activity_dates import ACTIVITY_SORT, ACTIVITY_LIST_SPEC, activity_query, render_activity_dates
+from utils.list_query import run_list_query, list_response
+from utils.snapshot import snapshot_fallback
 
 activities_bp = Blueprint('activities', __name__)
 
@@ -18,42 +28,68 @@ def convert_objectid_to_str(obj):
         return [convert_objectid_to_str(item) for item in obj]
     return obj
 
+def with_responsive_photos(activities):
+    """Add srcset/thumbnail URLs to each activity's photos using the ?preset= query"""
+    preset = resolve_preset(request.args.get('preset'))
+    for activity in activities:
+        add_responsive_urls(activity.get('photos'), preset)
+    return render_activity_dates(activities)
+
 @activities_bp.route('/activities', methods=['GET'])
+@snapshot_fallback
 def get_activities():
-    """Get all activities"""
+    """Get activities, newest first; supports ?from=&to=&status= plus limit/cursor/sort/fields"""
     try:
-        activities = list(activities_col.find().sort('date', -1))
+        query = activity_query(
+            date_from=request.args.get('from'),
+            date_to=request.args.get('to'),
+            status=request.args.get('status')
+        )
+        activities, next_cursor = run_list_query(activities_col, ACTIVITY_LIST_SPEC, request.args, query)
         # Convert ObjectId to string for JSON serialization
-        activities = convert_objectid_to_str(activities)
-        return jsonify(activities), 200
+        activities = with_responsive_photos(convert_objectid_to_str(activities))
+        return list_response(activities, next_cursor)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except PyMongoError:
+        raise  # snapshot_fallback serves the last good response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @activities_bp.route('/activities/latest', methods=['GET'])
+@snapshot_fallback
 def get_latest_activities_endpoint():
     """Get latest 3 activities"""
     try:
-        activities = list(activities_col.find().sort('date', -1).limit(3))
+        activities = list(activities_col.find().sort(ACTIVITY_SORT).limit(3))
         # Convert ObjectId to string for JSON serialization
-        activities = convert_objectid_to_str(activities)
+        activities = with_responsive_photos(convert_objectid_to_str(activities))
         return jsonify(activities), 200
+    except PyMongoError:
+        raise  # snapshot_fallback serves the last good response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @activities_bp.route('/activities/<activity_id>', methods=['GET'])
+@snapshot_fallback
 def get_activity(activity_id):
     """Get a specific activity by ID"""
+    if not ObjectId.is_valid(activity_id):
+        return jsonify({'error': 'Invalid activity id'}), 400
     try:
         activity = activities_col.find_one({'_id': ObjectId(activity_id)})
         if activity:
-            activity = convert_objectid_to_str(activity)
+            activity = with_responsive_photos([convert_objectid_to_str(activity)])[0]
             return jsonify(activity), 200
         else:
             return jsonify({'error': 'Activity not found'}), 404
+    except PyMongoError:
+        raise  # snapshot_fallback serves the last good response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @activities_bp.route('/activities', methods=['POST'])
+@idempotent
 def create_activity():
     """Create a new activity (admin only)"""
     try:
@@ -66,7 +102,7 @@ def create_activity():
                 return jsonify({'error': f'{field} is required'}), 400
         
         # Prepare activity data for database
-        activity_data = {
+        activity_data = prepare_content('activities', {
             "title": data['title'],
             "description": data['description'],
             "date": data['date'],
@@ -74,15 +110,20 @@ def create_activity():
             "reports": data.get('reports', []),
             "location": data.get('location', 'SSN Campus'),
             "status": data.get('status', 'upcoming')
-        }
+        })
         
         # Insert into database
         result = activities_col.insert_one(activity_data)
         
         if result.inserted_id:
+            record_activity_media(activity_data)
+            record_change('activities', after=activity_data)
+            notify_change('activities', result.inserted_id, 0)
             activity_data['_id'] = str(result.inserted_id)
-            return jsonify(activity_data), 201
+            return jsonify(render_activity_dates([activity_data])[0]), 201
         else:
             return jsonify({'error': 'Failed to create activity'}), 500
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1,12 +1,19 @@
 from flask import Blueprint, request, jsonify, send_from_directory
 from werkzeug.utils import secure_filename
+from pymongo import ReturnDocument
 from models.mongo import albums_collection
 from config import UPLOAD_FOLDER
 import os
 from utils.cloudinary import cloudinary
-import cloudinary
-import cloudinary.uploader
 import uuid
+from utils.image_metadata import submit_file_metadata, collect_metadata
+from utils.image_urls import add_responsive_urls, resolve_preset
+from utils.media_index import record_media, detach_owner, remove_media, owner_ref, BACKEND_LOCAL
+from utils.idempotency import idempotent
+from utils.content_events import notify_change
+from utils.snapshot import snapshot_fallback
+from utils.stats import record_album_photos, record_album_deleted
+from utils.resilience import cloudinary_upload, DependencyUnavailable
 
 albums_bp = Blueprint('albums', __name__)
 
@@ -14,8 +21,11 @@ albums_bp = Blueprint('albums', __name__)
 # GET ALL ALBUMS WITH PHOTOS
 # ==============================
 @albums_bp.route('/api/albums', methods=['GET'])
+@snapshot_fallback
 def get_albums():
     albums = list(albums_collection.find())
+    sort_by_capture = request.args.get("sort") == "taken_at"
+    preset = resolve_preset(request.args.get("preset"))
 
     for album in albums:
         album["_id"] = str(album["_id"])
@@ -27,6 +37,10 @@ def get_albums():
                 except Exception:
                     host = "http://localhost:5000"
                 photo["url"] = f"{host}/uploads/{photo['filename']}"
+        add_responsive_urls(album["photos"], preset)
+        if sort_by_capture:
+            # Photos without a capture time keep their upload order at the end
+            album["photos"].sort(key=lambda p: (p.get("taken_at") is None, p.get("taken_at") or ""))
 
     return jsonify(albums)
 
@@ -34,6 +48,7 @@ def get_albums():
 # CREATE ALBUM
 # ==============================
 @albums_bp.route('/api/albums', methods=['POST'])
+@idempotent
 def create_album():
     data = request.json
     name = data.get("name")
@@ -46,8 +61,11 @@ def create_album():
 
     albums_collection.insert_one({
         "name": name,
-        "photos": []
+        "photos": [],
+        "version": 0
     })
+    record_album_photos(name, 0)
+    notify_change("albums", name, 0)
 
     return jsonify({"message": "Album created successfully"})
 
@@ -64,8 +82,12 @@ def delete_album(album_name):
         path = os.path.join(UPLOAD_FOLDER, photo["filename"])
         if os.path.exists(path):
             os.remove(path)
+            remove_media(BACKEND_LOCAL, photo["filename"])
 
-    albums_collection.delete_one({"name": album_name})
+    deleted = albums_collection.find_one_and_delete({"name": album_name}, projection={"version": 1})
+    detach_owner(owner_ref("album", album_name))
+    record_album_deleted(album_name)
+    notify_change("albums", album_name, (deleted or album).get("version", 0))
     return jsonify({"message": "Album deleted successfully"})
 
 # ==============================
@@ -158,11 +180,33 @@ def upload_photos(album_name):
         "photos": photo_list
     })
 '''
-# In album.py
+def push_photos(album_name, photos):
+    """Append photos to an album and bump its version; returns the new version"""
+    album = albums_collection.find_one_and_update(
+        {"name": album_name},
+        {"$push": {"photos": {"$each": photos}}, "$inc": {"version": 1}},
+        projection={"version": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    return album.get("version") if album else None
+
+
+def partial_upload_response(album_name, uploaded, all_files, error, version, retry_after=None):
+    """207 for an upload that stopped part way: the photos already pushed stay in
+    the album, and a non-5xx status lets @idempotent store this result so a retry
+    with the same key replays it instead of uploading those photos again"""
+    record_album_photos(album_name, len(uploaded))
+    notify_change("albums", album_name, version)
+    headers = {"Retry-After": str(retry_after)} if retry_after else {}
+    return jsonify({
+        "error": error,
+        "photos": uploaded,
+        "failed": [file.filename for file in all_files[len(uploaded):]]
+    }), 207, headers
 
-# In album.py
 
 @albums_bp.route('/api/albums/<album_name>/photos', methods=['POST'])
+@idempotent
 def upload_photos(album_name):
     # 1. Verify Album Exists
     album = albums_collection.find_one({"name": album_name})
@@ -175,10 +219,10 @@ def upload_photos(album_name):
         if not isinstance(photos, list):
             return jsonify({"error": "Invalid photos payload"}), 400
 
-        albums_collection.update_one(
-            {"name": album_name},
-            {"$push": {"photos": {"$each": photos}}}
-        )
+        version = push_photos(album_name, photos)
+        record_media(photos, "photo", owner_ref("album", album_name))
+        record_album_photos(album_name, len(photos))
+        notify_change("albums", album_name, version)
 
         return jsonify({
             "message": "Photos added via JSON",
@@ -186,6 +230,7 @@ def upload_photos(album_name):
         }), 200
 
     uploaded_files_log = []
+    version = None
     
     # 2. DEBUG: Print all keys received from Frontend
     print(f"DEBUG: Received file keys: {list(request.files.keys())}")
@@ -202,14 +247,15 @@ def upload_photos(album_name):
     if not all_files:
         return jsonify({"error": f"No photos found. Keys received: {list(request.files.keys())}"}), 400
 
-    # 4. Process all found files
-    for file in all_files:
-        if not file or not file.filename:
-            continue
+    # 4. Start metadata extraction for every file so it overlaps with the uploads
+    all_files = [file for file in all_files if file and file.filename]
+    pending_metadata = [submit_file_metadata(file) for file in all_files]
 
+    # 5. Process all found files
+    for file, metadata_future in zip(all_files, pending_metadata):
         try:
             # Upload to Cloudinary
-            upload_result = cloudinary.uploader.upload(
+            upload_result = cloudinary_upload(
                 file,
                 folder="nss/gallery",
                 resource_type="image"
@@ -220,21 +266,33 @@ def upload_photos(album_name):
                 "url": upload_result.get("secure_url"),
                 "original_name": file.filename
             }
+            new_photo.update(collect_metadata(metadata_future, upload_result))
 
             # Update MongoDB IMMEDIATELY
-            albums_collection.update_one(
-                {"name": album_name},
-                {"$push": {"photos": new_photo}}
-            )
+            version = push_photos(album_name, [new_photo])
             
+            record_media(
+                [dict(new_photo, bytes=upload_result.get("bytes"), mime_type=file.mimetype)],
+                "photo", owner_ref("album", album_name)
+            )
+
             uploaded_files_log.append(new_photo)
 
+        except DependencyUnavailable as e:
+            # Cloudinary is down or saturated: keep what was uploaded and tell the client to retry later
+            if uploaded_files_log:
+                return partial_upload_response(album_name, uploaded_files_log, all_files, str(e), version, e.retry_after)
+            return jsonify({"error": str(e), "photos": []}), 503, {"Retry-After": str(e.retry_after)}
         except Exception as e:
             print(f"CRITICAL ERROR processing {file.filename}: {str(e)}")
+            if uploaded_files_log:
+                return partial_upload_response(album_name, uploaded_files_log, all_files, f"Server Crash: {str(e)}", version)
             return jsonify({"error": f"Server Crash: {str(e)}"}), 500
 
     if not uploaded_files_log:
         return jsonify({"error": "No valid photos uploaded (Check logs for details)"}), 400
+    record_album_photos(album_name, len(uploaded_files_log))
+    notify_change("albums", album_name, version)
 
     return jsonify({"message": "Photos added", "photos": uploaded_files_log})
     
@@ -253,12 +311,19 @@ def delete_photo(album_name, index):
 
     if os.path.exists(path):
         os.remove(path)
+        remove_media(BACKEND_LOCAL, photo["filename"])
+    else:
+        detach_owner(owner_ref("album", album_name), [photo])
 
     album["photos"].pop(index)
-    albums_collection.update_one(
+    updated = albums_collection.find_one_and_update(
         {"name": album_name},
-        {"$set": {"photos": album["photos"]}}
+        {"$set": {"photos": album["photos"]}, "$inc": {"version": 1}},
+        projection={"version": 1},
+        return_document=ReturnDocument.AFTER
     )
+    record_album_photos(album_name, -1)
+    notify_change("albums", album_name, (updated or {}).get("version"))
 
     return jsonify({"message": "Photo deleted successfully"})
 
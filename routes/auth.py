@@ -1,15 +1,19 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token
-from werkzeug.security import check_password_hash,generate_password_hash
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt
 from db import db
-import uuid
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.validation import validate_email, validate_password, sanitize_input, validate_required_fields
+from utils.auth_engine import find_login_user, verify_password, hash_password
+from utils.rate_limit import rate_limit
+from utils.reset_tokens import issue_reset_token, consume_reset_token
+from utils.claims_cache import get_user_claims, invalidate_user_claims, TOKEN_VERSION_CLAIM
+from utils.content_events import notify_change
+from utils.revocation import revoke_token
+from utils.resilience import smtp_send
 
 
 
@@ -18,6 +22,8 @@ EMAIL_ADDRESS = os.environ.get("GMAIL_USER")  # Your Gmail address
 EMAIL_PASSWORD = os.environ.get("GMAIL_PASS")  # Your Gmail app password
 
 auth_bp = Blueprint('auth', __name__)
+
+LOGIN_IP_LIMIT_PER_MINUTE = int(os.getenv("LOGIN_IP_LIMIT_PER_MINUTE", "600"))
 if db is not None:
     users_col = db['users']
 else:
@@ -28,13 +34,17 @@ def check_user():
     if not email:
         return jsonify(msg="Email not provided"), 400
 
-    user = users_col.find_one({'email': email})
-    if not user:
+    claims = get_user_claims(email)
+    if not claims:
         return jsonify(msg="User not found"), 404
 
-    return jsonify(role=user['role'], vertical=user.get('vertical', '')), 200
+    return jsonify(role=claims['role'], vertical=claims['vertical']), 200
 
 @auth_bp.route('/login', methods=['POST'])
+# Per IP is generous because a whole campus can share one NAT address at
+# semester start; per account only failed passwords count (see rate_limit)
+@rate_limit('login', per_ip=(LOGIN_IP_LIMIT_PER_MINUTE, 60), per_account=(10, 300), message_key='msg',
+            account_failure_statuses=(401,))
 def login():
     try:
         data = request.get_json()
@@ -59,8 +69,8 @@ def login():
         email = sanitize_input(email, 254)
         vertical = sanitize_input(vertical, 50) if vertical else None
 
-        user = users_col.find_one({'email': email})
-        if not user or not check_password_hash(user['password'], password):
+        user = find_login_user(email)
+        if not user or not verify_password(user, password):
             return jsonify(msg="Invalid credentials"), 401
     except Exception as e:
         return jsonify(msg="Server error during login"), 500
@@ -85,7 +95,11 @@ def login():
     else:
         return jsonify(msg="You are not authorized to login"), 403
 
-    token = create_access_token(identity=email, additional_claims={"role": user['role'], "vertical": user.get('vertical', '')})
+    token = create_access_token(identity=email, additional_claims={
+        "role": user['role'],
+        "vertical": user.get('vertical', ''),
+        TOKEN_VERSION_CLAIM: user.get('token_version', 0)
+    })
 
     return jsonify(
         access_token=token,
@@ -95,17 +109,24 @@ def login():
     ), 200
 
 
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required()
+def logout():
+    revoke_token(get_jwt())
+    return jsonify(msg="Logged out"), 200
+
+
 @auth_bp.route('/forgot-password', methods=['POST'])
+@rate_limit('forgot-password', per_ip=(5, 300), per_account=(3, 900), message_key='msg')
 def forgot_password():
     data = request.get_json()
     email = data.get('email')
 
-    user = users_col.find_one({'email': email})
+    user = users_col.find_one({'email': email}, {'_id': 1})
     if not user:
         return jsonify(msg="User not found"), 404
 
-    reset_token = str(uuid.uuid4())  # generate a unique reset token
-    users_col.update_one({'email': email}, {'$set': {'reset_token': reset_token}})
+    reset_token = issue_reset_token(email)
 
     reset_link  = f"http://localhost:3000/reset-password/{reset_token}"
 
@@ -119,18 +140,33 @@ def forgot_password():
 #  Reset password route (optional, if you want to allow actual password change)
 @auth_bp.route('/reset-password/<token>', methods=['POST'])
 def reset_password(token):
-    data = request.get_json()
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify(msg="Invalid request data"), 400
     new_password = data.get('password')
 
-    user = users_col.find_one({'reset_token': token})
-    if not user:
+    # Validate before consuming: a rejected password must leave the token usable
+    if not isinstance(new_password, str):
+        return jsonify(msg="Password is required"), 400
+    is_valid_password, password_error = validate_password(new_password)
+    if not is_valid_password:
+        return jsonify(msg=password_error), 400
+
+    email = consume_reset_token(token)
+    if not email:
         return jsonify(msg="Invalid or expired token"), 400
 
-    users_col.update_one({'reset_token': token}, {
-        '$set': {'password': generate_password_hash(new_password)},
-        '$unset': {'reset_token': ""}
+    # Sessions issued with the old password must not survive the reset
+    result = users_col.update_one({'email': email}, {
+        '$set': {'password': hash_password(new_password)},
+        '$unset': {'reset_token': ""},  # legacy plaintext token field
+        '$inc': {'token_version': 1}
     })
+    if not result.matched_count:
+        return jsonify(msg="Invalid or expired token"), 400
 
+    invalidate_user_claims(email)
+    notify_change('users', email)
     return jsonify(msg="Password updated successfully"), 200
 
 
@@ -149,9 +185,7 @@ def send_reset_email(to_email, reset_link):
     msg.attach(MIMEText(body, "plain"))
 
     try:
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-            server.login(sender_email, sender_password)
-            server.sendmail(sender_email, to_email, msg.as_string())
+        smtp_send(sender_email, sender_password, msg)
         print(f"✅ Email sent to {to_email}")
     except Exception as e:
         print(f"❌ Failed to send email: {e}")
@@ -5,6 +5,8 @@ import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.validation import validate_contact_data, sanitize_input
+from utils.rate_limit import rate_limit
+from utils.resilience import smtp_send, DependencyUnavailable
 
 contact_bp = Blueprint('contact', __name__)
 
@@ -18,6 +20,7 @@ EMAIL_PASSWORD = os.environ.get("GMAIL_PASS")  # Your Gmail app password
 
 
 @contact_bp.route('/contact', methods=['POST'])
+@rate_limit('contact', per_ip=(5, 600))
 def send_contact_message():
     if request.method == 'OPTIONS':
         return jsonify({'message': 'Preflight request success'}), 200
@@ -47,11 +50,11 @@ def send_contact_message():
         msg['To'] = EMAIL_ADDRESS  # You can change this to the tech team's email
         msg.set_content(f"From: {name} <{email}>\n\nMessage:\n{message_content}")
 
-        with smtplib.SMTP_SSL('smtp.gmail.com', 465) as smtp:
-            smtp.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
-            smtp.send_message(msg)
+        smtp_send(EMAIL_ADDRESS, EMAIL_PASSWORD, msg)
         return jsonify({'success': 'Message sent successfully!'}), 200
-    except smtplib.SMTPException as e:
+    except DependencyUnavailable as e:
+        return jsonify({'error': 'Email service is busy. Please try again later.'}), 503, {'Retry-After': str(e.retry_after)}
+    except (smtplib.SMTPException, OSError) as e:
         return jsonify({'error': 'Failed to send email. Please try again later.'}), 500
     except Exception as e:
         return jsonify({'error': 'Server error. Please try again later.'}), 500
@@ -0,0 +1,79 @@
+from flask import Blueprint, request, jsonify
+from admin_register_user import admin_required
+from utils.content_store import (
+    CONTENT_FIELDS, VersionConflict, parse_object_id, update_content, delete_content
+)
+
+content_bp = Blueprint('content', __name__)
+
+CONTENT_COLLECTIONS = "any(activities, announcements, highlights)"
+
+
+def _expected_version(data=None):
+    """Read the expected version from If-Match or the request body (None = unconditional)"""
+    value = request.headers.get('If-Match')
+    if value is None and data:
+        value = data.get('version')
+    if value is None or value == '*':
+        return None
+    try:
+        return int(str(value).strip().strip('"'))
+    except ValueError:
+        raise ValueError("version must be an integer")
+
+
+def _conflict(e):
+    return jsonify({'error': str(e), 'version': e.current_version}), 409
+
+
+# ==============================
+# UPDATE BY ID
+# ==============================
+@content_bp.route(f'/<{CONTENT_COLLECTIONS}:collection>/<doc_id>', methods=['PUT'])
+@admin_required
+def update_by_id(collection, doc_id):
+    """Update an activity/announcement/highlight by id, optionally guarded by its version"""
+    object_id = parse_object_id(doc_id)
+    if object_id is None:
+        return jsonify({'error': 'Invalid id format'}), 400
+
+    data = request.get_json(silent=True) or {}
+    fields = {k: v for k, v in data.items() if k in CONTENT_FIELDS[collection]}
+    if not fields:
+        return jsonify({'error': f"Nothing to update. Allowed fields: {', '.join(sorted(CONTENT_FIELDS[collection]))}"}), 400
+
+    try:
+        updated = update_content(collection, object_id, fields, _expected_version(data))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except VersionConflict as e:
+        return _conflict(e)
+
+    if updated is None:
+        return jsonify({'error': 'Not found'}), 404
+    response = jsonify({'message': 'Updated', 'id': doc_id, 'version': updated['version']})
+    response.headers['ETag'] = f'"{updated["version"]}"'
+    return response, 200
+
+
+# ==============================
+# DELETE BY ID
+# ==============================
+@content_bp.route(f'/<{CONTENT_COLLECTIONS}:collection>/<doc_id>', methods=['DELETE'])
+@admin_required
+def delete_by_id(collection, doc_id):
+    """Delete an activity/announcement/highlight by id, optionally guarded by its version"""
+    object_id = parse_object_id(doc_id)
+    if object_id is None:
+        return jsonify({'error': 'Invalid id format'}), 400
+
+    try:
+        deleted = delete_content(collection, object_id, _expected_version(request.get_json(silent=True)))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except VersionConflict as e:
+        return _conflict(e)
+
+    if deleted is None:
+        return jsonify({'error': 'Not found'}), 404
+    return jsonify({'message': 'Deleted', 'id': doc_id}), 200
@@ -0,0 +1,82 @@
+import json
+import os
+import queue
+import time
+from flask import Blueprint, request, Response, stream_with_context
+from utils.event_feed import change_feed, change_channel, compact, PUBLIC_COLLECTIONS
+
+events_bp = Blueprint('events', __name__)
+
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+# Streams end after this long; EventSource reconnects with Last-Event-ID, which
+# keeps sync gunicorn workers from being held by one client forever
+EVENTS_MAX_SECONDS = float(os.getenv("EVENTS_MAX_SECONDS", "300"))
+EVENTS_RETRY_MS = int(os.getenv("EVENTS_RETRY_MS", "3000"))
+
+
+def format_event(message):
+    data = json.dumps(compact(message), separators=(',', ':'))
+    return f"id: {message['seq']}\nevent: change\ndata: {data}\n\n"
+
+
+def format_reset(seq):
+    """Tell the client it missed changes and should refetch everything"""
+    return f"id: {seq}\nevent: reset\ndata: {{}}\n\n"
+
+
+def last_event_id():
+    value = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+def event_stream(resume_after):
+    client = change_feed.connect()
+    try:
+        yield f"retry: {EVENTS_RETRY_MS}\n\n"
+        replayed = set()
+        if resume_after is not None:
+            oldest = change_channel.oldest_seq()
+            if oldest is not None and oldest > resume_after + 1:
+                # The capped collection has already dropped some of the missed messages
+                yield format_reset(change_channel.latest_seq())
+            else:
+                for message in change_channel.read_after(resume_after):
+                    if message['collection'] not in PUBLIC_COLLECTIONS:
+                        continue
+                    replayed.add(message['seq'])
+                    yield format_event(message)
+
+        deadline = time.monotonic() + EVENTS_MAX_SECONDS
+        while time.monotonic() < deadline:
+            try:
+                message = client.get(timeout=EVENTS_HEARTBEAT_SECONDS)
+            except queue.Empty:
+                yield ": heartbeat\n\n"
+                continue
+            if message is change_feed.OVERFLOW:
+                yield format_reset(change_channel.latest_seq())
+                return
+            if message['seq'] in replayed:
+                continue
+            yield format_event(message)
+    finally:
+        change_feed.disconnect(client)
+
+
+# ==============================
+# CONTENT CHANGE STREAM (SSE)
+# ==============================
+@events_bp.route('/events', methods=['GET'])
+def events():
+    """Server-sent change notifications: event `change` with {collection, id, version}"""
+    return Response(
+        stream_with_context(event_stream(last_event_id())),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',  # stop nginx from buffering the stream
+        }
+    )
@@ -0,0 +1,23 @@
+from flask import Blueprint, request, jsonify
+from pymongo.errors import PyMongoError
+from utils.image_urls import resolve_preset
+from utils.read_models import get_home
+from utils.snapshot import snapshot_fallback
+
+home_bp = Blueprint('home', __name__)
+
+
+# ==============================
+# HOMEPAGE (ONE REQUEST)
+# ==============================
+@home_bp.route('/home', methods=['GET'])
+@snapshot_fallback
+def home():
+    """Latest activities, album covers, trending and announcements for the homepage"""
+    try:
+        home_model = get_home(request.host_url.rstrip('/'), resolve_preset(request.args.get('preset')))
+        return jsonify(home_model), 200
+    except PyMongoError:
+        raise  # snapshot_fallback serves the last good response
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,103 @@
+from flask import Blueprint, request, jsonify
+from bson.objectid import ObjectId
+from datetime import datetime
+from admin_register_user import admin_required, convert_objectid_to_str
+from utils.media_index import media_col
+
+media_bp = Blueprint('media', __name__)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def _parse_datetime(value):
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except ValueError:
+        raise ValueError(f"Invalid date: {value}. Use ISO format (YYYY-MM-DD)")
+
+
+# ==============================
+# LIST / FILTER MEDIA
+# ==============================
+@media_bp.route('/media', methods=['GET'])
+@admin_required
+def list_media():
+    """List indexed media, newest first, with keyset pagination"""
+    try:
+        query = {}
+        for field in ('backend', 'kind', 'mime_type'):
+            if request.args.get(field):
+                query[field] = request.args[field]
+        if request.args.get('owner_type'):
+            query['owners.type'] = request.args['owner_type']
+        if request.args.get('owner_id'):
+            query['owners.id'] = request.args['owner_id']
+        if request.args.get('orphaned') == 'true':
+            query['owners.0'] = {'$exists': False}
+
+        since = _parse_datetime(request.args.get('since'))
+        until = _parse_datetime(request.args.get('until'))
+        if since or until:
+            query['created_at'] = {}
+            if since:
+                query['created_at']['$gte'] = since
+            if until:
+                query['created_at']['$lt'] = until
+
+        try:
+            limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+        except ValueError:
+            raise ValueError("limit must be an integer")
+        # limit(0) would mean "no limit" to Mongo
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        cursor = request.args.get('cursor')
+        if cursor:
+            if not ObjectId.is_valid(cursor):
+                raise ValueError("Invalid cursor")
+            query['_id'] = {'$lt': ObjectId(cursor)}
+
+        items = list(media_col.find(query).sort('_id', -1).limit(limit + 1))
+        next_cursor = str(items[limit - 1]['_id']) if len(items) > limit else None
+
+        return jsonify({
+            'items': convert_objectid_to_str(items[:limit]),
+            'next_cursor': next_cursor
+        }), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# ==============================
+# WHERE IS AN ASSET USED
+# ==============================
+@media_bp.route('/media/usage', methods=['GET'])
+@admin_required
+def media_usage():
+    """Look up an asset by id (public_id or filename) and return its owners"""
+    asset_id = request.args.get('asset_id')
+    if not asset_id:
+        return jsonify({'error': 'asset_id is required'}), 400
+
+    entries = list(media_col.find({'asset_id': asset_id}))
+    if not entries:
+        return jsonify({'error': 'Asset not found in media index'}), 404
+    return jsonify(convert_objectid_to_str(entries)), 200
+
+
+# ==============================
+# ORPHAN RECONCILIATION
+# ==============================
+@media_bp.route('/media/reconcile', methods=['POST'])
+@admin_required
+def reconcile_media():
+    """Report (and with {"dry_run": false}, delete) assets nothing references"""
+    from utils.reconcile import reconcile
+    data = request.get_json(silent=True) or {}
+    try:
+        report = reconcile(dry_run=data.get('dry_run', True) is not False)
+        return jsonify(report), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,13 +1,19 @@
-import requests
 from flask import Blueprint, request, jsonify, Response
 from flask_jwt_extended import jwt_required, get_jwt
 from werkzeug.utils import secure_filename
 import os
 from utils.cloudinary import cloudinary
-import cloudinary
-import cloudinary.uploader
 from config import UPLOAD_FOLDER
 from db import db
+from utils.image_metadata import submit_file_metadata, collect_metadata
+from utils.media_index import record_media, record_activity_media, remove_media, BACKEND_LOCAL
+from utils.idempotency import idempotent
+from utils.content_store import prepare_content, find_id_by_title, update_content, delete_content, AmbiguousTitle
+from utils.activity_dates import ACTIVITY_LIST_SPEC, render_activity_dates
+from utils.list_query import run_list_query, list_response
+from utils.content_events import notify_change
+from utils.stats import record_change
+from utils.resilience import cloudinary_upload, http_get, DependencyUnavailable
 import uuid
 from datetime import datetime
 
@@ -70,44 +76,59 @@ def validate_mime_type(file, file_type='image'):
         return mime_type in ALLOWED_DOCUMENT_MIME_TYPES
     return False
 
+def upload_interrupted(error, field, uploaded):
+    """Cloudinary is down or saturated: 503 with Retry-After, or 207 with the
+    files that did upload so @idempotent stores them instead of re-uploading"""
+    headers = {'Retry-After': str(error.retry_after)}
+    if uploaded:
+        return jsonify({'error': str(error), field: uploaded}), 207, headers
+    return jsonify({'error': 'Upload service is busy. Please try again later.'}), 503, headers
+
 @photos_bp.route('/admin/upload-photos', methods=['POST'])
 @jwt_required()
+@idempotent
 def upload_photos():
     """Upload multiple photos to Cloudinary"""
     try:
         if 'photos' not in request.files:
             return jsonify({'error': 'No photos provided'}), 400
         
-        files = request.files.getlist('photos')
+        files = [
+            file for file in request.files.getlist('photos')
+            if file and file.filename and allowed_image_file(file.filename)
+            and validate_mime_type(file, 'image')
+        ]
         uploaded_files = []
-        
-        for file in files:
-            # Basic validation
-            if file and file.filename and allowed_image_file(file.filename):
-                if not validate_mime_type(file, 'image'):
-                    continue
-                
-                # Upload to Cloudinary (Permanent Storage)
-                try:
-                    upload_result = cloudinary.uploader.upload(
-                        file,
-                        folder="nss/activities/photos", # distinct folder for organization
-                        resource_type="image"
-                    )
-                    
-                    # Store the Cloudinary URL (starts with http/https)
-                    photo_data = {
-                        'filename': upload_result['public_id'], # Use public_id for reference
-                        'original_name': file.filename,
-                        'url': upload_result['secure_url'],     # ✅ This is the permanent link
-                        'uploaded_at': datetime.now().isoformat(),
-                        'mime_type': file.content_type
-                    }
-                    uploaded_files.append(photo_data)
-                    
-                except Exception as upload_error:
-                    print(f"Cloudinary upload failed: {str(upload_error)}")
-                    continue
+
+        # Extract dimensions/placeholders on the worker pool while uploads run
+        pending_metadata = [submit_file_metadata(file) for file in files]
+
+        for file, metadata_future in zip(files, pending_metadata):
+            # Upload to Cloudinary (Permanent Storage)
+            try:
+                upload_result = cloudinary_upload(
+                    file,
+                    folder="nss/activities/photos", # distinct folder for organization
+                    resource_type="image"
+                )
+
+                # Store the Cloudinary URL (starts with http/https)
+                photo_data = {
+                    'filename': upload_result['public_id'], # Use public_id for reference
+                    'original_name': file.filename,
+                    'url': upload_result['secure_url'],     # ✅ This is the permanent link
+                    'uploaded_at': datetime.now().isoformat(),
+                    'mime_type': file.content_type
+                }
+                photo_data.update(collect_metadata(metadata_future, upload_result))
+                record_media([dict(photo_data, bytes=upload_result.get('bytes'))], 'photo')
+                uploaded_files.append(photo_data)
+
+            except DependencyUnavailable:
+                raise  # the remaining files would fail the same way
+            except Exception as upload_error:
+                print(f"Cloudinary upload failed: {str(upload_error)}")
+                continue
 
         if not uploaded_files:
             return jsonify({'error': 'No valid photos uploaded'}), 400
@@ -117,6 +138,8 @@ def upload_photos():
             'photos': uploaded_files
         }), 200
         
+    except DependencyUnavailable as e:
+        return upload_interrupted(e, 'photos', uploaded_files)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
         
@@ -160,6 +183,7 @@ def delete_photo():
         
         if os.path.exists(file_path):
             os.remove(file_path)
+            remove_media(BACKEND_LOCAL, filename)
             return jsonify({'message': 'Photo deleted successfully'}), 200
         else:
             return jsonify({'error': 'Photo not found'}), 404
@@ -175,14 +199,19 @@ def get_activities():
         # Use the shared DB handle to access the activities collection
         from db import db
         activities_col = db['activities']
-        activities = list(activities_col.find({}, {'_id': 0}))
-        return jsonify(activities), 200
-        
+        activities, next_cursor = run_list_query(activities_col, ACTIVITY_LIST_SPEC, request.args)
+        for activity in activities:
+            activity.pop('_id')  # the admin list doesn't expose ObjectIds
+        return list_response(render_activity_dates(activities), next_cursor)
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @photos_bp.route('/admin/upload-reports', methods=['POST'])
 @jwt_required()
+@idempotent
 def upload_reports():
     """Upload report documents for activities"""
     try:
@@ -208,7 +237,7 @@ def upload_reports():
                 if not filename:  # Additional security check
                     continue
                 
-                result = cloudinary.uploader.upload(
+                result = cloudinary_upload(
                     file,
                     folder="nss/activities/reports",
                     resource_type="raw",
@@ -243,6 +272,7 @@ def upload_reports():
                     "type": "report",
                     "mime_type": file.content_type
                 }
+                record_media([dict(report_data, bytes=result.get("bytes"))], 'report')
                 uploaded_files.append(report_data)
         
         if not uploaded_files:
@@ -253,11 +283,14 @@ def upload_reports():
             'reports': uploaded_files
         }), 200
         
+    except DependencyUnavailable as e:
+        return upload_interrupted(e, 'reports', uploaded_files)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @photos_bp.route('/admin/add-activity', methods=['POST'])
 @jwt_required()
+@idempotent
 def add_activity():
     """Add a new activity (stored in MongoDB)"""
     try:
@@ -270,7 +303,7 @@ def add_activity():
                 return jsonify({'error': f'{field} is required'}), 400
 
         # Prepare activity document
-        activity_doc = {
+        activity_doc = prepare_content('activities', {
             'title': data['title'],
             'description': data['description'],
             'date': data['date'],
@@ -278,7 +311,7 @@ def add_activity():
             'reports': data.get('reports', []),
             'location': data.get('location', 'SSN Campus'),
             'status': data.get('status', 'upcoming')
-        }
+        })
 
         # Insert into MongoDB
         from db import db
@@ -287,14 +320,19 @@ def add_activity():
 
         if not result.inserted_id:
             return jsonify({'error': 'Failed to create activity'}), 500
+        record_activity_media(activity_doc)
+        record_change('activities', after=activity_doc)
+        notify_change('activities', result.inserted_id, 0)
 
         # Return created activity without exposing ObjectId in admin list (consistent with get-activities)
         return jsonify({
             'message': 'Activity added successfully',
-            'activity': activity_doc,
+            'activity': render_activity_dates([activity_doc])[0],
             'activity_id': str(result.inserted_id)
         }), 201
 
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -309,26 +347,22 @@ def update_activity():
         if 'oldTitle' not in data:
             return jsonify({'error': 'oldTitle is required'}), 400
         
-        # Update in MongoDB
-        from db import activities_col
-        from bson import ObjectId
-        
         update_data = {}
         if data.get("newTitle"): update_data["title"] = data["newTitle"]
         if data.get("newDescription"): update_data["description"] = data["newDescription"]
         if data.get("newDate"): update_data["date"] = data["newDate"]
         if data.get("newImageUrl"): update_data["imageUrl"] = data["newImageUrl"]
         
-        result = activities_col.update_one(
-            {"title": data["oldTitle"]},
-            {"$set": update_data}
-        )
-        
-        if result.modified_count:
+        activity_id = find_id_by_title('activities', data["oldTitle"])
+        if activity_id and update_content('activities', activity_id, update_data):
             return jsonify({'message': 'Activity updated successfully'}), 200
         else:
             return jsonify({'error': 'No activity found with that title'}), 404
         
+    except AmbiguousTitle as e:
+        return jsonify({'error': str(e), 'ids': e.ids}), 409
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -342,16 +376,14 @@ def delete_activity():
         if 'title' not in data:
             return jsonify({'error': 'title is required'}), 400
         
-        # Delete from MongoDB
-        from db import activities_col
-        
-        result = activities_col.delete_one({"title": data["title"]})
-        
-        if result.deleted_count:
+        activity_id = find_id_by_title('activities', data["title"])
+        if activity_id and delete_content('activities', activity_id):
             return jsonify({'message': 'Activity deleted successfully'}), 200
         else:
             return jsonify({'error': 'No activity found with that title'}), 404
         
+    except AmbiguousTitle as e:
+        return jsonify({'error': str(e), 'ids': e.ids}), 409
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     
@@ -364,8 +396,9 @@ def download_report():
         return jsonify({"error": "Invalid request"}), 400
 
     try:
-        r = requests.get(url, stream=True)
+        r = http_get(url, stream=True)
         if r.status_code != 200:
+            r.close()
             return jsonify({"error": "Unable to fetch file"}), 500
 
         return Response(
@@ -375,5 +408,7 @@ def download_report():
                 "Content-Type": r.headers.get("Content-Type", "application/pdf")
             }
         )
+    except DependencyUnavailable as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": str(e.retry_after)}
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -0,0 +1,38 @@
+from flask import Blueprint, request, jsonify
+from utils.rate_limit import rate_limit
+from utils.search import search, SEARCH_TYPES, DEFAULT_SEARCH_LIMIT
+
+search_bp = Blueprint('search', __name__)
+
+
+# ==============================
+# SITE SEARCH
+# ==============================
+@search_bp.route('/search', methods=['GET'])
+@rate_limit('search', per_ip=(60, 60))
+def site_search():
+    """Search activities, announcements, highlights and albums: ?q=&types=&limit=&cursor="""
+    query = (request.args.get('q') or '').strip()
+    if not query:
+        return jsonify({'error': 'q is required'}), 400
+
+    types = None
+    if request.args.get('types'):
+        types = {t.strip() for t in request.args['types'].split(',') if t.strip()}
+        unknown = types - set(SEARCH_TYPES)
+        if unknown:
+            return jsonify({'error': f"Unknown types: {', '.join(sorted(unknown))}. Use: {', '.join(SEARCH_TYPES)}"}), 400
+
+    try:
+        items, next_cursor = search(
+            query,
+            types=types,
+            limit=request.args.get('limit', DEFAULT_SEARCH_LIMIT, type=int),
+            cursor=request.args.get('cursor')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    return jsonify({'items': items, 'next_cursor': next_cursor}), 200
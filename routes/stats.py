@@ -0,0 +1,44 @@
+from flask import Blueprint, request, jsonify
+from admin_register_user import admin_required
+from utils.stats import get_stats
+from utils.resilience import dependency_metrics
+from utils.invalidation_bus import worker_metrics, all_worker_metrics, report_metrics
+
+stats_bp = Blueprint('stats', __name__)
+
+
+# ==============================
+# DASHBOARD STATISTICS
+# ==============================
+@stats_bp.route('/stats', methods=['GET'])
+@admin_required
+def dashboard_stats():
+    """Users, activities, albums and media totals for the admin dashboard (?refresh=true recomputes all)"""
+    try:
+        return jsonify(get_stats(refresh=request.args.get('refresh') == 'true')), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# ==============================
+# OUTBOUND DEPENDENCY HEALTH
+# ==============================
+@stats_bp.route('/dependencies', methods=['GET'])
+@admin_required
+def dependency_health():
+    """Breaker state, bulkhead usage and retry counters for Cloudinary, SMTP, HTTP and Mongo"""
+    return jsonify(dependency_metrics()), 200
+
+
+# ==============================
+# CACHE INVALIDATION BUS
+# ==============================
+@stats_bp.route('/cache-bus', methods=['GET'])
+@admin_required
+def cache_bus():
+    """Invalidation bus lag for the worker that served this request and the last report of every worker"""
+    try:
+        report_metrics()
+        return jsonify({'worker': worker_metrics(), 'workers': all_worker_metrics()}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,5 +1,29 @@
 from db import db
-from werkzeug.security import generate_password_hash
+from datetime import datetime
+from utils.auth_engine import hash_password
+
+def ensure_indexes():
+    """Create the indexes used by the API (safe to run repeatedly)"""
+    from utils.media_index import ensure_media_indexes
+    from utils.idempotency import ensure_idempotency_indexes
+    from utils.auth_engine import ensure_user_indexes
+    from utils.reset_tokens import ensure_reset_token_indexes
+    from utils.revocation import ensure_revocation_indexes
+    from utils.content_store import ensure_content_indexes
+    from utils.activity_dates import ensure_activity_indexes
+    from utils.search import ensure_search_indexes
+    from utils.stats import ensure_stats_indexes
+    from utils.invalidation_bus import ensure_bus_indexes
+    ensure_media_indexes()
+    ensure_idempotency_indexes()
+    ensure_user_indexes()
+    ensure_reset_token_indexes()
+    ensure_revocation_indexes()
+    ensure_content_indexes()
+    ensure_activity_indexes()
+    ensure_search_indexes()
+    ensure_stats_indexes()
+    ensure_bus_indexes()
 
 def setup_database():
     """Initialize the database with default admin user and collections"""
@@ -19,7 +43,7 @@ def setup_database():
         # Create default admin user
         admin_data = {
             'email': 'admin@nss.com',
-            'password': generate_password_hash('admin123'),
+            'password': hash_password('admin123'),
             'role': 'admin'
         }
         users_col.insert_one(admin_data)
@@ -65,25 +89,25 @@ def setup_database():
             {
                 'title': 'Beach Cleanup Drive',
                 'description': 'Volunteers participated in cleaning the local beach and raising awareness about marine pollution.',
-                'date': '2025-09-20',
+                'date': datetime(2025, 9, 20),
                 'location': 'Marina Beach, Chennai'
             },
             {
                 'title': 'Blood Donation Camp',
                 'description': 'Annual blood donation camp organized in collaboration with local hospitals.',
-                'date': '2025-09-17',
+                'date': datetime(2025, 9, 17),
                 'location': 'SSN College Auditorium'
             },
             {
                 'title': 'Tree Plantation Drive',
                 'description': 'Planted 100 saplings in the campus and surrounding areas to promote environmental sustainability.',
-                'date': '2025-06-15',
+                'date': datetime(2025, 6, 15),
                 'location': 'SSN College Campus'
             },
             {
                 'title': 'Maintenance Visit',
                 'description': 'Visited local villages to conduct maintenance and repair work on community infrastructure.',
-                'date': '2025-09-23',
+                'date': datetime(2025, 9, 23),
                 'location': 'Thandalam Village'
             }
         ]
@@ -114,6 +138,9 @@ def setup_database():
         albums_col.insert_many(sample_albums)
         print("Added sample albums")
 
+    ensure_indexes()
+    print("Created indexes")
+
     print("Database setup completed!")
 
 if __name__ == '__main__':
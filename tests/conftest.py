@@ -0,0 +1,42 @@
+"""
+Shared test setup: point db.py at an in-memory mongomock client so tests
+never touch the MONGO_URI database.
+"""
+import os
+import sys
+import pytest
+import pymongo
+
+try:
+    import mongomock
+except ImportError:  # tests needing the database skip themselves
+    mongomock = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class _MockClient(mongomock.MongoClient if mongomock else object):
+    def __init__(self, *args, **kwargs):
+        kwargs.pop('serverSelectionTimeoutMS', None)
+        super().__init__()
+
+    @property
+    def admin(self):
+        class _Admin:
+            def command(self, *args, **kwargs):
+                return {'ok': 1}
+        return _Admin()
+
+
+if mongomock:
+    pymongo.MongoClient = _MockClient
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ["DB_NAME"] = "nss_portal_test"
+
+
+@pytest.fixture
+def db():
+    from db import db as database
+    for name in database.list_collection_names():
+        database.drop_collection(name)
+    return database
@@ -0,0 +1,25 @@
+from utils.cache import TTLCache
+
+
+def test_invalidate_during_load_does_not_store_stale_value():
+    cache = TTLCache(ttl=60)
+
+    def loader():
+        cache.invalidate('user')  # e.g. a role change lands while claims load
+        return 'stale'
+
+    assert cache.get_or_load('user', loader) == 'stale'
+    assert cache.get('user') is None
+    assert cache.get_or_load('user', lambda: 'fresh') == 'fresh'
+    assert cache.get('user') == 'fresh'
+
+
+def test_clear_during_load_does_not_store_stale_value():
+    cache = TTLCache(ttl=60)
+
+    def loader():
+        cache.clear()
+        return 'stale'
+
+    cache.get_or_load('user', loader)
+    assert cache.get('user') is None
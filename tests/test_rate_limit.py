@@ -0,0 +1,64 @@
+import pytest
+from flask import Flask, jsonify, request
+from utils import rate_limit as rate_limit_module
+from utils.rate_limit import MemoryBackend, RedisBackend, rate_limit
+
+
+def redis_backend():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")  # fakeredis needs it for EVALSHA
+    return RedisBackend(None, client=fakeredis.FakeRedis())
+
+
+@pytest.fixture(params=['memory', 'redis'])
+def backend(request, monkeypatch):
+    backend = MemoryBackend() if request.param == 'memory' else redis_backend()
+    monkeypatch.setattr(rate_limit_module, '_backend', backend)
+    monkeypatch.setattr(rate_limit_module, 'RATE_LIMIT_ENABLED', True)
+    return backend
+
+
+@pytest.fixture
+def client(backend):
+    app = Flask(__name__)
+
+    @app.route('/login', methods=['POST'])
+    @rate_limit('login', per_ip=(100, 60), per_account=(3, 300), message_key='msg',
+                account_failure_statuses=(401,))
+    def login():
+        ok = request.get_json()['password'] == 'right'
+        return jsonify(ok=ok), 200 if ok else 401
+
+    @app.route('/contact', methods=['POST'])
+    @rate_limit('contact', per_ip=(2, 600))
+    def contact():
+        return jsonify(ok=True), 200
+
+    return app.test_client()
+
+
+def test_bucket_refills(backend):
+    assert backend.consume('k', 1, 1.0, now=100)[0]
+    allowed, retry_after = backend.consume('k', 1, 1.0, now=100.5)
+    assert not allowed and 0 < retry_after <= 1
+    assert backend.consume('k', 1, 1.0, now=102)[0]
+
+
+def test_successful_logins_do_not_lock_the_account(client):
+    for _ in range(10):
+        assert client.post('/login', json={'email': 'a@nss.com', 'password': 'right'}).status_code == 200
+
+
+def test_failed_logins_lock_the_account(client):
+    for _ in range(3):
+        assert client.post('/login', json={'email': 'A@nss.com', 'password': 'wrong'}).status_code == 401
+    r = client.post('/login', json={'email': 'a@nss.com', 'password': 'right'})
+    assert r.status_code == 429 and int(r.headers['Retry-After']) >= 1
+    # Other accounts behind the same IP are unaffected
+    assert client.post('/login', json={'email': 'b@nss.com', 'password': 'right'}).status_code == 200
+
+
+def test_per_ip_limit(client):
+    assert client.post('/contact').status_code == 200
+    assert client.post('/contact').status_code == 200
+    assert client.post('/contact').status_code == 429
@@ -0,0 +1,98 @@
+import os
+from datetime import datetime, timedelta, timezone
+import pytest
+
+pytest.importorskip("mongomock")
+from utils import reconcile as reconcile_module
+from utils.reconcile import reconcile
+
+NOW = datetime(2025, 6, 1, tzinfo=timezone.utc)
+OLD = (NOW - timedelta(days=7)).strftime('%Y-%m-%dT%H:%M:%SZ')
+NEW = (NOW - timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M:%SZ')
+CLOUD = 'https://res.cloudinary.com/demo'
+
+
+class FakeCloudinaryAdmin:
+    """Stand-in for cloudinary.api: offset cursors, 100-id delete limit"""
+
+    def __init__(self, resources):
+        self.store = {(rt, public_id): created for rt, public_id, created in resources}
+        self.deleted = []
+
+    def resources(self, type, prefix, resource_type, max_results, next_cursor=None):
+        ids = sorted(p for rt, p in self.store if rt == resource_type and p.startswith(prefix))
+        start = int(next_cursor or 0)
+        page = {'resources': [{'public_id': p, 'created_at': self.store[(resource_type, p)]}
+                              for p in ids[start:start + max_results]]}
+        if start + max_results < len(ids):
+            page['next_cursor'] = str(start + max_results)
+        return page
+
+    def delete_resources(self, ids, resource_type, type):
+        assert len(ids) <= 100
+        self.deleted.extend(ids)
+        return {'deleted': {p: 'deleted' if self.store.pop((resource_type, p), None) else 'not_found'
+                            for p in ids}}
+
+
+@pytest.fixture
+def setup(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(reconcile_module, 'UPLOAD_FOLDER', str(tmp_path))
+    monkeypatch.setattr(reconcile_module, 'PAGE_SIZE', 2)  # force several pages
+    db['albums'].insert_one({'name': 'A', 'photos': [
+        {'url': f'{CLOUD}/image/upload/v1/nss/gallery/kept.jpg', 'public_id': 'nss/gallery/kept'},
+        {'url': 'http://localhost:5000/uploads/local_kept.jpg', 'filename': 'local_kept.jpg'},
+    ]})
+    db['activities'].insert_one({
+        'title': 'Drive',
+        'imageUrl': f'{CLOUD}/image/upload/v17/nss/activities/photos/cover.jpg',
+        'photos': [{'url': f'{CLOUD}/image/upload/v1/nss/activities/photos/p1.jpg', 'public_id': 'nss/activities/photos/p1'}],
+        'reports': [{'url': f'{CLOUD}/raw/upload/v1/nss/activities/reports/r.pdf', 'public_id': 'nss/activities/reports/r.pdf'}],
+    })
+    api = FakeCloudinaryAdmin([
+        ('image', 'nss/gallery/kept', OLD),
+        ('image', 'nss/gallery/orphan', OLD),
+        ('image', 'nss/gallery/fresh', NEW),
+        ('image', 'nss/activities/photos/cover', OLD),
+        ('image', 'nss/activities/photos/p1', OLD),
+        ('image', 'nss/activities/photos/stale', OLD),
+        ('raw', 'nss/activities/reports/r.pdf', OLD),
+        ('raw', 'nss/activities/reports/old.pdf', OLD),
+    ])
+    for name in ('local_kept.jpg', 'local_orphan.jpg'):
+        path = tmp_path / name
+        path.write_bytes(b'x')
+        old = (NOW - timedelta(days=7)).timestamp()
+        os.utime(path, (old, old))
+    return api, tmp_path
+
+
+def _orphans(report):
+    return {f['folder']: f['orphans'] for f in report['folders']}
+
+
+def test_dry_run_reports_orphans_without_deleting(setup):
+    api, uploads = setup
+    report = reconcile(api=api, dry_run=True, now=NOW)
+
+    assert _orphans(report) == {
+        'nss/gallery': ['nss/gallery/orphan'],
+        'nss/activities/photos': ['nss/activities/photos/stale'],
+        'nss/activities/reports': ['nss/activities/reports/old.pdf'],
+    }
+    assert report['local']['orphans'] == ['local_orphan.jpg']
+    assert api.deleted == []
+    assert (uploads / 'local_orphan.jpg').exists()
+
+
+def test_apply_deletes_only_orphans(setup):
+    api, uploads = setup
+    report = reconcile(api=api, dry_run=False, now=NOW)
+
+    assert sorted(api.deleted) == ['nss/activities/photos/stale', 'nss/activities/reports/old.pdf', 'nss/gallery/orphan']
+    # The activity cover image (imageUrl) and assets inside the grace period survive
+    assert ('image', 'nss/activities/photos/cover') in api.store
+    assert ('image', 'nss/gallery/fresh') in api.store
+    assert all(f['deleted'] == len(f['orphans']) for f in report['folders'])
+    assert not (uploads / 'local_orphan.jpg').exists()
+    assert (uploads / 'local_kept.jpg').exists()
@@ -0,0 +1,60 @@
+"""
+Activity dates are stored as BSON dates (midnight UTC) so they can be range
+scanned through an index; the API keeps exposing them as YYYY-MM-DD strings.
+Listing is newest first, paged on (date, _id) through utils.list_query.
+"""
+from datetime import datetime, timezone
+from db import db
+from utils.list_query import ListSpec
+
+DATE_FORMAT = '%Y-%m-%d'
+ACTIVITY_SORT = [('date', -1), ('_id', -1)]
+ACTIVITY_LIST_SPEC = ListSpec(
+    sorts={'date': [('date', -1)], 'title': [('title_key', 1)]},
+    default_sort='date',
+    fields=('title', 'description', 'date', 'location', 'status', 'photos', 'reports', 'imageUrl', 'version'),
+)
+
+
+def ensure_activity_indexes():
+    db['activities'].create_index([('status', 1), ('date', -1), ('_id', -1)])
+    db['activities'].create_index(ACTIVITY_SORT)
+
+
+def parse_activity_date(value):
+    """Turn a YYYY-MM-DD (or ISO) string into a datetime; datetimes pass through"""
+    if isinstance(value, datetime):
+        return value
+    try:
+        parsed = datetime.fromisoformat(str(value).strip())
+    except ValueError:
+        raise ValueError("Invalid date format. Use YYYY-MM-DD")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def format_activity_date(value):
+    return value.strftime(DATE_FORMAT) if isinstance(value, datetime) else value
+
+
+def render_activity_dates(activities):
+    """Replace stored datetimes with YYYY-MM-DD strings for the API (in place)"""
+    for activity in activities:
+        if 'date' in activity:
+            activity['date'] = format_activity_date(activity['date'])
+    return activities
+
+
+def activity_query(date_from=None, date_to=None, status=None):
+    """Build a filter served by the (status, date, _id) / (date, _id) indexes"""
+    query = {}
+    if status:
+        query['status'] = status
+    if date_from or date_to:
+        query['date'] = {}
+        if date_from:
+            query['date']['$gte'] = parse_activity_date(date_from)
+        if date_to:
+            query['date']['$lte'] = parse_activity_date(date_to)
+    return query
@@ -0,0 +1,66 @@
+"""
+Password hashing and login lookups.
+The hash algorithm/cost is configurable through PASSWORD_HASH_METHOD (any
+Werkzeug method string, e.g. "pbkdf2:sha256:600000" or "scrypt:32768:8:1").
+Hashes made with older settings are transparently upgraded on the next login.
+"""
+import os
+import threading
+from werkzeug.security import generate_password_hash, check_password_hash
+from db import db
+
+users_col = db['users']
+
+PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "pbkdf2:sha256:600000")
+PASSWORD_SALT_LENGTH = 16
+
+# Hashing is CPU bound; running more at once than there are cores only makes
+# every login in a burst slower, so extra requests queue here instead
+_hash_slots = threading.BoundedSemaphore(int(os.getenv("PASSWORD_HASH_CONCURRENCY", os.cpu_count() or 2)))
+
+LOGIN_PROJECTION = {'password': 1, 'role': 1, 'vertical': 1, 'token_version': 1}
+
+_configured_prefix = None
+
+
+def ensure_user_indexes():
+    users_col.create_index('email', unique=True)
+
+
+def hash_password(password):
+    """Hash a password with the configured method"""
+    with _hash_slots:
+        return generate_password_hash(password, method=PASSWORD_HASH_METHOD, salt_length=PASSWORD_SALT_LENGTH)
+
+
+def _method_prefix():
+    """The method string Werkzeug writes for the configured settings (e.g. 'pbkdf2:sha256:600000')"""
+    global _configured_prefix
+    if _configured_prefix is None:
+        _configured_prefix = hash_password('').split('$', 1)[0]
+    return _configured_prefix
+
+
+def needs_rehash(stored_hash):
+    return stored_hash.split('$', 1)[0] != _method_prefix()
+
+
+def find_login_user(email):
+    """Fetch only the fields the login flow needs, via the unique email index"""
+    return users_col.find_one({'email': email}, LOGIN_PROJECTION)
+
+
+def verify_password(user, password):
+    """Check a password and upgrade the stored hash if the settings changed"""
+    stored_hash = user.get('password') if user else None
+    if not stored_hash:
+        return False
+    with _hash_slots:
+        valid = check_password_hash(stored_hash, password)
+    if valid and needs_rehash(stored_hash):
+        # Matching on the old hash makes concurrent upgrades harmless
+        users_col.update_one(
+            {'_id': user['_id'], 'password': stored_hash},
+            {'$set': {'password': hash_password(password)}}
+        )
+    return valid
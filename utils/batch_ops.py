@@ -0,0 +1,126 @@
+"""
+Validation and grouping for the /admin/batch endpoint.
+Operations look like {"op": "insert"|"update"|"delete", "collection": ..., "id": ..., "data": {...}}
+and are turned into one bulk_write per collection.
+"""
+import re
+from bson.objectid import ObjectId
+from pymongo import InsertOne, UpdateOne, DeleteOne
+from utils.validation import validate_email, validate_password, validate_role, validate_vertical
+from utils.content_store import TITLE_FIELDS, prepare_content
+
+MAX_BATCH_OPERATIONS = 1000
+
+# Writable fields per collection, mirroring the single-item admin routes
+BATCH_COLLECTIONS = {
+    'users': {
+        'fields': {'email', 'password', 'role', 'vertical'},
+        'required': ('email', 'password', 'role'),
+    },
+    'announcements': {
+        'fields': {'activityName', 'activityDescription'},
+        'required': ('activityName',),
+    },
+    'highlights': {
+        'fields': {'title', 'description'},
+        'required': ('title',),
+    },
+    'activities': {
+        'fields': {'title', 'description', 'date', 'photos', 'reports', 'location', 'status'},
+        'required': ('title', 'description', 'date'),
+    },
+}
+ACTIVITY_DEFAULTS = {'photos': [], 'reports': [], 'location': 'SSN Campus', 'status': 'upcoming'}
+
+
+def _validate_user_fields(data):
+    checks = []
+    if 'email' in data:
+        checks.append(validate_email(data['email']))
+    if 'password' in data:
+        checks.append(validate_password(data['password']))
+    if 'role' in data:
+        checks.append(validate_role(data['role']))
+    if data.get('role') == 'verticalhead' or data.get('vertical'):
+        checks.append(validate_vertical(data.get('vertical')))
+    for is_valid, error in checks:
+        if not is_valid:
+            return error
+    return None
+
+
+def _target_filter(collection, op):
+    """Return the filter addressing an existing document, or raise ValueError"""
+    if collection == 'users' and op.get('email'):
+        return {'email': op['email']}
+    if not op.get('id'):
+        raise ValueError("id is required" + (" (or email)" if collection == 'users' else ""))
+    try:
+        return {'_id': ObjectId(op['id'])}
+    except Exception:
+        raise ValueError("Invalid id format")
+
+
+def validate_operation(op):
+    """Return (normalized operation, None) or (None, error)"""
+    if not isinstance(op, dict):
+        return None, "Operation must be an object"
+    kind = op.get('op')
+    collection = op.get('collection')
+    if kind not in ('insert', 'update', 'delete'):
+        return None, "op must be insert, update or delete"
+    if collection not in BATCH_COLLECTIONS:
+        return None, f"collection must be one of: {', '.join(BATCH_COLLECTIONS)}"
+
+    spec = BATCH_COLLECTIONS[collection]
+    data = op.get('data') or {}
+    if not isinstance(data, dict):
+        return None, "data must be an object"
+    unknown = set(data) - spec['fields']
+    if unknown:
+        return None, f"Unknown fields: {', '.join(sorted(unknown))}"
+
+    normalized = {'op': kind, 'collection': collection, 'data': dict(data)}
+    if kind == 'insert':
+        for field in spec['required']:
+            if not data.get(field):
+                return None, f"{field} is required"
+        if collection == 'activities':
+            normalized['data'] = dict(ACTIVITY_DEFAULTS, **data)
+    else:
+        try:
+            normalized['filter'] = _target_filter(collection, op)
+        except ValueError as e:
+            return None, str(e)
+        if kind == 'update' and not data:
+            return None, "data is required for update"
+
+    if collection == 'users':
+        error = _validate_user_fields(data)
+        if error:
+            return None, error
+    if collection == 'activities' and 'date' in data and not re.match(r'^\d{4}-\d{2}-\d{2}$', str(data['date'])):
+        return None, "Invalid date format. Use YYYY-MM-DD"
+    return normalized, None
+
+
+def build_write(op, hash_password):
+    """Translate a validated operation into a pymongo write model"""
+    data = dict(op['data'])
+    if op['collection'] == 'users' and 'password' in data:
+        data['password'] = hash_password(data['password'])
+    if op['collection'] in TITLE_FIELDS:
+        prepare_content(op['collection'], data)
+
+    if op['op'] == 'insert':
+        data['_id'] = op['inserted_id'] = ObjectId()
+        return InsertOne(data)
+    if op['op'] == 'update':
+        update = {'$set': data}
+        if op['collection'] == 'users' and {'email', 'password', 'role'} & set(data):
+            # Same rule as /update-user: outstanding tokens no longer match the account
+            update['$inc'] = {'token_version': 1}
+        elif op['collection'] in TITLE_FIELDS:
+            update['$inc'] = {'version': 1}
+        return UpdateOne(op['filter'], update)
+    return DeleteOne(op['filter'])
@@ -0,0 +1,80 @@
+"""
+Small thread-safe in-process TTL cache.
+"""
+import threading
+import time
+
+_MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, ttl, maxsize=1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = {}
+        # Bumped by invalidate()/clear() so a load that started earlier can't store stale data
+        self._generations = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._store(key, value)
+
+    def _store(self, key, value):
+        if len(self._data) >= self.maxsize and key not in self._data:
+            self._evict_expired()
+            if len(self._data) >= self.maxsize:
+                # Drop the entry closest to expiry
+                self._data.pop(min(self._data, key=lambda k: self._data[k][1]))
+        self._data[key] = (value, time.monotonic() + self.ttl)
+
+    def _generation(self, key):
+        return self._epoch, self._generations.get(key, 0)
+
+    def get_or_load(self, key, loader):
+        """Return the cached value, calling loader() on a miss (None results are cached too)"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            with self._lock:
+                generation = self._generation(key)
+            value = loader()
+            with self._lock:
+                # Skip the store if the key was invalidated while loading
+                if self._generation(key) == generation:
+                    self._store(key, value)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            self._generations[key] = self._generations.get(key, 0) + 1
+            if len(self._generations) > self.maxsize:
+                # Forgetting counters is safe once every in-flight load sees a new epoch
+                self._generations.clear()
+                self._epoch += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._generations.clear()
+            self._epoch += 1
+
+    def __len__(self):
+        return len(self._data)
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        for key in [k for k, (_, expires_at) in self._data.items() if expires_at < now]:
+            del self._data[key]
@@ -0,0 +1,202 @@
+"""
+A small cross-process pub/sub over a Mongo capped collection.
+
+Every message gets a strictly increasing `seq` (from a counter document), so a
+reader can resume with "everything after seq N". Each process runs one
+listener thread that follows the collection with a tailable, awaiting cursor
+and hands new messages to in-process callbacks. If tailable cursors aren't
+available (a non-capped collection, mongomock), the listener falls back to
+polling with the same seq filter.
+
+Allocating the seq and inserting are two operations, so concurrent publishers
+can insert out of order (seq 8 lands before seq 7). Readers therefore deliver
+strictly in seq order: a message after a gap is held back until the gap fills,
+or until CHANNEL_GAP_SECONDS pass (a publisher died between the two steps).
+Resuming with "after seq N" then never skips a late message.
+
+Change streams were not used because they require a replica set; capped
+collections work on every deployment, including a single mongod.
+"""
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pymongo import CursorType, ReturnDocument
+from pymongo.errors import CollectionInvalid, OperationFailure, PyMongoError
+from db import db
+
+CHANNEL_POLL_SECONDS = float(os.getenv("CHANNEL_POLL_SECONDS", "1"))
+# How long a missing seq may hold back later messages before it is skipped
+CHANNEL_GAP_SECONDS = float(os.getenv("CHANNEL_GAP_SECONDS", "5"))
+_worker = {'pid': None, 'id': None}
+
+
+def worker_id():
+    """Identifies this process in published messages (pid alone repeats across hosts).
+    Recomputed after a fork, so workers forked from a preloaded app differ."""
+    if _worker['pid'] != os.getpid():
+        _worker['pid'] = os.getpid()
+        _worker['id'] = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+    return _worker['id']
+
+
+class CappedChannel:
+    def __init__(self, name, size_bytes=1024 * 1024, max_messages=5000):
+        self.name = name
+        self.size_bytes = size_bytes
+        self.max_messages = max_messages
+        self.col = db[name]
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._tailable = True
+        self._ensured = False
+        self.last_seq = None  # highest seq delivered; everything below it was delivered or skipped
+        self._held = {}  # seq -> (message, monotonic time first seen) waiting for a gap to fill
+        self.stats = {'published': 0, 'received': 0, 'cursor_opens': 0, 'gaps_skipped': 0}
+
+    def ensure(self):
+        """Create the capped collection if it doesn't exist yet"""
+        if self._ensured:
+            return
+        try:
+            db.create_collection(self.name, capped=True, size=self.size_bytes, max=self.max_messages)
+        except CollectionInvalid:
+            pass  # already exists
+        except (NotImplementedError, OperationFailure) as e:
+            # mongomock and restricted users can't create capped collections; poll a plain one
+            print(f"Channel {self.name} is not capped ({e}); falling back to polling")
+            self._tailable = False
+        self.col.create_index('seq')
+        self._ensured = True
+
+    # ---- publishing ----
+
+    def _next_seq(self):
+        counter = db['counters'].find_one_and_update(
+            {'_id': self.name}, {'$inc': {'seq': 1}}, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        return counter['seq']
+
+    def publish(self, message):
+        # The first insert would otherwise create a plain, non-capped collection
+        self.ensure()
+        doc = dict(message, seq=self._next_seq(), origin=worker_id(), at=datetime.now(timezone.utc))
+        self.col.insert_one(doc)
+        self.stats['published'] += 1
+        doc.pop('_id', None)
+        return doc
+
+    # ---- reading ----
+
+    def latest_seq(self):
+        doc = self.col.find_one({}, {'seq': 1}, sort=[('seq', -1)])
+        return doc['seq'] if doc else 0
+
+    def oldest_seq(self):
+        doc = self.col.find_one({}, {'seq': 1}, sort=[('seq', 1)])
+        return doc['seq'] if doc else None
+
+    def read_after(self, seq, limit=1000):
+        """Messages with seq > `seq`, oldest first, stopping at a gap that may still fill"""
+        messages = []
+        now = datetime.now(timezone.utc)
+        for message in self.col.find({'seq': {'$gt': seq}}, {'_id': 0}).sort('seq', 1).limit(limit):
+            if message['seq'] != seq + 1 and not self._gap_expired(now - _aware(message['at'])):
+                break
+            messages.append(message)
+            seq = message['seq']
+        return messages
+
+    @staticmethod
+    def _gap_expired(age):
+        return age.total_seconds() >= CHANNEL_GAP_SECONDS
+
+    # ---- listening ----
+
+    def listen(self, callback):
+        """Call callback(message) in this process for every message published from now on"""
+        with self._lock:
+            self._callbacks.append(callback)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"channel-{self.name}", daemon=True)
+                self._thread.start()
+        return callback
+
+    def _start(self):
+        """Begin at the current end of the channel; retried until Mongo is reachable"""
+        while True:
+            try:
+                self.ensure()
+                self.last_seq = self.latest_seq()
+                return
+            except PyMongoError as e:
+                print(f"Channel {self.name} could not start: {e}")
+                time.sleep(CHANNEL_POLL_SECONDS)
+
+    def _receive(self, message):
+        """Deliver messages in seq order, holding back any that arrive after a gap"""
+        if message['seq'] <= self.last_seq:
+            return  # already delivered (e.g. re-read after reopening the cursor)
+        self._held.setdefault(message['seq'], (message, time.monotonic()))
+        self._release_held()
+
+    def _release_held(self):
+        while self._held:
+            seq = min(self._held)
+            message, seen_at = self._held[seq]
+            if seq != self.last_seq + 1:
+                if time.monotonic() - seen_at < CHANNEL_GAP_SECONDS:
+                    return
+                self.stats['gaps_skipped'] += 1
+                print(f"Channel {self.name}: skipping missing seq {self.last_seq + 1}..{seq - 1}")
+            del self._held[seq]
+            self._dispatch(message)
+
+    def _dispatch(self, message):
+        self.last_seq = message['seq']
+        self.stats['received'] += 1
+        with self._lock:
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback(message)
+            except Exception as e:
+                print(f"Channel {self.name} callback {getattr(callback, '__name__', callback)} failed: {e}")
+
+    def _cursor(self):
+        self.stats['cursor_opens'] += 1
+        query = {'seq': {'$gt': self.last_seq}}
+        if self._tailable:
+            return self.col.find(query, {'_id': 0}, cursor_type=CursorType.TAILABLE_AWAIT)
+        return self.col.find(query, {'_id': 0}).sort('seq', 1)
+
+    def _run(self):
+        self._start()
+        while True:
+            try:
+                cursor = self._cursor()
+                # A tailable cursor stays alive and blocks server-side while waiting for inserts
+                while cursor.alive:
+                    for message in cursor:
+                        self._receive(message)
+                    # Idle: let a gap that has timed out release the messages behind it
+                    self._release_held()
+                    if not self._tailable:
+                        break
+            except OperationFailure as e:
+                if self._tailable:
+                    print(f"Channel {self.name}: tailable cursor unavailable ({e}); polling instead")
+                    self._tailable = False
+                    continue
+                print(f"Channel {self.name} read failed: {e}")
+            except PyMongoError as e:
+                print(f"Channel {self.name} read failed: {e}")
+            time.sleep(CHANNEL_POLL_SECONDS)
+
+
+def _aware(at):
+    # Mongo returns naive UTC datetimes unless the client is tz_aware
+    return at if at.tzinfo else at.replace(tzinfo=timezone.utc)
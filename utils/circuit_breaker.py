@@ -0,0 +1,119 @@
+"""
+Circuit breakers for calls to external dependencies (Mongo, Cloudinary, ...).
+After `failure_threshold` consecutive failures (or calls slower than
+`slow_call_seconds`) the breaker opens and callers fail fast. After
+`reset_timeout` seconds one trial call is let through (half-open); success
+closes the breaker, failure opens it again.
+"""
+import threading
+import time
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, name, retry_after):
+        super().__init__(f"{name} is unavailable (circuit open)")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=3, reset_timeout=30, slow_call_seconds=None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_seconds = slow_call_seconds
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self.stats = {'successes': 0, 'failures': 0, 'rejected': 0, 'opened': 0}
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self):
+        """Return True if a call may go ahead (reserves the single half-open trial)"""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+                self._trial_in_flight = False
+            if self._state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.stats['rejected'] += 1
+            return False
+
+    def retry_after(self):
+        with self._lock:
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def record_success(self, elapsed=None):
+        if self.slow_call_seconds is not None and elapsed is not None and elapsed > self.slow_call_seconds:
+            self.record_failure()
+            return
+        with self._lock:
+            self.stats['successes'] += 1
+            self._failures = 0
+            self._state = CLOSED
+            self._trial_in_flight = False
+
+    def release(self):
+        """End a call that says nothing about the dependency: frees the half-open trial slot"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.stats['failures'] += 1
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.stats['opened'] += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def call(self, fn, *args, **kwargs):
+        """Run fn through the breaker; raises CircuitOpenError when open"""
+        if not self.allow():
+            raise CircuitOpenError(self.name, self.retry_after())
+        started = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success(time.monotonic() - started)
+        return result
+
+    def snapshot(self):
+        return {'name': self.name, 'state': self.state, 'consecutive_failures': self._failures, **self.stats}
+
+
+_breakers = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(name, **options):
+    """Return the process-wide breaker for a dependency, creating it on first use"""
+    with _registry_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, **options)
+        return _breakers[name]
+
+
+def breaker_states():
+    with _registry_lock:
+        breakers = list(_breakers.values())
+    return [breaker.snapshot() for breaker in breakers]
@@ -0,0 +1,65 @@
+"""
+Cached user claims (role, vertical, token version) for authorization checks.
+Entries live for a short TTL and are invalidated explicitly by the admin user
+routes, and in other workers through `users` change events. Each user has a
+token_version that is embedded in their JWT at login; bumping it (on
+role/password changes or deletion) invalidates old tokens.
+"""
+import os
+from db import db
+from utils.cache import TTLCache
+from utils.content_events import subscribe, notify_change
+
+users_col = db['users']
+
+CLAIMS_TTL_SECONDS = int(os.getenv("CLAIMS_CACHE_TTL", "30"))
+TOKEN_VERSION_CLAIM = 'tv'
+
+_claims = TTLCache(ttl=CLAIMS_TTL_SECONDS, maxsize=10000)
+
+
+def get_user_claims(email):
+    """Return {'role', 'vertical', 'token_version'} for a user, or None if they don't exist"""
+    if not email:
+        return None
+
+    def load():
+        user = users_col.find_one({'email': email}, {'_id': 0, 'role': 1, 'vertical': 1, 'token_version': 1})
+        if not user:
+            return None
+        return {
+            'role': user.get('role'),
+            'vertical': user.get('vertical') or '',
+            'token_version': user.get('token_version', 0)
+        }
+
+    return _claims.get_or_load(email, load)
+
+
+def invalidate_user_claims(*emails):
+    for email in emails:
+        if email:
+            _claims.invalidate(email)
+
+
+def bump_token_version(email):
+    """Invalidate every token issued to the user so far"""
+    users_col.update_one({'email': email}, {'$inc': {'token_version': 1}})
+    invalidate_user_claims(email)
+    notify_change('users', email)
+
+
+def token_is_current(jwt_claims, user_claims):
+    """True if the JWT was issued for the user's current token version"""
+    return bool(user_claims) and jwt_claims.get(TOKEN_VERSION_CLAIM, 0) == user_claims['token_version']
+
+
+def evict_user_claims(event):
+    """Drop the changed user's claims (all claims for bulk changes without a key)"""
+    if event['key']:
+        _claims.invalidate(event['key'])
+    else:
+        _claims.clear()
+
+
+subscribe(evict_user_claims, {'users'})
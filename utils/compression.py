@@ -0,0 +1,133 @@
+"""
+Response compression.
+
+An after_request hook compresses response bodies with brotli or gzip,
+whichever the client's Accept-Encoding prefers. It only compresses:
+  - bodies of at least COMPRESS_MIN_BYTES (tiny bodies grow or save nothing),
+  - compressible MIME types (JSON, text, CSV, SVG, ...),
+  - buffered responses; streams (exports, SSE, downloads) pass through,
+  - paths outside /uploads and /download-report (images/PDFs are already compressed).
+
+Compressed bodies are kept in a byte-bounded LRU keyed by the body digest and
+encoding, so repeated identical responses (cached read models, snapshots) are
+served without compressing again.
+"""
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # gzip only without the brotli package
+    brotli = None
+
+COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "true").lower() != "false"
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "5"))
+COMPRESS_CACHE_BYTES = int(os.getenv("COMPRESS_CACHE_BYTES", str(32 * 1024 * 1024)))
+
+COMPRESSIBLE_TYPES = {
+    'application/json', 'application/x-ndjson', 'application/javascript', 'application/xml',
+    'text/html', 'text/plain', 'text/css', 'text/csv', 'text/javascript', 'text/xml',
+    'image/svg+xml',
+}
+SKIP_PREFIXES = ('/uploads', '/download-report')
+
+
+def _gzip(body):
+    return gzip.compress(body, compresslevel=COMPRESS_GZIP_LEVEL, mtime=0)
+
+
+def _brotli(body):
+    return brotli.compress(body, quality=COMPRESS_BROTLI_QUALITY)
+
+
+# Server preference order when the client rates encodings equally
+ENCODERS = {'br': _brotli, 'gzip': _gzip} if brotli is not None else {'gzip': _gzip}
+
+
+class CompressedCache:
+    """LRU of compressed bodies, bounded by total compressed size"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'bytes_in': 0, 'bytes_out': 0}
+
+    def compress(self, body, encoding):
+        key = (hashlib.blake2b(body, digest_size=16).digest(), encoding)
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is not None:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return compressed
+        compressed = ENCODERS[encoding](body)
+        with self._lock:
+            self.stats['misses'] += 1
+            self.stats['bytes_in'] += len(body)
+            self.stats['bytes_out'] += len(compressed)
+            if len(compressed) <= self.max_bytes and key not in self._entries:
+                self._entries[key] = compressed
+                self._size += len(compressed)
+                while self._size > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._size -= len(evicted)
+        return compressed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+compressed_cache = CompressedCache(COMPRESS_CACHE_BYTES)
+
+
+def negotiate_encoding(accept_encodings):
+    """Best encoding we support from a parsed Accept-Encoding header, or None for identity"""
+    return accept_encodings.best_match(list(ENCODERS))
+
+
+def _should_compress(response):
+    if request.method == 'HEAD' or request.path.startswith(SKIP_PREFIXES):
+        return False
+    if response.direct_passthrough or response.is_streamed:
+        return False
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if 'Content-Encoding' in response.headers:
+        return False
+    return response.mimetype in COMPRESSIBLE_TYPES
+
+
+def compress_response(response):
+    if not COMPRESS_ENABLED or not _should_compress(response):
+        return response
+    # The body depends on Accept-Encoding from here on, even when sent uncompressed
+    response.vary.add('Accept-Encoding')
+    if response.content_length is not None and response.content_length < COMPRESS_MIN_BYTES:
+        return response
+    encoding = negotiate_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_BYTES:
+        return response
+    compressed = compressed_cache.compress(body, encoding)
+    if len(compressed) >= len(body):
+        return response
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def init_compression(app):
+    if COMPRESS_ENABLED:
+        app.after_request(compress_response)
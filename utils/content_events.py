@@ -0,0 +1,53 @@
+"""
+Change notifications for content writes.
+Every write path calls notify_change(collection, key, version) once the write
+has been committed; caches and read models subscribe() to drop or rebuild
+whatever they derived from that collection.
+
+Changes committed by other workers arrive through the invalidation bus
+(utils/invalidation_bus.py) and are replayed with apply_remote_change().
+Subscribers with shared side effects (writing to Mongo or disk, publishing to
+the bus itself) subscribe with local_only=True so only the worker that made
+the write runs them.
+"""
+import threading
+
+_subscribers = []
+_lock = threading.Lock()
+
+
+def subscribe(callback, collections=None, local_only=False):
+    """Call callback(event) for changes to the given collections (all if None)"""
+    with _lock:
+        _subscribers.append((callback, set(collections) if collections else None, local_only))
+    return callback
+
+
+def _dispatch(event, remote):
+    with _lock:
+        subscribers = list(_subscribers)
+    for callback, collections, local_only in subscribers:
+        if collections is not None and event['collection'] not in collections:
+            continue
+        if remote and local_only:
+            continue
+        try:
+            callback(event)
+        except Exception as e:
+            # A broken subscriber must not fail the write that triggered it
+            print(f"Change subscriber {getattr(callback, '__name__', callback)} failed: {e}")
+
+
+def notify_change(collection, key=None, version=None):
+    event = {
+        'collection': collection,
+        'key': str(key) if key is not None else None,
+        'version': version,
+    }
+    _dispatch(event, remote=False)
+    return event
+
+
+def apply_remote_change(event):
+    """Run the process-local subscribers (cache evictions) for a change made by another worker"""
+    _dispatch(event, remote=True)
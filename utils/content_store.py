@@ -0,0 +1,160 @@
+"""
+Id-addressed updates/deletes for activities, announcements and highlights.
+Every document carries a `version` (missing means 0) used for optimistic
+concurrency, and a normalized, indexed `title_key` so the legacy title-based
+admin routes can resolve a document without regex scans.
+"""
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from db import db
+from utils.media_index import detach_owner, owner_ref, sync_activity_media, ACTIVITY_URL_FIELDS
+from utils.activity_dates import parse_activity_date
+from utils.content_events import notify_change
+from utils.stats import record_change, STATS_DELTAS
+
+# Which field acts as the "title" of each collection
+TITLE_FIELDS = {
+    'activities': 'title',
+    'announcements': 'activityName',
+    'highlights': 'title',
+}
+CONTENT_FIELDS = {
+    'activities': {'title', 'description', 'date', 'photos', 'reports', 'location', 'status', 'imageUrl'},
+    'announcements': {'activityName', 'activityDescription'},
+    'highlights': {'title', 'description'},
+}
+
+
+class VersionConflict(Exception):
+    def __init__(self, current_version):
+        super().__init__(f"Document was modified (current version {current_version})")
+        self.current_version = current_version
+
+
+class AmbiguousTitle(Exception):
+    def __init__(self, title, ids):
+        super().__init__(f"Several documents match the title '{title}'; use the id instead")
+        self.ids = [str(i) for i in ids]
+
+
+def title_key(title):
+    """Case- and whitespace-insensitive lookup key for a title"""
+    return ' '.join(str(title or '').split()).casefold()
+
+
+def ensure_content_indexes():
+    for collection in TITLE_FIELDS:
+        db[collection].create_index('title_key')
+
+
+def with_title_key(collection, doc):
+    """Set title_key on a document (or $set payload) that contains the title field"""
+    field = TITLE_FIELDS[collection]
+    if field in doc:
+        doc['title_key'] = title_key(doc[field])
+    return doc
+
+
+def prepare_content(collection, doc):
+    """Normalize a document (or $set payload) before writing: title_key, and a BSON date for activities"""
+    with_title_key(collection, doc)
+    if collection == 'activities' and doc.get('date'):
+        doc['date'] = parse_activity_date(doc['date'])
+    return doc
+
+
+def parse_object_id(value):
+    try:
+        return ObjectId(value)
+    except Exception:
+        return None
+
+
+def _version_filter(expected_version):
+    if expected_version is None:
+        return {}
+    if expected_version == 0:
+        return {'$or': [{'version': 0}, {'version': {'$exists': False}}]}
+    return {'version': expected_version}
+
+
+def find_id_by_title(collection, title):
+    """Resolve a title to a document id through the indexed title_key.
+
+    Among several case/whitespace-insensitive matches a unique exact title
+    wins; otherwise AmbiguousTitle is raised instead of picking an arbitrary
+    document. Documents written before title_key existed need
+    migrate_title_keys.py to be found.
+    """
+    field = TITLE_FIELDS[collection]
+    docs = list(db[collection].find({'title_key': title_key(title)}, {'_id': 1, field: 1}).limit(20))
+    if len(docs) > 1:
+        docs = [doc for doc in docs if doc.get(field) == title] or docs
+    if len(docs) > 1:
+        raise AmbiguousTitle(title, [doc['_id'] for doc in docs])
+    return docs[0]['_id'] if docs else None
+
+
+def update_content(collection, doc_id, fields, expected_version=None):
+    """Apply a $set to one document; returns the updated doc or None if it doesn't exist"""
+    fields = prepare_content(collection, dict(fields))
+    query = {'_id': doc_id}
+    query.update(_version_filter(expected_version))
+    # The pre-image tells us which media the update dropped; fields are all top-level,
+    # so the post-image is the pre-image with the $set/$inc applied
+    previous = db[collection].find_one_and_update(
+        query,
+        {'$set': fields, '$inc': {'version': 1}},
+        return_document=ReturnDocument.BEFORE
+    )
+    if previous is None:
+        if expected_version is not None:
+            current = db[collection].find_one({'_id': doc_id}, {'version': 1})
+            if current is not None:
+                raise VersionConflict(current.get('version', 0))
+        return None
+    updated = dict(previous, **fields, version=previous.get('version', 0) + 1)
+    if collection == 'activities' and set(fields) & {'photos', 'reports', *ACTIVITY_URL_FIELDS}:
+        # New photos/reports/cover image must appear in the media index like uploads do,
+        # and replaced ones must stop listing this activity as an owner
+        sync_activity_media(previous, updated)
+    if collection in STATS_DELTAS and set(fields) & {'status', 'date'}:
+        record_change(collection, previous, updated)
+    notify_change(collection, doc_id, updated['version'])
+    return updated
+
+
+def delete_content(collection, doc_id, expected_version=None):
+    """Delete one document; returns the deleted doc or None if it doesn't exist"""
+    query = {'_id': doc_id}
+    query.update(_version_filter(expected_version))
+    deleted = db[collection].find_one_and_delete(query, projection={'_id': 1, 'version': 1, 'status': 1, 'date': 1})
+    if deleted is None and expected_version is not None:
+        current = db[collection].find_one({'_id': doc_id}, {'version': 1})
+        if current is not None:
+            raise VersionConflict(current.get('version', 0))
+    if deleted is not None:
+        if collection == 'activities':
+            detach_owner(owner_ref('activity', doc_id))
+        if collection in STATS_DELTAS:
+            record_change(collection, before=deleted)
+        notify_change(collection, doc_id, deleted.get('version', 0))
+    return deleted
+
+
+def backfill_title_keys(batch_size=500):
+    """Populate title_key for documents written before it existed; returns the count"""
+    total = 0
+    for collection, field in TITLE_FIELDS.items():
+        col = db[collection]
+        ops = []
+        for doc in col.find({'title_key': {'$exists': False}}, {field: 1}):
+            ops.append(UpdateOne({'_id': doc['_id']}, {'$set': {'title_key': title_key(doc.get(field))}}))
+            if len(ops) >= batch_size:
+                col.bulk_write(ops, ordered=False)
+                total += len(ops)
+                ops = []
+        if ops:
+            col.bulk_write(ops, ordered=False)
+            total += len(ops)
+    return total
@@ -0,0 +1,70 @@
+"""
+Content change feed for the /api/events server-sent events stream.
+
+Every committed write is published on the invalidation bus's `change_events`
+capped channel (utils/invalidation_bus.py), so the change reaches every
+gunicorn worker; with INVALIDATION_BUS_ENABLED=false nothing is published and
+the stream stays silent. Each worker's listener thread fans new messages out to the
+queues of its connected SSE clients. Clients receive compact (collection, id,
+version) notifications and refetch only what changed.
+"""
+import os
+import queue
+import threading
+from utils.invalidation_bus import change_channel
+
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "256"))
+# Only changes to publicly readable content reach SSE clients (user emails etc. must not)
+PUBLIC_COLLECTIONS = {'activities', 'albums', 'highlights', 'announcements'}
+
+
+def compact(message):
+    """The client-facing part of a channel message"""
+    return {'collection': message['collection'], 'id': message.get('key'), 'version': message.get('version')}
+
+
+class ChangeFeed:
+    """Fans channel messages out to the SSE clients connected to this worker"""
+
+    # Put on a client's queue when it fell too far behind; the stream tells it to refetch
+    OVERFLOW = object()
+
+    def __init__(self, channel):
+        self.channel = channel
+        self._clients = set()
+        self._lock = threading.Lock()
+        self._listening = False
+
+    def connect(self):
+        with self._lock:
+            if not self._listening:
+                self.channel.listen(self._fan_out)
+                self._listening = True
+            client = queue.Queue(maxsize=EVENTS_QUEUE_SIZE)
+            self._clients.add(client)
+        return client
+
+    def disconnect(self, client):
+        with self._lock:
+            self._clients.discard(client)
+
+    def client_count(self):
+        with self._lock:
+            return len(self._clients)
+
+    def _fan_out(self, message):
+        if message.get('collection') not in PUBLIC_COLLECTIONS:
+            return
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            try:
+                client.put_nowait(message)
+            except queue.Full:
+                # Drop the backlog and let the client resync instead of blocking the listener
+                with client.mutex:
+                    client.queue.clear()
+                client.put_nowait(self.OVERFLOW)
+
+
+change_feed = ChangeFeed(change_channel)
@@ -0,0 +1,192 @@
+"""
+Streaming NDJSON/CSV export and import for content collections.
+Exports iterate a Mongo cursor in fixed batches and yield encoded (optionally
+gzip-compressed) chunks, so memory use stays constant regardless of size.
+Imports read records in chunks and upsert them with bulk_write keyed by _id.
+Only the collection's content fields are imported; each record goes through
+prepare_content (title_key, BSON dates) and bumps the document version like
+any other edit, so imported content works with the title and version checks.
+"""
+import csv
+import gzip
+import io
+import json
+import zlib
+from datetime import datetime
+from bson import json_util
+from bson.json_util import JSONOptions, JSONMode
+from bson.objectid import ObjectId
+from pymongo import UpdateOne, InsertOne
+
+EXPORT_COLLECTIONS = {
+    'activities': ['_id', 'title', 'description', 'date', 'location', 'status', 'photos', 'reports', 'imageUrl'],
+    'announcements': ['_id', 'activityName', 'activityDescription'],
+    'highlights': ['_id', 'title', 'description'],
+}
+# Stored as BSON dates; string values (CSV, older exports) are converted on import
+DATE_COLUMNS = {'activities': {'date'}}
+EXPORT_BATCH_SIZE = 1000
+IMPORT_CHUNK_SIZE = 1000
+FLUSH_BYTES = 64 * 1024  # encoded output is yielded in pieces of about this size
+
+_JSON_OPTIONS = JSONOptions(json_mode=JSONMode.RELAXED)
+
+
+def _bson_default(value):
+    return json_util.default(value, _JSON_OPTIONS)
+
+
+def _dumps(value):
+    # The C JSON encoder handles plain types; only BSON types (ObjectId, dates) go through json_util
+    return json.dumps(value, default=_bson_default, separators=(',', ':'))
+
+
+def _encode_ndjson(docs):
+    for doc in docs:
+        yield _dumps(doc) + '\n'
+
+
+def _encode_csv(docs, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for doc in docs:
+        row = []
+        for column in columns:
+            value = doc.get(column, '')
+            if isinstance(value, ObjectId):
+                value = str(value)
+            elif isinstance(value, datetime):
+                value = value.isoformat()
+            elif isinstance(value, (list, dict)):
+                value = _dumps(value)
+            row.append(value)
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+
+def _batched_bytes(pieces):
+    """Join small encoded pieces into ~FLUSH_BYTES chunks"""
+    parts, size = [], 0
+    for piece in pieces:
+        data = piece.encode('utf-8')
+        parts.append(data)
+        size += len(data)
+        if size >= FLUSH_BYTES:
+            yield b''.join(parts)
+            parts, size = [], 0
+    if parts:
+        yield b''.join(parts)
+
+
+def _gzip_stream(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def iter_export(col, collection, fmt='ndjson', compress=True, batch_size=EXPORT_BATCH_SIZE, docs=None):
+    """Yield encoded export bytes for a collection (docs can be passed in for offline use)"""
+    if docs is None:
+        docs = col.find({}, batch_size=batch_size).sort('_id', 1)
+    if fmt == 'csv':
+        pieces = _encode_csv(docs, EXPORT_COLLECTIONS[collection])
+    else:
+        pieces = _encode_ndjson(docs)
+    chunks = _batched_bytes(pieces)
+    return _gzip_stream(chunks) if compress else chunks
+
+
+def _open_text(stream):
+    """Wrap a binary stream as text, transparently decompressing gzip input"""
+    buffered = io.BufferedReader(stream) if not hasattr(stream, 'peek') else stream
+    if buffered.peek(2)[:2] == b'\x1f\x8b':
+        buffered = gzip.GzipFile(fileobj=buffered)
+    return io.TextIOWrapper(buffered, encoding='utf-8-sig', newline='')
+
+
+def _restore_dates(doc, collection):
+    for column in DATE_COLUMNS.get(collection, ()):
+        if isinstance(doc.get(column), str):
+            try:
+                doc[column] = datetime.fromisoformat(doc[column])
+            except ValueError:
+                raise ValueError(f"Invalid {column}: {doc[column]}")
+    return doc
+
+
+def iter_records(stream, collection, fmt='ndjson'):
+    """Yield documents from an NDJSON or CSV export stream"""
+    text = _open_text(stream)
+    if fmt == 'csv':
+        columns = EXPORT_COLLECTIONS[collection]
+        for row in csv.DictReader(text):
+            doc = {}
+            for key, value in row.items():
+                if key not in columns or value in (None, ''):
+                    continue
+                if key == '_id':
+                    doc['_id'] = ObjectId(value) if ObjectId.is_valid(value) else value
+                elif value[:1] in '[{':
+                    doc[key] = json_util.loads(value)
+                else:
+                    doc[key] = value
+            yield _restore_dates(doc, collection)
+        return
+    for line in text:
+        line = line.strip()
+        if line:
+            doc = json_util.loads(line)
+            yield _restore_dates(doc, collection) if isinstance(doc, dict) else doc
+
+
+def import_records(col, records, chunk_size=IMPORT_CHUNK_SIZE):
+    """Upsert records by _id in chunks; returns counts and the fields that were dropped"""
+    # Imported lazily so the export side (and bench_export.py) needs no database
+    from utils.content_store import CONTENT_FIELDS, prepare_content
+
+    collection = col.name
+    allowed = CONTENT_FIELDS[collection]
+    totals = {'processed': 0, 'inserted': 0, 'upserted': 0, 'modified': 0}
+    ignored = set()
+    ops = []
+
+    def flush():
+        result = col.bulk_write(ops, ordered=False)
+        totals['inserted'] += result.inserted_count
+        totals['upserted'] += result.upserted_count
+        totals['modified'] += result.modified_count
+        ops.clear()
+
+    for doc in records:
+        if not isinstance(doc, dict):
+            raise ValueError("Each record must be a JSON object")
+        fields = {key: value for key, value in doc.items() if key in allowed}
+        ignored.update(key for key in doc if key not in allowed and key not in ('_id', 'version', 'title_key'))
+        prepare_content(collection, fields)
+        if '_id' in doc:
+            # Merge into the existing document and bump its version like an edit
+            update = {'$inc': {'version': 1}}
+            if fields:
+                update['$set'] = fields
+            ops.append(UpdateOne({'_id': doc['_id']}, update, upsert=True))
+        else:
+            ops.append(InsertOne(dict(fields, version=0)))
+        totals['processed'] += 1
+        if len(ops) >= chunk_size:
+            flush()
+    if ops:
+        flush()
+    totals['ignored_fields'] = sorted(ignored)
+    return totals
+
+
+def detect_import_format(filename, requested=None):
+    if requested in ('csv', 'ndjson'):
+        return requested
+    return 'csv' if '.csv' in (filename or '').lower() else 'ndjson'
@@ -0,0 +1,123 @@
+"""
+Idempotency-Key support for create and upload endpoints.
+The first request with a given key runs the handler and stores its response;
+replays get the stored response back, and concurrent duplicates wait for the
+first request to finish instead of repeating the work.
+"""
+import hashlib
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import request, jsonify, make_response, Response
+from pymongo.errors import DuplicateKeyError
+from db import db
+
+idempotency_col = db['idempotency_keys']
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+KEY_TTL_SECONDS = 24 * 60 * 60  # stored responses are replayable for a day
+LOCK_SECONDS = 10 * 60  # an in-progress key older than this is considered abandoned
+WAIT_TIMEOUT = 60  # how long a duplicate waits for the first request
+POLL_INTERVAL = 0.2
+MAX_KEY_LENGTH = 255
+FINGERPRINT_CHUNK = 64 * 1024
+
+
+def ensure_idempotency_indexes():
+    idempotency_col.create_index('created_at', expireAfterSeconds=KEY_TTL_SECONDS)
+
+
+def _caller():
+    try:
+        from flask_jwt_extended import get_jwt_identity
+        return get_jwt_identity() or request.remote_addr
+    except Exception:
+        return request.remote_addr
+
+
+def _fingerprint():
+    """Hash of the request payload, so a key reused for a different request is rejected"""
+    digest = hashlib.sha256()
+    if request.files:
+        for field, file in sorted(request.files.items(multi=True), key=lambda item: (item[0], item[1].filename or '')):
+            digest.update(f"{field}:{file.filename}\n".encode())
+            # Same filename with different bytes is a different upload
+            for chunk in iter(lambda: file.stream.read(FINGERPRINT_CHUNK), b''):
+                digest.update(chunk)
+            file.stream.seek(0)
+    else:
+        digest.update(request.get_data())
+    return digest.hexdigest()
+
+
+def _replay(doc):
+    response = Response(doc['body'], status=doc['status_code'], mimetype=doc.get('mimetype'))
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _acquire(record_id, fingerprint):
+    """Try to claim the key; returns True if this request should run the handler"""
+    now = datetime.utcnow()
+    try:
+        idempotency_col.insert_one({
+            '_id': record_id,
+            'status': 'in_progress',
+            'fingerprint': fingerprint,
+            'created_at': now,
+            'locked_until': now + timedelta(seconds=LOCK_SECONDS)
+        })
+        return True
+    except DuplicateKeyError:
+        # Take over a key whose owner died without finishing
+        result = idempotency_col.update_one(
+            {'_id': record_id, 'status': 'in_progress', 'locked_until': {'$lt': now}},
+            {'$set': {'locked_until': now + timedelta(seconds=LOCK_SECONDS), 'fingerprint': fingerprint}}
+        )
+        return result.modified_count == 1
+
+
+def idempotent(f):
+    """Honour the Idempotency-Key header on a create/upload route"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return f(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({'error': f'{IDEMPOTENCY_HEADER} too long'}), 400
+
+        record_id = f"{request.method} {request.path}|{_caller()}|{key}"
+        fingerprint = _fingerprint()
+        deadline = time.monotonic() + WAIT_TIMEOUT
+
+        while not _acquire(record_id, fingerprint):
+            doc = idempotency_col.find_one({'_id': record_id})
+            if doc is None:
+                continue  # the first request failed and released the key; try to claim it
+            if doc.get('fingerprint') != fingerprint:
+                return jsonify({'error': f'{IDEMPOTENCY_HEADER} was already used for a different request'}), 422
+            if doc['status'] == 'completed':
+                return _replay(doc)
+            if time.monotonic() >= deadline:
+                return jsonify({'error': 'A request with this Idempotency-Key is still being processed'}), 409
+            time.sleep(POLL_INTERVAL)
+
+        try:
+            response = make_response(f(*args, **kwargs))
+        except Exception:
+            idempotency_col.delete_one({'_id': record_id})
+            raise
+
+        if response.status_code >= 500 or response.is_streamed:
+            # Server errors are not stored so the client can retry for real
+            idempotency_col.delete_one({'_id': record_id})
+        else:
+            idempotency_col.update_one({'_id': record_id}, {'$set': {
+                'status': 'completed',
+                'status_code': response.status_code,
+                'mimetype': response.mimetype,
+                'body': response.get_data()
+            }})
+        return response
+    return decorated_function
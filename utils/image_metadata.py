@@ -0,0 +1,128 @@
+"""
+Image metadata extraction for uploaded photos.
+Computes dimensions, EXIF capture time, a dominant colour and a tiny
+base64 LQIP placeholder so galleries can lay out photos before downloading them.
+"""
+import base64
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; uploads still work without metadata
+    Image = None
+    ImageOps = None
+
+# Pillow releases the GIL while decoding/resizing, so a thread pool scales across cores
+METADATA_WORKERS = int(os.getenv("IMAGE_METADATA_WORKERS", os.cpu_count() or 2))
+METADATA_TIMEOUT = 30  # seconds to wait for a single extraction
+PLACEHOLDER_SIZE = 16  # longest edge of the LQIP thumbnail, in pixels
+ANALYSIS_SIZE = 64  # images are decoded at roughly this size for colour analysis
+
+METADATA_FIELDS = ('width', 'height', 'taken_at', 'dominant_color', 'placeholder')
+
+EXIF_IFD = 0x8769
+EXIF_DATETIME_ORIGINAL = 36867
+EXIF_DATETIME = 306
+EXIF_ORIENTATION = 274
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=METADATA_WORKERS, thread_name_prefix="image-meta")
+    return _executor
+
+
+def _parse_exif_datetime(value):
+    """Convert an EXIF 'YYYY:MM:DD HH:MM:SS' timestamp to ISO 8601"""
+    if not value:
+        return None
+    if isinstance(value, bytes):
+        value = value.decode('ascii', 'ignore')
+    try:
+        return datetime.strptime(value.strip('\x00 '), '%Y:%m:%d %H:%M:%S').isoformat()
+    except ValueError:
+        return None
+
+
+def extract_metadata(data):
+    """Extract width, height, capture time, dominant colour and placeholder from image bytes"""
+    if Image is None or not data:
+        return {}
+
+    img = Image.open(io.BytesIO(data))
+    width, height = img.size
+
+    exif = img.getexif()
+    # Orientations 5-8 are rotated by 90 degrees, so the displayed size is swapped
+    if exif.get(EXIF_ORIENTATION) in (5, 6, 7, 8):
+        width, height = height, width
+    taken_at = _parse_exif_datetime(
+        exif.get_ifd(EXIF_IFD).get(EXIF_DATETIME_ORIGINAL) or exif.get(EXIF_DATETIME)
+    )
+
+    # Let the JPEG decoder downscale while decoding instead of inflating the full image
+    img.draft('RGB', (ANALYSIS_SIZE, ANALYSIS_SIZE))
+    small = ImageOps.exif_transpose(img).convert('RGB')
+    small.thumbnail((ANALYSIS_SIZE, ANALYSIS_SIZE))
+
+    quantized = small.quantize(colors=5)
+    palette = quantized.getpalette()
+    _, index = max(quantized.getcolors())
+    r, g, b = palette[index * 3:index * 3 + 3]
+
+    small.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    buffer = io.BytesIO()
+    small.save(buffer, format='JPEG', quality=40)
+
+    return {
+        'width': width,
+        'height': height,
+        'taken_at': taken_at,
+        'dominant_color': f'#{r:02x}{g:02x}{b:02x}',
+        'placeholder': 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+    }
+
+
+def _safe_extract(data):
+    try:
+        return extract_metadata(data)
+    except Exception as e:
+        print(f"Image metadata extraction failed: {e}")
+        return {}
+
+
+def submit_metadata(data):
+    """Schedule extraction of image bytes on the worker pool and return the future"""
+    return _get_executor().submit(_safe_extract, data)
+
+
+def submit_file_metadata(file):
+    """Read an uploaded file, schedule extraction and rewind it for the upload"""
+    data = file.read()
+    file.seek(0)
+    return submit_metadata(data)
+
+
+def collect_metadata(future, upload_result=None):
+    """Wait for a scheduled extraction; fall back to Cloudinary's dimensions if it failed"""
+    try:
+        meta = future.result(timeout=METADATA_TIMEOUT) if future else {}
+    except Exception as e:
+        print(f"Image metadata extraction timed out: {e}")
+        meta = {}
+    if upload_result and not meta.get('width'):
+        if upload_result.get('width') and upload_result.get('height'):
+            meta['width'] = upload_result['width']
+            meta['height'] = upload_result['height']
+    return meta
+
+
+def map_metadata(blobs):
+    """Extract metadata for many images in parallel, preserving order"""
+    return list(_get_executor().map(_safe_extract, blobs))
@@ -0,0 +1,80 @@
+"""
+Responsive image URLs for Cloudinary-hosted photos.
+Builds srcset width variants and a thumbnail from a photo's public_id.
+This is pure string computation (no network calls) and results are cached per photo.
+"""
+from functools import lru_cache
+from urllib.parse import urlparse
+import cloudinary.utils
+
+CLOUDINARY_HOST = "res.cloudinary.com"
+
+# Named presets selectable with ?preset=<name>
+IMAGE_PRESETS = {
+    'gallery': {'widths': (320, 640, 960, 1280), 'thumbnail': 300},
+    'thumb': {'widths': (160, 320), 'thumbnail': 150},
+    'hero': {'widths': (640, 1280, 1920), 'thumbnail': 480},
+}
+DEFAULT_PRESET = 'gallery'
+
+
+def _cloud_name_from_url(url):
+    """Extract the cloud name from a stored res.cloudinary.com URL"""
+    parsed = urlparse(url or '')
+    if parsed.netloc != CLOUDINARY_HOST:
+        return None
+    parts = parsed.path.strip('/').split('/')
+    if len(parts) < 3 or parts[1] != 'image':
+        return None
+    return parts[0]
+
+
+@lru_cache(maxsize=8192)
+def build_responsive_urls(public_id, cloud_name, preset=DEFAULT_PRESET):
+    """Return {'srcset', 'thumbnail_url'} for a Cloudinary public_id"""
+    config = IMAGE_PRESETS[preset]
+    variants = []
+    for width in config['widths']:
+        url, _ = cloudinary.utils.cloudinary_url(
+            public_id,
+            cloud_name=cloud_name,
+            secure=True,
+            transformation=[{'crop': 'limit', 'width': width, 'fetch_format': 'auto', 'quality': 'auto'}]
+        )
+        variants.append(f"{url} {width}w")
+
+    size = config['thumbnail']
+    thumbnail_url, _ = cloudinary.utils.cloudinary_url(
+        public_id,
+        cloud_name=cloud_name,
+        secure=True,
+        transformation=[{
+            'crop': 'fill', 'gravity': 'auto', 'width': size, 'height': size,
+            'fetch_format': 'auto', 'quality': 'auto'
+        }]
+    )
+    return {'srcset': ', '.join(variants), 'thumbnail_url': thumbnail_url}
+
+
+def resolve_preset(name):
+    """Map a ?preset= query value to a preset name, or None to disable variants"""
+    if not name:
+        return DEFAULT_PRESET
+    if name == 'none':
+        return None
+    return name if name in IMAGE_PRESETS else DEFAULT_PRESET
+
+
+def add_responsive_urls(photos, preset=DEFAULT_PRESET):
+    """Attach srcset/thumbnail_url to every Cloudinary photo in the list (in place)"""
+    if not preset:
+        return photos
+    for photo in photos or []:
+        if not isinstance(photo, dict):
+            continue
+        cloud_name = _cloud_name_from_url(photo.get('url'))
+        public_id = photo.get('public_id') or photo.get('filename')
+        if not cloud_name or not public_id:
+            continue  # local uploads and external links are served as-is
+        photo.update(build_responsive_urls(public_id, cloud_name, preset))
+    return photos
@@ -0,0 +1,148 @@
+"""
+Cross-worker cache invalidation.
+
+Every committed write (notify_change) is published as a (collection, key,
+version) message on the `change_events` capped channel. Each worker listens in
+a background thread and replays messages from other workers through
+apply_remote_change(), so process-local caches (user claims, home model,
+search index, revocation filter, ...) evict the same entries they would have
+evicted had the write happened in that worker.
+
+Per-worker lag (publish time to local eviction) is tracked here and reported
+to the `bus_workers` collection, so GET /admin/cache-bus can show every worker.
+Lag is measured against the publisher's clock, so it includes clock skew
+between hosts.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pymongo import ASCENDING
+from db import db
+from utils.capped_channel import CappedChannel, worker_id
+from utils.content_events import subscribe, apply_remote_change
+
+BUS_ENABLED = os.getenv("INVALIDATION_BUS_ENABLED", "true").lower() != "false"
+BUS_REPORT_SECONDS = float(os.getenv("INVALIDATION_BUS_REPORT_SECONDS", "30"))
+# Workers that stop reporting drop out of the listing after this long
+BUS_WORKER_EXPIRY_SECONDS = int(os.getenv("INVALIDATION_BUS_WORKER_EXPIRY_SECONDS", "300"))
+
+change_channel = CappedChannel('change_events')
+workers_col = db['bus_workers']
+
+
+def publish_change(event):
+    change_channel.publish({'collection': event['collection'], 'key': event['key'], 'version': event['version']})
+
+
+def ensure_bus_indexes():
+    workers_col.create_index([('reported_at', ASCENDING)], expireAfterSeconds=BUS_WORKER_EXPIRY_SECONDS)
+
+
+class BusMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = datetime.now(timezone.utc)
+        self.received = 0
+        self.applied = 0
+        self.own = 0
+        self.last_lag = None
+        self.max_lag = 0.0
+        self._lag_total = 0.0
+
+    def record(self, message, remote):
+        at = message.get('at')
+        lag = None
+        if isinstance(at, datetime):
+            if at.tzinfo is None:
+                at = at.replace(tzinfo=timezone.utc)  # pymongo returns naive UTC datetimes
+            lag = max(0.0, (datetime.now(timezone.utc) - at).total_seconds())
+        with self._lock:
+            self.received += 1
+            if remote:
+                self.applied += 1
+            else:
+                self.own += 1
+            if lag is not None:
+                self.last_lag = lag
+                self.max_lag = max(self.max_lag, lag)
+                self._lag_total += lag
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'worker': worker_id(),
+                'started_at': self.started_at.isoformat(),
+                'received': self.received,
+                'applied_remote': self.applied,
+                'own_messages': self.own,
+                'last_seq': change_channel.last_seq,
+                'last_lag_ms': round(self.last_lag * 1000, 1) if self.last_lag is not None else None,
+                'max_lag_ms': round(self.max_lag * 1000, 1),
+                'avg_lag_ms': round(self._lag_total / self.received * 1000, 1) if self.received else None,
+            }
+
+
+bus_metrics = BusMetrics()
+
+
+def _on_message(message):
+    # This worker already ran its subscribers when it made the write
+    remote = message.get('origin') != worker_id()
+    if remote:
+        apply_remote_change({'collection': message['collection'], 'key': message.get('key'), 'version': message.get('version')})
+    bus_metrics.record(message, remote)
+
+
+def worker_metrics():
+    """This worker's bus metrics, including how many messages it hasn't seen yet"""
+    metrics = bus_metrics.snapshot()
+    latest = change_channel.latest_seq()
+    metrics['latest_seq'] = latest
+    metrics['pending'] = max(0, latest - (metrics['last_seq'] or 0)) if metrics['last_seq'] is not None else None
+    return metrics
+
+
+def report_metrics():
+    workers_col.update_one(
+        {'_id': worker_id()},
+        {'$set': dict(bus_metrics.snapshot(), reported_at=datetime.utcnow())},
+        upsert=True
+    )
+
+
+def _report_loop():
+    while True:
+        time.sleep(BUS_REPORT_SECONDS)
+        try:
+            report_metrics()
+        except Exception as e:
+            print(f"Invalidation bus metrics report failed: {e}")
+
+
+def all_worker_metrics():
+    workers = list(workers_col.find({}, {'_id': 0}).sort('worker', 1))
+    for worker in workers:
+        if isinstance(worker.get('reported_at'), datetime):
+            worker['reported_at'] = worker['reported_at'].isoformat()
+    return workers
+
+
+_started = False
+_start_lock = threading.Lock()
+
+
+def init_invalidation_bus():
+    """Start publishing this worker's writes, its listener and metrics reporter (once per process)"""
+    global _started
+    if not BUS_ENABLED:
+        return
+    with _start_lock:
+        if _started:
+            return
+        _started = True
+    # Local-only: a message replayed from another worker must not be published again.
+    # Registered here so a disabled bus adds no Mongo writes to the request path.
+    subscribe(publish_change, local_only=True)
+    change_channel.listen(_on_message)
+    threading.Thread(target=_report_loop, name='bus-metrics', daemon=True).start()
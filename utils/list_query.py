@@ -0,0 +1,124 @@
+"""
+Shared limit/cursor/sort/fields handling for list endpoints.
+
+    ?limit=50            page size (capped at LIST_MAX_LIMIT)
+    ?sort=-date          one of the route's whitelisted sorts; "-" reverses it
+    ?fields=title,date   projection limited to the route's whitelisted fields
+    ?cursor=...          value of the previous page's X-Next-Cursor header
+
+Pages are keyset scans on the sort fields plus _id, so each page is an
+indexed range read regardless of how deep the client pages. Response bodies
+stay plain lists; the next cursor travels in the X-Next-Cursor header.
+
+Every response is bounded: without ?limit a page of DEFAULT_LIST_LIMIT items
+is returned, with X-Next-Cursor when more follow. Only in-process renders
+that set UNPAGED_ENVIRON_KEY (the static JSON publisher, whose files can't
+carry the header) get the whole list; HTTP clients cannot set that key.
+"""
+import base64
+import os
+from bson import json_util
+from flask import jsonify, request, has_request_context
+
+# Page size when no ?limit is given
+DEFAULT_LIST_LIMIT = int(os.getenv("LIST_DEFAULT_LIMIT", "200"))
+MAX_LIST_LIMIT = int(os.getenv("LIST_MAX_LIMIT", "500"))
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+# WSGI environ flag requesting the complete list (set by utils.publisher only)
+UNPAGED_ENVIRON_KEY = 'nss.list_unpaged'
+
+
+class ListSpec:
+    """What a list route allows: named sorts, selectable fields and never-returned fields"""
+
+    def __init__(self, sorts, default_sort, fields, hidden=()):
+        self.sorts = sorts
+        self.default_sort = default_sort
+        self.fields = set(fields)
+        self.hidden = tuple(hidden)
+
+
+def _sort_keys(spec, name):
+    """Resolve ?sort= to [(field, direction), ...] ending with an _id tiebreak"""
+    reverse = name.startswith('-')
+    key = name[1:] if reverse else name
+    if key not in spec.sorts:
+        raise ValueError(f"sort must be one of: {', '.join(spec.sorts)} (prefix with - to reverse)")
+    keys = [(field, -direction if reverse else direction) for field, direction in spec.sorts[key]]
+    tiebreak = keys[0][1] if keys else (-1 if reverse else 1)
+    return keys + [('_id', tiebreak)]
+
+
+def _projection(spec, fields_arg, sort):
+    if not fields_arg:
+        return {field: 0 for field in spec.hidden} or None
+    fields = {f.strip() for f in fields_arg.split(',') if f.strip()}
+    unknown = fields - spec.fields
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    # Sort fields are always fetched because the cursor is built from them
+    return {field: 1 for field in fields | {field for field, _ in sort}}
+
+
+def encode_cursor(sort_name, sort, doc):
+    values = [sort_name] + [doc.get(field) for field, _ in sort]
+    return base64.urlsafe_b64encode(json_util.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort_name, sort):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json_util.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(sort) + 1 or values[0] != sort_name:
+        raise ValueError("Cursor does not match this sort")
+    return values[1:]
+
+
+def _after(sort, values):
+    """Documents strictly after `values` in the given sort order"""
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        clause = {prev: values[j] for j, (prev, _) in enumerate(sort[:i])}
+        clause[field] = {'$lt' if direction < 0 else '$gt': values[i]}
+        clauses.append(clause)
+    return {'$or': clauses}
+
+
+def _unpaged():
+    return has_request_context() and bool(request.environ.get(UNPAGED_ENVIRON_KEY))
+
+
+def run_list_query(col, spec, args, query=None):
+    """Run one page of a list query; returns (docs, next_cursor)"""
+    sort_name = args.get('sort') or spec.default_sort
+    sort = _sort_keys(spec, sort_name)
+    projection = _projection(spec, args.get('fields'), sort)
+
+    query = dict(query or {})
+    if 'limit' not in args and not args.get('cursor') and _unpaged():
+        return list(col.find(query, projection).sort(sort)), None
+
+    limit = args.get('limit', DEFAULT_LIST_LIMIT, type=int)
+    if limit is None or limit < 1:
+        raise ValueError("limit must be a positive integer")
+    limit = min(limit, MAX_LIST_LIMIT)
+
+    if args.get('cursor'):
+        after = _after(sort, decode_cursor(args['cursor'], sort_name, sort))
+        query = {'$and': [query, after]} if query else after
+
+    docs = list(col.find(query, projection).sort(sort).limit(limit + 1))
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(sort_name, sort, docs[-1])
+    return docs, next_cursor
+
+
+def list_response(docs, next_cursor, status=200):
+    response = jsonify(docs)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response, status
@@ -0,0 +1,180 @@
+"""
+Unified media index.
+One document per stored asset (Cloudinary or local upload) recording where it
+lives, who references it, its size/MIME type and timestamps.
+"""
+import os
+from datetime import datetime
+from urllib.parse import urlparse
+from pymongo import UpdateOne, ASCENDING, DESCENDING
+from db import db
+from config import UPLOAD_FOLDER
+from utils.content_events import notify_change
+from utils.stats import record_media_change
+
+media_col = db['media']
+
+BACKEND_CLOUDINARY = 'cloudinary'
+BACKEND_LOCAL = 'local'
+
+# Activity fields holding a single media URL (besides the photos/reports lists)
+ACTIVITY_URL_FIELDS = ('imageUrl',)
+
+
+def ensure_media_indexes():
+    media_col.create_index([('backend', ASCENDING), ('asset_id', ASCENDING)], unique=True)
+    media_col.create_index([('created_at', DESCENDING)])
+    media_col.create_index([('owners.type', ASCENDING), ('owners.id', ASCENDING)])
+    media_col.create_index([('kind', ASCENDING), ('created_at', DESCENDING)])
+
+
+def owner_ref(owner_type, owner_id):
+    return {'type': owner_type, 'id': str(owner_id)}
+
+
+def cloudinary_public_id(url):
+    """public_id of a res.cloudinary.com delivery URL (None if it can't be determined)"""
+    parts = urlparse(url or '').path.strip('/').split('/')
+    # <cloud>/<resource_type>/<type>/[transformations/][v<version>/]<public_id>
+    if len(parts) < 4:
+        return None
+    resource_type, rest = parts[1], parts[3:]
+    versions = [i for i, part in enumerate(rest) if part[:1] == 'v' and part[1:].isdigit()]
+    if versions:
+        rest = rest[versions[0] + 1:]
+    else:
+        while len(rest) > 1 and (',' in rest[0] or '_' in rest[0][:3]):
+            rest = rest[1:]  # transformation segments such as w_320,c_fill
+    public_id = '/'.join(rest)
+    if resource_type != 'raw':
+        public_id = os.path.splitext(public_id)[0]  # image/video ids carry no extension
+    return public_id or None
+
+
+def media_key(item):
+    """Return (backend, asset_id) for a stored photo/report dict"""
+    url = item.get('url') or ''
+    if urlparse(url).netloc == 'res.cloudinary.com':
+        return BACKEND_CLOUDINARY, item.get('public_id') or item.get('filename') or cloudinary_public_id(url)
+    filename = item.get('filename') or os.path.basename(urlparse(url).path)
+    return BACKEND_LOCAL, filename or None
+
+
+def media_fields(item, kind):
+    fields = {
+        'kind': item.get('type') or kind,
+        'url': item.get('url'),
+        'original_name': item.get('original_name'),
+        'mime_type': item.get('mime_type'),
+        'updated_at': datetime.utcnow()
+    }
+    if item.get('bytes') is not None:
+        fields['size'] = item['bytes']
+    return {k: v for k, v in fields.items() if v is not None}
+
+
+def _upsert_op(item, kind, owner=None):
+    backend, asset_id = media_key(item)
+    if not asset_id:
+        return None
+    update = {
+        '$set': media_fields(item, kind),
+        '$setOnInsert': {'created_at': datetime.utcnow()}
+    }
+    if owner:
+        update['$addToSet'] = {'owners': owner}
+    return UpdateOne({'backend': backend, 'asset_id': asset_id}, update, upsert=True)
+
+
+def record_media(items, kind='photo', owner=None):
+    """Upsert index entries for uploaded photos/reports, optionally linking an owner"""
+    items = [item for item in items or [] if isinstance(item, dict)]
+    ops = [(op, item) for op, item in ((_upsert_op(item, kind, owner), item) for item in items) if op]
+    if not ops:
+        return
+    try:
+        result = media_col.bulk_write([op for op, _ in ops], ordered=False)
+        # Only entries this call created change the dashboard totals
+        created = {}
+        for index in result.upserted_ids:
+            item = ops[index][1]
+            count, size = created.get(item.get('type') or kind, (0, 0))
+            created[item.get('type') or kind] = (count + 1, size + (item.get('bytes') or 0))
+        for created_kind, (count, size) in created.items():
+            record_media_change(created_kind, count, size)
+        notify_change('media')
+    except Exception as e:
+        # The index is derived data; never fail the upload because of it
+        print(f"Media index update failed: {e}")
+
+
+def activity_media_items(activity):
+    """Yield (kind, item) for every asset an activity references, including imageUrl"""
+    for photo in activity.get('photos') or []:
+        yield 'photo', photo
+    for report in activity.get('reports') or []:
+        yield 'report', report
+    for field in ACTIVITY_URL_FIELDS:
+        if activity.get(field):
+            yield 'photo', {'url': activity[field]}
+
+
+def record_activity_media(activity):
+    """Link an activity's photos, reports and cover image to it in the media index"""
+    owner = owner_ref('activity', activity['_id'])
+    items = list(activity_media_items(activity))
+    record_media([item for kind, item in items if kind == 'photo'], 'photo', owner)
+    record_media([item for kind, item in items if kind == 'report'], 'report', owner)
+
+
+def sync_activity_media(before, after):
+    """Re-link an updated activity, detaching it from assets it no longer references"""
+    kept = {media_key(item) for _, item in activity_media_items(after)}
+    removed = [item for _, item in activity_media_items(before) if media_key(item) not in kept]
+    if removed:
+        detach_owner(owner_ref('activity', after['_id']), removed)
+    record_activity_media(after)
+
+
+def detach_owner(owner, items=None):
+    """Remove an owner reference from the given items, or from every entry if items is None"""
+    query = {'owners': owner}
+    if items is not None:
+        keys = [media_key(item) for item in items if isinstance(item, dict)]
+        keys = [{'backend': b, 'asset_id': a} for b, a in keys if a]
+        if not keys:
+            return
+        query = {'$and': [query, {'$or': keys}]}
+    try:
+        media_col.update_many(query, {'$pull': {'owners': owner}, '$set': {'updated_at': datetime.utcnow()}})
+    except Exception as e:
+        print(f"Media index update failed: {e}")
+
+
+def detach_owner_type(owner_type):
+    """Remove every owner reference of one type (e.g. after clearing all activities)"""
+    try:
+        media_col.update_many({'owners.type': owner_type}, {'$pull': {'owners': {'type': owner_type}}})
+    except Exception as e:
+        print(f"Media index update failed: {e}")
+
+
+def remove_media(backend, asset_id):
+    """Delete an index entry after the underlying asset was removed"""
+    try:
+        removed = media_col.find_one_and_delete({'backend': backend, 'asset_id': asset_id}, {'kind': 1, 'size': 1})
+        if removed is not None:
+            record_media_change(removed.get('kind'), -1, -(removed.get('size') or 0))
+        notify_change('media', asset_id)
+    except Exception as e:
+        print(f"Media index update failed: {e}")
+
+
+def local_file_item(filename):
+    """Build an index item for a file in UPLOAD_FOLDER"""
+    path = os.path.join(UPLOAD_FOLDER, filename)
+    return {
+        'filename': filename,
+        'url': f'/uploads/{filename}',
+        'bytes': os.path.getsize(path) if os.path.isfile(path) else None
+    }
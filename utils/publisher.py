@@ -0,0 +1,245 @@
+"""
+Static JSON publishing for the public read models.
+
+After content writes, the affected public GET responses are rendered once and
+written into PUBLISH_DIR, mirroring their URL paths:
+
+    <PUBLISH_DIR>/api/albums.json            (+ .json.gz, .json.br)
+    <PUBLISH_DIR>/api/albums.<digest>.json   immutable versioned copy (+ .gz, .br)
+    <PUBLISH_DIR>/manifest.json              model -> current version/file
+
+Every file is written to a temp file and renamed into place, so readers never
+see a partial file. Rebuilds are debounced (a burst of edits produces one
+rebuild) and incremental (only models derived from the changed collections are
+rendered, and unchanged output is not rewritten).
+
+nginx (or a CDN origin) serves the files and falls back to Flask only when a
+file is missing, e.g.:
+
+    location ~ ^/(api/(activities|activities/latest|albums|home)|admin/get-trending)$ {
+        if ($args) { proxy_pass http://app; }
+        root /srv/nss/public;
+        gzip_static on; brotli_static on;
+        default_type application/json;
+        try_files $uri.json @app;
+    }
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from utils.content_events import subscribe
+from utils.list_query import UNPAGED_ENVIRON_KEY
+
+try:
+    import brotli
+except ImportError:  # .br files are skipped without the brotli package
+    brotli = None
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines: no cross-process lock
+    fcntl = None
+
+PUBLISH_DIR = os.getenv("PUBLISH_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), 'public'))
+PUBLISH_ENABLED = os.getenv("PUBLISH_ENABLED", "true").lower() != "false"
+PUBLISH_DEBOUNCE_SECONDS = float(os.getenv("PUBLISH_DEBOUNCE_SECONDS", "2"))
+# Public base URL used while rendering (albums build absolute URLs for locally
+# stored photos); required when publishing, or the files would link to localhost
+PUBLISH_BASE_URL = os.getenv("PUBLISH_BASE_URL")
+# Versioned copies kept per model so clients holding an older manifest still resolve
+PUBLISH_KEEP_VERSIONS = int(os.getenv("PUBLISH_KEEP_VERSIONS", "3"))
+MANIFEST_NAME = 'manifest.json'
+
+# Model name -> (public URL path, collections it is derived from).
+# Announcements are public only through /api/home; their own list route is admin-only.
+PUBLISHED_MODELS = {
+    'activities': ('/api/activities', ('activities',)),
+    'latest_activities': ('/api/activities/latest', ('activities',)),
+    'albums': ('/api/albums', ('albums',)),
+    'trending': ('/admin/get-trending', ('highlights',)),
+    'home': ('/api/home', ('activities', 'albums', 'highlights', 'announcements')),
+}
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _encodings(body):
+    """Yield (suffix, bytes) for the plain, gzip and brotli variants"""
+    yield '', body
+    yield '.gz', gzip.compress(body, compresslevel=9, mtime=0)
+    if brotli is not None:
+        yield '.br', brotli.compress(body, quality=11)
+
+
+class Publisher:
+    def __init__(self, publish_dir, debounce_seconds):
+        self.publish_dir = publish_dir
+        self.debounce_seconds = debounce_seconds
+        self.app = None
+        self._dirty = set()
+        self._timer = None
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self.stats = {'rebuilds': 0, 'written': 0, 'unchanged': 0, 'failed': 0}
+
+    # ---- scheduling ----
+
+    def on_change(self, event):
+        models = [name for name, (_, sources) in PUBLISHED_MODELS.items() if event['collection'] in sources]
+        if models:
+            self.schedule(models)
+
+    def schedule(self, models):
+        """Mark models dirty and (re)start the debounce timer"""
+        with self._lock:
+            self._dirty.update(models)
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce_seconds, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Rebuild every dirty model now; returns {model: version}"""
+        with self._lock:
+            models, self._dirty = self._dirty, set()
+            self._timer = None
+        if not models or self.app is None:
+            return {}
+        with self._build_lock, self._dir_lock():
+            # Rendering happens under the lock, so a later rebuild always reads later data
+            self.stats['rebuilds'] += 1
+            manifest = self.read_manifest()
+            published = {}
+            for name in sorted(models):
+                try:
+                    entry = self._publish(name, manifest.get(name))
+                except Exception as e:
+                    self.stats['failed'] += 1
+                    print(f"Publishing {name} failed: {e}")
+                    continue
+                if entry:
+                    manifest[name] = entry
+                    published[name] = entry['version']
+            if published:
+                _write_atomic(self._path(MANIFEST_NAME), json.dumps(manifest, indent=2, sort_keys=True).encode())
+            return published
+
+    @contextmanager
+    def _dir_lock(self):
+        """Serialize rebuilds across workers sharing the publish directory"""
+        os.makedirs(self.publish_dir, exist_ok=True)
+        with open(self._path('.publish.lock'), 'w') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    # ---- rendering and writing ----
+
+    def _path(self, relative):
+        return os.path.join(self.publish_dir, relative.lstrip('/'))
+
+    def render(self, name):
+        """Render a model through its Flask route; None if the live response isn't publishable"""
+        url_path, _ = PUBLISHED_MODELS[name]
+        # Published files can't carry X-Next-Cursor, so list routes render in full
+        with self.app.test_request_context(url_path, base_url=PUBLISH_BASE_URL,
+                                           environ_overrides={UNPAGED_ENVIRON_KEY: True}):
+            response = self.app.full_dispatch_request()
+        # Never publish an error or a stale snapshot served while Mongo was down
+        if response.status_code != 200 or not response.is_json or 'X-Snapshot-Age' in response.headers:
+            print(f"Not publishing {name}: live response was {response.status_code}")
+            return None
+        return response.get_data()
+
+    def _publish(self, name, current):
+        body = self.render(name)
+        if body is None:
+            return None
+        digest = hashlib.blake2b(body, digest_size=8).hexdigest()
+        url_path, _ = PUBLISHED_MODELS[name]
+        if current and current['digest'] == digest and os.path.exists(self._path(url_path + '.json')):
+            self.stats['unchanged'] += 1
+            return None
+
+        versioned = f"{url_path}.{digest}.json"
+        # Versioned files first, then the stable alias, then the manifest points at them
+        variants = list(_encodings(body))
+        for suffix, data in variants:
+            _write_atomic(self._path(versioned + suffix), data)
+        for suffix, data in variants:
+            _write_atomic(self._path(url_path + '.json' + suffix), data)
+        self.stats['written'] += 1
+
+        previous = (current or {}).get('previous', [])
+        if current:
+            previous = [current['file']] + previous
+        for stale in previous[PUBLISH_KEEP_VERSIONS - 1:]:
+            for suffix in ('', '.gz', '.br'):
+                try:
+                    os.remove(self._path(stale + suffix))
+                except FileNotFoundError:
+                    pass
+        return {
+            'path': url_path,
+            'file': versioned,
+            'digest': digest,
+            'version': ((current or {}).get('version') or 0) + 1,
+            'bytes': len(body),
+            'generated_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'previous': previous[:PUBLISH_KEEP_VERSIONS - 1],
+        }
+
+    def read_manifest(self):
+        try:
+            with open(self._path(MANIFEST_NAME), 'rb') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def missing_models(self):
+        manifest = self.read_manifest()
+        return [name for name, (url_path, _) in PUBLISHED_MODELS.items()
+                if name not in manifest or not os.path.exists(self._path(url_path + '.json'))]
+
+
+publisher = Publisher(PUBLISH_DIR, PUBLISH_DEBOUNCE_SECONDS)
+
+
+def _require_base_url():
+    if not PUBLISH_BASE_URL:
+        raise RuntimeError("Static publishing needs PUBLISH_BASE_URL (the site's public URL, "
+                           "e.g. https://nss.example.org) or PUBLISH_ENABLED=false")
+
+
+def init_publisher(app):
+    """Attach the app used for rendering, subscribe to writes and publish missing models"""
+    if not PUBLISH_ENABLED:
+        return
+    _require_base_url()
+    publisher.app = app
+    subscribe(publisher.on_change, {c for _, sources in PUBLISHED_MODELS.values() for c in sources}, local_only=True)
+    missing = publisher.missing_models()
+    if missing:
+        publisher.schedule(missing)
+
+
+def publish_all(app):
+    """Render and write every model right away (used by publish_static.py)"""
+    _require_base_url()
+    publisher.app = app
+    with publisher._lock:
+        publisher._dirty.update(PUBLISHED_MODELS)
+    return publisher.flush()
@@ -0,0 +1,178 @@
+"""
+Token-bucket rate limiting for expensive public endpoints.
+Buckets are keyed by client IP and, where the route has one, by account
+(e.g. the email in the request body). Requests over the limit get a 429 with
+Retry-After before the handler runs.
+
+Per-account buckets can be charged only for failed attempts (e.g. a 401 from
+login), so knowing someone's email is not enough to lock them out.
+
+Backends: in-process (default) or Redis-compatible (set RATE_LIMIT_REDIS_URL)
+so limits are shared across gunicorn workers.
+"""
+import logging
+import math
+import os
+import threading
+import time
+from functools import wraps
+from flask import request, jsonify, make_response
+
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() != "false"
+# Only trust X-Forwarded-For when running behind a known reverse proxy
+TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "false").lower() == "true"
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBackend:
+    """Per-process buckets; fine for a single worker or as a fallback"""
+
+    MAX_KEYS = 100000
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, refill_per_second, now=None, cost=1):
+        """Take `cost` tokens if at least one is available; cost=0 only checks"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, last = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - last) * refill_per_second)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - cost, now)
+                allowed, retry_after = True, 0
+            else:
+                self._buckets[key] = (tokens, now)
+                allowed, retry_after = False, (1 - tokens) / refill_per_second
+            if len(self._buckets) > self.MAX_KEYS:
+                self._prune(now, capacity, refill_per_second)
+        return allowed, retry_after
+
+    def _prune(self, now, capacity, refill_per_second):
+        # Buckets that have refilled completely carry no state worth keeping
+        full_after = capacity / refill_per_second
+        self._buckets = {k: v for k, v in self._buckets.items() if now - v[1] < full_after}
+
+
+class RedisBackend:
+    """Buckets stored in Redis (or any server speaking its protocol) and updated atomically"""
+
+    SCRIPT = """
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local cost = tonumber(ARGV[4])
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    local allowed = 0
+    if tokens >= 1 then
+        tokens = tokens - cost
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+    return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, url, client=None):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self._client = client
+        self._script = self._client.register_script(self.SCRIPT)
+
+    def consume(self, key, capacity, refill_per_second, now=None, cost=1):
+        now = time.time() if now is None else now
+        allowed, tokens = self._script(keys=[f"ratelimit:{key}"], args=[capacity, refill_per_second, now, cost])
+        tokens = float(tokens)
+        retry_after = 0 if allowed else (1 - tokens) / refill_per_second
+        return bool(allowed), retry_after
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if RATE_LIMIT_REDIS_URL:
+                    try:
+                        _backend = RedisBackend(RATE_LIMIT_REDIS_URL)
+                    except Exception as e:
+                        # Limits are now per worker: N workers allow N times the configured rate
+                        logger.error("Rate limiter: Redis backend at RATE_LIMIT_REDIS_URL unavailable (%s); "
+                                     "FALLING BACK to per-process buckets, limits are NOT shared across workers", e)
+                        _backend = MemoryBackend()
+                else:
+                    _backend = MemoryBackend()
+    return _backend
+
+
+def client_ip():
+    if TRUST_PROXY and request.headers.get('X-Forwarded-For'):
+        return request.headers['X-Forwarded-For'].split(',')[0].strip()
+    return request.remote_addr or 'unknown'
+
+
+def _check(key, limit, cost=1):
+    capacity, per_seconds = limit
+    try:
+        return get_backend().consume(key, capacity, capacity / per_seconds, cost=cost)
+    except Exception as e:
+        # Never lock everyone out because the shared store is down
+        print(f"Rate limiter error for {key}: {e}")
+        return True, 0
+
+
+def _too_many(message_key, retry_after):
+    response = jsonify({message_key: "Too many requests. Please try again later."})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def rate_limit(name, per_ip=None, per_account=None, account_field='email', message_key='error',
+               account_failure_statuses=None):
+    """Limit a route to `capacity` requests per `seconds`, given as (capacity, seconds) tuples.
+
+    With account_failure_statuses, the per-account bucket is only checked up
+    front and charged when the handler answers with one of those statuses.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not RATE_LIMIT_ENABLED:
+                return f(*args, **kwargs)
+
+            if per_ip:
+                allowed, retry_after = _check(f"{name}:ip:{client_ip()}", per_ip)
+                if not allowed:
+                    return _too_many(message_key, retry_after)
+
+            account_key = None
+            if per_account:
+                data = request.get_json(silent=True) or {}
+                account = data.get(account_field)
+                if isinstance(account, str) and account.strip():
+                    account_key = f"{name}:account:{account.strip().lower()}"
+            if account_key:
+                cost = 0 if account_failure_statuses else 1
+                allowed, retry_after = _check(account_key, per_account, cost)
+                if not allowed:
+                    return _too_many(message_key, retry_after)
+                if account_failure_statuses:
+                    response = make_response(f(*args, **kwargs))
+                    if response.status_code in account_failure_statuses:
+                        _check(account_key, per_account)
+                    return response
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
@@ -0,0 +1,122 @@
+"""
+Read models for the public site.
+The homepage model gathers latest activities, album covers, trending
+highlights and announcements with one query per collection (run concurrently),
+projected down to the fields the homepage renders. It is cached as a single
+unit and dropped whenever one of its source collections changes.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from db import db
+from utils.cache import TTLCache
+from utils.activity_dates import ACTIVITY_SORT, render_activity_dates
+from utils.image_urls import add_responsive_urls
+from utils.content_events import subscribe
+
+HOME_ACTIVITY_LIMIT = int(os.getenv("HOME_ACTIVITY_LIMIT", "3"))
+HOME_CACHE_TTL = int(os.getenv("HOME_CACHE_TTL", "300"))
+HOME_COLLECTIONS = ('activities', 'albums', 'highlights', 'announcements')
+
+# Photo fields a card needs; EXIF-derived metadata beyond layout hints is left out
+COVER_FIELDS = ('url', 'filename', 'public_id', 'width', 'height', 'placeholder', 'dominant_color')
+
+_home_cache = TTLCache(HOME_CACHE_TTL, maxsize=16)
+_home_generation = 0
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=len(HOME_COLLECTIONS), thread_name_prefix="read-model")
+    return _executor
+
+
+def _cover(photo, host, preset):
+    if not isinstance(photo, dict):
+        return None
+    cover = {field: photo[field] for field in COVER_FIELDS if field in photo}
+    if cover.get('url') and not cover['url'].startswith('http') and cover.get('filename'):
+        cover['url'] = f"{host}/uploads/{cover['filename']}"
+    add_responsive_urls([cover], preset)
+    return cover
+
+
+def latest_activities(limit, host, preset):
+    projection = {'title': 1, 'description': 1, 'date': 1, 'location': 1, 'status': 1, 'photos': {'$slice': 1}}
+    activities = []
+    for doc in db['activities'].find({}, projection).sort(ACTIVITY_SORT).limit(limit):
+        photos = doc.pop('photos', None) or []
+        doc['_id'] = str(doc['_id'])
+        doc['cover'] = _cover(photos[0], host, preset) if photos else None
+        activities.append(doc)
+    return render_activity_dates(activities)
+
+
+def album_covers(host, preset):
+    """Every album with its first photo and photo count, plus totals, in one $facet pass"""
+    pipeline = [
+        {'$project': {
+            'name': 1,
+            'photo_count': {'$size': {'$ifNull': ['$photos', []]}},
+            'cover': {'$arrayElemAt': ['$photos', 0]},
+        }},
+        {'$facet': {
+            'albums': [{'$project': {'name': 1, 'photo_count': 1, 'cover': 1}}],
+            'totals': [{'$group': {'_id': None, 'albums': {'$sum': 1}, 'photos': {'$sum': '$photo_count'}}}],
+        }},
+    ]
+    result = next(iter(db['albums'].aggregate(pipeline)), {}) or {}
+    albums = result.get('albums', [])
+    for album in albums:
+        album['_id'] = str(album['_id'])
+        album['cover'] = _cover(album.get('cover'), host, preset)
+    totals = (result.get('totals') or [{}])[0]
+    return albums, {'albums': totals.get('albums', 0), 'photos': totals.get('photos', 0)}
+
+
+def _small_list(collection, fields):
+    docs = list(db[collection].find({}, {field: 1 for field in fields}))
+    for doc in docs:
+        doc['_id'] = str(doc['_id'])
+    return docs
+
+
+def build_home(host, preset, activity_limit=HOME_ACTIVITY_LIMIT):
+    executor = _get_executor()
+    activities = executor.submit(latest_activities, activity_limit, host, preset)
+    albums = executor.submit(album_covers, host, preset)
+    trending = executor.submit(_small_list, 'highlights', ('title', 'description'))
+    announcements = executor.submit(_small_list, 'announcements', ('activityName', 'activityDescription'))
+
+    album_list, album_totals = albums.result()
+    return {
+        'activities': activities.result(),
+        'albums': album_list,
+        'album_totals': album_totals,
+        'trending': trending.result(),
+        'announcements': announcements.result(),
+        'generated_at': datetime.utcnow().isoformat() + 'Z',
+    }
+
+
+def get_home(host, preset):
+    key = (host, preset)
+    home = _home_cache.get(key)
+    if home is None:
+        generation = _home_generation
+        home = build_home(host, preset)
+        # Don't cache a model that a concurrent write has already made stale
+        if generation == _home_generation:
+            _home_cache.set(key, home)
+    return home
+
+
+def invalidate_home(event=None):
+    global _home_generation
+    _home_generation += 1
+    _home_cache.clear()
+
+
+subscribe(invalidate_home, HOME_COLLECTIONS)
@@ -0,0 +1,143 @@
+"""
+Orphan reconciliation between Mongo, Cloudinary and the local uploads folder.
+Pages through Cloudinary folders with the Admin API, checks each listed id
+against the set of ids referenced by albums/activities (photos, reports and
+cover imageUrl) and deletes orphans in batches. Only the referenced set and
+the orphans are held in memory. Run with dry_run=True to only report.
+"""
+import os
+from datetime import datetime, timedelta, timezone
+from db import db
+from config import UPLOAD_FOLDER
+from utils.media_index import (
+    remove_media, media_key, activity_media_items, ACTIVITY_URL_FIELDS, BACKEND_CLOUDINARY, BACKEND_LOCAL
+)
+
+# (folder, resource_type) pairs the upload routes write to
+CLOUDINARY_FOLDERS = [
+    ('nss/gallery', 'image'),
+    ('nss/activities/photos', 'image'),
+    ('nss/activities/reports', 'raw'),
+]
+PAGE_SIZE = 500  # Admin API maximum
+DELETE_BATCH_SIZE = 100  # delete_resources accepts at most 100 ids per call
+
+# Assets uploaded via /admin/upload-photos are unreferenced until the activity
+# is saved, so anything younger than this is never treated as an orphan
+GRACE_PERIOD = timedelta(hours=int(os.getenv("RECONCILE_GRACE_HOURS", "24")))
+
+
+def _default_api():
+    from utils.cloudinary import cloudinary
+    import cloudinary.api
+    return cloudinary.api
+
+
+def _parse_created_at(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+    except (TypeError, ValueError):
+        return None
+
+
+def iter_cloudinary_ids(api, folder, resource_type, cutoff):
+    """Yield public_ids under a folder older than the cutoff, one Admin API page at a time"""
+    next_cursor = None
+    while True:
+        params = {'type': 'upload', 'prefix': folder + '/', 'resource_type': resource_type, 'max_results': PAGE_SIZE}
+        if next_cursor:
+            params['next_cursor'] = next_cursor
+        page = api.resources(**params)
+        for resource in page.get('resources', []):
+            created_at = _parse_created_at(resource.get('created_at'))
+            if created_at and created_at > cutoff:
+                continue
+            yield resource['public_id']
+        next_cursor = page.get('next_cursor')
+        if not next_cursor:
+            break
+
+
+def _referenced_items():
+    for album in db['albums'].find({}, {'photos': 1}):
+        yield from album.get('photos', [])
+    projection = {'photos': 1, 'reports': 1, **{field: 1 for field in ACTIVITY_URL_FIELDS}}
+    for activity in db['activities'].find({}, projection):
+        for _, item in activity_media_items(activity):
+            yield item
+
+
+def referenced_ids():
+    """Collect the Cloudinary public_ids and local filenames referenced from Mongo"""
+    cloud, local = set(), set()
+    for item in _referenced_items():
+        if not isinstance(item, dict):
+            continue
+        backend, asset_id = media_key(item)
+        if not asset_id:
+            continue
+        if backend == BACKEND_CLOUDINARY:
+            cloud.add(asset_id)
+        else:
+            # Over-collecting only means fewer deletions, so any basename counts
+            local.add(asset_id)
+    return cloud, local
+
+
+def _batches(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def reconcile(api=None, dry_run=True, folders=None, include_local=True, now=None):
+    """Find (and unless dry_run, delete) assets that nothing in Mongo references"""
+    api = api or _default_api()
+    cutoff = (now or datetime.now(timezone.utc)) - GRACE_PERIOD
+    cloud_refs, local_refs = referenced_ids()
+
+    report = {'dry_run': dry_run, 'folders': [], 'local': None}
+
+    for folder, resource_type in folders or CLOUDINARY_FOLDERS:
+        # Stream the listing page by page and only keep the orphans; the Admin
+        # API can't list in public_id order, so the referenced ids are a set
+        scanned, orphans = 0, []
+        for public_id in iter_cloudinary_ids(api, folder, resource_type, cutoff):
+            scanned += 1
+            if public_id not in cloud_refs:
+                orphans.append(public_id)
+        # Deleting only after paging keeps next_cursor stable
+        deleted = []
+        if not dry_run:
+            for batch in _batches(orphans, DELETE_BATCH_SIZE):
+                result = api.delete_resources(batch, resource_type=resource_type, type='upload')
+                for public_id, status in result.get('deleted', {}).items():
+                    if status in ('deleted', 'not_found'):
+                        deleted.append(public_id)
+                        remove_media(BACKEND_CLOUDINARY, public_id)
+        report['folders'].append({
+            'folder': folder,
+            'resource_type': resource_type,
+            'scanned': scanned,
+            'orphans': orphans,
+            'deleted': len(deleted)
+        })
+
+    if include_local and os.path.exists(UPLOAD_FOLDER):
+        files = sorted(
+            name for name in os.listdir(UPLOAD_FOLDER)
+            if os.path.isfile(os.path.join(UPLOAD_FOLDER, name))
+            and datetime.fromtimestamp(os.path.getmtime(os.path.join(UPLOAD_FOLDER, name)), timezone.utc) <= cutoff
+        )
+        orphans = [name for name in files if name not in local_refs]
+        deleted = 0
+        if not dry_run:
+            for name in orphans:
+                try:
+                    os.remove(os.path.join(UPLOAD_FOLDER, name))
+                    remove_media(BACKEND_LOCAL, name)
+                    deleted += 1
+                except OSError as e:
+                    print(f"Could not delete {name}: {e}")
+        report['local'] = {'scanned': len(files), 'orphans': orphans, 'deleted': deleted}
+
+    return report
@@ -0,0 +1,51 @@
+"""
+Password reset tokens.
+Only the SHA-256 digest of a token is stored, under a unique index, and a TTL
+index removes expired tokens. Consuming a token is a single atomic
+find_one_and_delete, so each token works exactly once.
+"""
+import hashlib
+import os
+import secrets
+from datetime import datetime, timedelta
+from db import db
+
+reset_tokens_col = db['password_reset_tokens']
+
+RESET_TOKEN_TTL = timedelta(minutes=int(os.getenv("RESET_TOKEN_TTL_MINUTES", "60")))
+
+
+def ensure_reset_token_indexes():
+    reset_tokens_col.create_index('token_hash', unique=True)
+    reset_tokens_col.create_index('expires_at', expireAfterSeconds=0)
+    reset_tokens_col.create_index('email')
+
+
+def _digest(token):
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def issue_reset_token(email):
+    """Create a new token for the user (replacing any earlier one) and return the raw value"""
+    token = secrets.token_urlsafe(32)
+    now = datetime.utcnow()
+    reset_tokens_col.delete_many({'email': email})
+    reset_tokens_col.insert_one({
+        'token_hash': _digest(token),
+        'email': email,
+        'created_at': now,
+        'expires_at': now + RESET_TOKEN_TTL
+    })
+    return token
+
+
+def consume_reset_token(token):
+    """Atomically redeem a token; returns the user's email or None if invalid/expired"""
+    if not token:
+        return None
+    # The TTL monitor only runs every minute, so expiry is also checked here
+    doc = reset_tokens_col.find_one_and_delete({
+        'token_hash': _digest(token),
+        'expires_at': {'$gt': datetime.utcnow()}
+    })
+    return doc['email'] if doc else None
@@ -0,0 +1,198 @@
+"""
+Timeouts, retries, circuit breakers and bulkheads for outbound calls.
+
+Each external dependency (Cloudinary, SMTP, plain HTTP) gets:
+  - a timeout passed to the underlying client,
+  - bounded retries with full-jitter exponential backoff, only for errors that
+    are safe to retry (network errors, 5xx / rate limiting, transient SMTP codes),
+  - a circuit breaker so callers fail fast while it is down,
+  - a bulkhead capping concurrent calls so one slow dependency can't tie up
+    every worker thread.
+"""
+import os
+import random
+import smtplib
+import socket
+import threading
+import time
+import requests
+import cloudinary.uploader
+from cloudinary.exceptions import Error as CloudinaryError, GeneralError, RateLimited
+from utils.circuit_breaker import get_breaker, breaker_states
+
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "465"))
+
+
+class DependencyUnavailable(Exception):
+    """Raised without calling the dependency: its breaker is open or its bulkhead is full"""
+
+    def __init__(self, name, reason, retry_after=1):
+        super().__init__(f"{name} is temporarily unavailable ({reason})")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class Dependency:
+    def __init__(self, name, timeout, retries, max_concurrent, failure_threshold=5, reset_timeout=30,
+                 backoff_base=0.2, backoff_max=2.0, bulkhead_wait=1.0):
+        self.name = name
+        self.timeout = timeout
+        self.retries = retries
+        self.max_concurrent = max_concurrent
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.bulkhead_wait = bulkhead_wait
+        self.breaker = get_breaker(name, failure_threshold=failure_threshold, reset_timeout=reset_timeout)
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self.metrics = {'calls': 0, 'retries': 0, 'errors': 0, 'bulkhead_rejected': 0, 'in_flight': 0}
+
+    def _count(self, field, delta=1):
+        with self._lock:
+            self.metrics[field] += delta
+
+    def _backoff(self, attempt):
+        # Full jitter: spread retries from many workers instead of retrying in lockstep
+        time.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt)))
+
+    def call(self, fn, retryable, before_retry=None):
+        """Run fn() under this dependency's policy; retryable(exc) decides if an error may be retried"""
+        for attempt in range(self.retries + 1):
+            if not self._slots.acquire(timeout=self.bulkhead_wait):
+                self._count('bulkhead_rejected')
+                raise DependencyUnavailable(self.name, "too many concurrent calls")
+            if not self.breaker.allow():
+                self._slots.release()
+                raise DependencyUnavailable(self.name, "circuit open", max(1, int(self.breaker.retry_after())))
+            self._count('calls')
+            self._count('in_flight')
+            try:
+                result = fn()
+            except Exception as e:
+                if not retryable(e):
+                    # The dependency answered (e.g. bad request); it is not down
+                    self.breaker.record_success()
+                    raise
+                self._count('errors')
+                self.breaker.record_failure()
+                if attempt >= self.retries:
+                    raise
+            else:
+                self.breaker.record_success()
+                return result
+            finally:
+                self._count('in_flight', -1)
+                self._slots.release()
+            self._count('retries')
+            self._backoff(attempt)
+            if before_retry:
+                before_retry()
+
+    def snapshot(self):
+        with self._lock:
+            metrics = dict(self.metrics)
+        return {'name': self.name, 'timeout': self.timeout, 'retries': self.retries,
+                'max_concurrent': self.max_concurrent, 'breaker': self.breaker.snapshot(), **metrics}
+
+
+cloudinary_dependency = Dependency(
+    'cloudinary',
+    timeout=float(os.getenv("CLOUDINARY_TIMEOUT", "60")),
+    retries=int(os.getenv("CLOUDINARY_RETRIES", "2")),
+    max_concurrent=int(os.getenv("CLOUDINARY_MAX_CONCURRENT", "4")),
+)
+smtp_dependency = Dependency(
+    'smtp',
+    timeout=float(os.getenv("SMTP_TIMEOUT", "10")),
+    retries=int(os.getenv("SMTP_RETRIES", "1")),
+    max_concurrent=int(os.getenv("SMTP_MAX_CONCURRENT", "2")),
+)
+http_dependency = Dependency(
+    'http',
+    timeout=(float(os.getenv("HTTP_CONNECT_TIMEOUT", "5")), float(os.getenv("HTTP_READ_TIMEOUT", "30"))),
+    retries=int(os.getenv("HTTP_RETRIES", "2")),
+    max_concurrent=int(os.getenv("HTTP_MAX_CONCURRENT", "8")),
+)
+DEPENDENCIES = (cloudinary_dependency, smtp_dependency, http_dependency)
+
+
+# ---- Cloudinary ----
+
+def _cloudinary_retryable(e):
+    # The base Error class is what the SDK raises for socket/HTTP failures and unparseable replies
+    return type(e) in (CloudinaryError, GeneralError, RateLimited) or isinstance(e, (socket.error, TimeoutError))
+
+
+def cloudinary_upload(file, **options):
+    """cloudinary.uploader.upload with a timeout, retries and the Cloudinary breaker/bulkhead"""
+    options.setdefault('timeout', cloudinary_dependency.timeout)
+
+    def rewind():
+        if hasattr(file, 'seek'):
+            file.seek(0)
+
+    return cloudinary_dependency.call(
+        lambda: cloudinary.uploader.upload(file, **options),
+        _cloudinary_retryable,
+        before_retry=rewind
+    )
+
+
+# ---- SMTP ----
+
+def _smtp_retryable(e):
+    if isinstance(e, smtplib.SMTPResponseException):
+        return 400 <= e.smtp_code < 500  # 4xx replies are transient by definition
+    return isinstance(e, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, socket.error, TimeoutError))
+
+
+def smtp_send(username, password, msg):
+    """Log in to the configured SMTP server over SSL and send an email.message.Message"""
+    def send():
+        with smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT, timeout=smtp_dependency.timeout) as server:
+            server.login(username, password)
+            server.send_message(msg)
+
+    return smtp_dependency.call(send, _smtp_retryable)
+
+
+# ---- HTTP ----
+
+RETRYABLE_STATUS = {502, 503, 504}
+
+
+class _RetryableStatus(Exception):
+    def __init__(self, response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+
+
+def _http_retryable(e):
+    return isinstance(e, (requests.ConnectionError, requests.Timeout, _RetryableStatus))
+
+
+def http_get(url, **kwargs):
+    """requests.get with connect/read timeouts, retries on network errors and 502/503/504"""
+    kwargs.setdefault('timeout', http_dependency.timeout)
+
+    def get():
+        response = requests.get(url, **kwargs)
+        if response.status_code in RETRYABLE_STATUS:
+            response.close()
+            raise _RetryableStatus(response)
+        return response
+
+    try:
+        return http_dependency.call(get, _http_retryable)
+    except _RetryableStatus as e:
+        return e.response
+
+
+def dependency_metrics():
+    known = {dependency.name for dependency in DEPENDENCIES}
+    return {
+        'dependencies': [dependency.snapshot() for dependency in DEPENDENCIES],
+        # Breakers not owned by an outbound client here, e.g. the Mongo snapshot breaker
+        'breakers': [state for state in breaker_states() if state['name'] not in known],
+    }
@@ -0,0 +1,143 @@
+"""
+JWT revocation list.
+Revoked token ids (jti) are stored in a TTL collection that expires them with
+the token itself. Each worker keeps a Bloom filter of revoked ids that is
+refreshed incrementally (and immediately for revocations announced on the
+invalidation bus), so checking a token that was never revoked needs no I/O;
+only Bloom hits are confirmed against Mongo.
+"""
+import hashlib
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from db import db
+from utils.claims_cache import get_user_claims, token_is_current
+from utils.content_events import subscribe, notify_change
+
+revoked_col = db['revoked_tokens']
+
+REFRESH_INTERVAL = float(os.getenv("REVOCATION_REFRESH_SECONDS", "5"))
+REBUILD_INTERVAL = 60 * 60  # rebuild hourly so expired ids drop out of the filter
+BLOOM_CAPACITY = 10000
+BLOOM_ERROR_RATE = 0.001
+CLOCK_SKEW = timedelta(seconds=5)  # overlap between incremental refreshes
+
+
+def ensure_revocation_indexes():
+    revoked_col.create_index('jti', unique=True)
+    revoked_col.create_index('expires_at', expireAfterSeconds=0)
+    revoked_col.create_index('revoked_at')
+
+
+class BloomFilter:
+    def __init__(self, capacity=BLOOM_CAPACITY, error_rate=BLOOM_ERROR_RATE):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class RevocationList:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._synced_until = None
+        self._next_refresh = 0
+        self._next_rebuild = 0
+
+    def _rebuild(self):
+        now = datetime.utcnow()
+        live = revoked_col.count_documents({'expires_at': {'$gt': now}})
+        bloom = BloomFilter(capacity=max(BLOOM_CAPACITY, live * 2))
+        for doc in revoked_col.find({'expires_at': {'$gt': now}}, {'jti': 1, '_id': 0}):
+            bloom.add(doc['jti'])
+        self._bloom = bloom
+        self._synced_until = now
+        self._next_rebuild = time.monotonic() + REBUILD_INTERVAL
+
+    def _refresh(self):
+        now = datetime.utcnow()
+        for doc in revoked_col.find({'revoked_at': {'$gte': self._synced_until - CLOCK_SKEW}}, {'jti': 1, '_id': 0}):
+            self._bloom.add(doc['jti'])
+        self._synced_until = now
+        if self._bloom.count > self._bloom.capacity:
+            self._next_rebuild = 0
+
+    def _maybe_sync(self):
+        now = time.monotonic()
+        if now < self._next_refresh:
+            return
+        with self._lock:
+            if now < self._next_refresh:
+                return
+            if self._bloom is None or now >= self._next_rebuild:
+                self._rebuild()
+            else:
+                self._refresh()
+            self._next_refresh = now + REFRESH_INTERVAL
+
+    def is_revoked(self, jti):
+        try:
+            self._maybe_sync()
+        except Exception as e:
+            print(f"Revocation list refresh failed: {e}")
+            if self._bloom is None:
+                return False
+        if jti not in self._bloom:
+            return False
+        # Possible false positive; confirm with an indexed lookup
+        return revoked_col.find_one({'jti': jti}, {'_id': 1}) is not None
+
+    def revoke(self, jti, identity, expires_at):
+        revoked_col.update_one(
+            {'jti': jti},
+            {'$setOnInsert': {'identity': identity, 'revoked_at': datetime.utcnow(), 'expires_at': expires_at}},
+            upsert=True
+        )
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+        notify_change('revoked_tokens', jti)
+
+    def on_revoked(self, event):
+        """Add a token revoked by another worker without waiting for the next refresh"""
+        jti = event['key']
+        with self._lock:
+            if jti and self._bloom is not None and jti not in self._bloom:
+                self._bloom.add(jti)
+
+
+revocation_list = RevocationList()
+subscribe(revocation_list.on_revoked, {'revoked_tokens'})
+
+
+def revoke_token(jwt_payload):
+    """Revoke a single access token until it would have expired anyway"""
+    expires_at = datetime.utcfromtimestamp(jwt_payload['exp']) if jwt_payload.get('exp') else datetime.utcnow() + timedelta(days=1)
+    revocation_list.revoke(jwt_payload['jti'], jwt_payload.get('sub'), expires_at)
+
+
+def is_token_revoked(jwt_payload):
+    """token_in_blocklist_loader check: revoked jti, deleted user or outdated token version"""
+    jti = jwt_payload.get('jti')
+    if jti and revocation_list.is_revoked(jti):
+        return True
+    return not token_is_current(jwt_payload, get_user_claims(jwt_payload.get('sub')))
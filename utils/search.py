@@ -0,0 +1,408 @@
+"""
+Site search over activities, announcements, highlights and albums.
+
+Query words are expanded against a vocabulary of indexed terms (prefixes and
+near-miss spellings), then matched with Mongo's weighted text indexes. The
+vocabulary is built once and then kept current from the changed document on
+each notify_change; it is only rebuilt in full after key-less bulk changes and
+every SEARCH_VOCABULARY_REBUILD seconds (to drop terms of deleted documents).
+When $text isn't available (mongomock, the mock DB, SEARCH_BACKEND=memory) the
+same query runs against an in-process InvertedIndex built from the collections.
+Results from all collections are merged by score and paged with a keyset
+cursor on (score, type, id).
+"""
+import math
+import os
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict
+from bson.objectid import ObjectId
+from pymongo import TEXT
+from pymongo.errors import OperationFailure
+from db import db
+from utils.cache import TTLCache
+from utils.content_events import subscribe
+
+SEARCH_SOURCES = {
+    'activities': {'type': 'activity', 'title': 'title', 'body': 'description',
+                   'weights': {'title': 10, 'description': 3, 'location': 1}},
+    'announcements': {'type': 'announcement', 'title': 'activityName', 'body': 'activityDescription',
+                      'weights': {'activityName': 10, 'activityDescription': 3}},
+    'highlights': {'type': 'highlight', 'title': 'title', 'body': 'description',
+                   'weights': {'title': 10, 'description': 3}},
+    'albums': {'type': 'album', 'title': 'name', 'body': None,
+               'weights': {'name': 10}},
+}
+SEARCH_TYPES = {source['type']: collection for collection, source in SEARCH_SOURCES.items()}
+
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "auto")  # auto | mongo | memory
+SEARCH_INDEX_TTL = int(os.getenv("SEARCH_INDEX_TTL", "60"))
+SEARCH_VOCABULARY_REBUILD = int(os.getenv("SEARCH_VOCABULARY_REBUILD", "3600"))
+DEFAULT_SEARCH_LIMIT = 10
+MAX_SEARCH_LIMIT = 50
+MAX_QUERY_TERMS = 8
+MAX_EXPANSIONS = 8
+SNIPPET_CHARS = 160
+
+# Relative weight of a match on the query word itself, a completion of it, or a likely typo
+EXACT, PREFIX, TYPO = 1.0, 0.7, 0.5
+
+_TOKEN_RE = re.compile(r"\w+")
+_snapshots = TTLCache(SEARCH_INDEX_TTL, maxsize=4)
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(str(text or '').casefold())
+
+
+def ensure_search_indexes():
+    for collection, source in SEARCH_SOURCES.items():
+        db[collection].create_index(
+            [(field, TEXT) for field in source['weights']],
+            weights=source['weights'],
+            name='search_text',
+            default_language='english'
+        )
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance, giving up (returning limit + 1) once it exceeds limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def _typo_budget(word):
+    return 0 if len(word) < 4 else 1 if len(word) < 8 else 2
+
+
+class Vocabulary:
+    """Sorted set of indexed terms used to expand query words"""
+
+    def __init__(self, terms):
+        self.terms = sorted(set(terms))
+        self._by_length = defaultdict(list)
+        for term in self.terms:
+            self._by_length[len(term)].append(term)
+        self._known = set(self.terms)
+        self._lock = threading.Lock()
+
+    def add(self, terms):
+        """Insert new terms in place (readers may keep using the vocabulary meanwhile)"""
+        with self._lock:
+            for term in set(terms) - self._known:
+                self._known.add(term)
+                insort(self.terms, term)
+                self._by_length[len(term)].append(term)
+
+    def expand(self, word):
+        """Return {term: weight} for the word, its completions and close misspellings"""
+        expansions = {}
+        if word in self._by_length.get(len(word), ()):
+            expansions[word] = EXACT
+        if len(word) >= 2:
+            start = bisect_left(self.terms, word)
+            for term in self.terms[start:]:
+                if len(expansions) >= MAX_EXPANSIONS or not term.startswith(word):
+                    break
+                expansions.setdefault(term, PREFIX)
+        budget = _typo_budget(word)
+        if budget and len(expansions) < MAX_EXPANSIONS:
+            for length in range(len(word) - budget, len(word) + budget + 1):
+                for term in self._by_length.get(length, ()):
+                    if term not in expansions and edit_distance(word, term, budget) <= budget:
+                        expansions[term] = TYPO
+                        if len(expansions) >= MAX_EXPANSIONS:
+                            return expansions
+        return expansions
+
+
+class InvertedIndex:
+    """In-process weighted term index with BM25-style scoring"""
+
+    K1 = 1.2
+
+    def __init__(self):
+        self.postings = defaultdict(dict)  # term -> {doc key: weighted term frequency}
+        self.docs = {}
+        self._vocabulary = None
+
+    def add(self, key, doc, weights):
+        self.docs[key] = doc
+        for field, weight in weights.items():
+            for term in tokenize(doc.get(field)):
+                posting = self.postings[term]
+                posting[key] = posting.get(key, 0) + weight
+        self._vocabulary = None
+
+    @property
+    def vocabulary(self):
+        if self._vocabulary is None:
+            self._vocabulary = Vocabulary(self.postings)
+        return self._vocabulary
+
+    def search(self, expanded):
+        """Score documents for [{term: weight}, ...] (one dict per query word); returns {key: score}"""
+        scores = defaultdict(float)
+        total = len(self.docs) or 1
+        for expansions in expanded:
+            best = {}
+            for term, weight in expansions.items():
+                posting = self.postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (total - len(posting) + 0.5) / (len(posting) + 0.5))
+                for key, tf in posting.items():
+                    score = weight * idf * tf * (self.K1 + 1) / (tf + self.K1)
+                    # A document counts each query word once, through its best expansion
+                    if score > best.get(key, 0):
+                        best[key] = score
+            for key, score in best.items():
+                scores[key] += score
+        return scores
+
+
+def _build_index():
+    index = InvertedIndex()
+    for collection, source in SEARCH_SOURCES.items():
+        projection = {field: 1 for field in source['weights']}
+        for doc in db[collection].find({}, projection):
+            index.add((source['type'], doc['_id']), doc, source['weights'])
+    return index
+
+
+def _document_terms(source, doc):
+    terms = set()
+    for field in source['weights']:
+        terms.update(tokenize(doc.get(field)))
+    return terms
+
+
+def _build_vocabulary():
+    terms = set()
+    for collection, source in SEARCH_SOURCES.items():
+        projection = {field: 1 for field in source['weights']}
+        for doc in db[collection].find({}, projection):
+            terms |= _document_terms(source, doc)
+    return Vocabulary(terms)
+
+
+class LiveVocabulary:
+    """Vocabulary for the $text backend, updated from single-document changes"""
+
+    def __init__(self, rebuild_seconds):
+        self.rebuild_seconds = rebuild_seconds
+        self._vocabulary = None
+        self._built_at = 0
+        self._stale = True
+        self._pending = None  # terms added while a rebuild is running
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+
+    def get(self):
+        if self._stale or time.monotonic() - self._built_at > self.rebuild_seconds:
+            with self._rebuild_lock:
+                if self._stale or time.monotonic() - self._built_at > self.rebuild_seconds:
+                    self._rebuild()
+        return self._vocabulary
+
+    def _rebuild(self):
+        with self._lock:
+            self._stale = False
+            self._pending = []
+        vocabulary = _build_vocabulary()
+        with self._lock:
+            vocabulary.add(self._pending)
+            self._pending = None
+            self._vocabulary = vocabulary
+            self._built_at = time.monotonic()
+
+    def mark_stale(self):
+        self._stale = True
+
+    def add_document(self, collection, key):
+        """Add the terms of one changed document; deletions leave terms until the next rebuild"""
+        source = SEARCH_SOURCES[collection]
+        projection = {field: 1 for field in source['weights']}
+        query = {'_id': ObjectId(key)} if ObjectId.is_valid(key) else {source['title']: key}
+        doc = db[collection].find_one(query, projection)
+        if doc is None:
+            return
+        terms = _document_terms(source, doc)
+        with self._lock:
+            if self._vocabulary is not None:
+                self._vocabulary.add(terms)
+            if self._pending is not None:
+                self._pending.extend(terms)
+
+
+_vocabulary = LiveVocabulary(SEARCH_VOCABULARY_REBUILD)
+
+
+def invalidate_search_index(event=None):
+    # The in-process index (memory backend) is cheap to rebuild from scratch
+    _snapshots.invalidate('index')
+    if not _use_mongo():
+        return
+    if event and event.get('key'):
+        _vocabulary.add_document(event['collection'], event['key'])
+    else:
+        _vocabulary.mark_stale()
+
+
+subscribe(invalidate_search_index, SEARCH_SOURCES)
+
+
+def encode_cursor(item):
+    return f"{item['score']!r}_{item['type']}_{item['id']}"
+
+
+def decode_cursor(cursor):
+    try:
+        score, kind, doc_id = cursor.split('_', 2)
+        if kind not in SEARCH_TYPES:
+            raise ValueError
+        return float(score), kind, doc_id
+    except ValueError:
+        raise ValueError("Invalid cursor")
+
+
+def _sort_key(item):
+    # Score descending, then type and id so ties have a stable order across pages
+    return (-item['score'], item['type'], _reverse_id(item['id']))
+
+
+def _reverse_id(doc_id):
+    return tuple(-ord(c) for c in str(doc_id))
+
+
+def _after(item, cursor):
+    score, kind, doc_id = cursor
+    return _sort_key(item) > (-score, kind, _reverse_id(doc_id))
+
+
+def _mongo_after_cursor(kind, cursor):
+    """Per-collection filter equivalent to _after() for the $text pipeline"""
+    score, cursor_kind, doc_id = cursor
+    if kind > cursor_kind:
+        return {'_score': {'$lte': score}}
+    if kind < cursor_kind:
+        return {'_score': {'$lt': score}}
+    last_id = ObjectId(doc_id) if ObjectId.is_valid(doc_id) else doc_id
+    return {'$or': [{'_score': {'$lt': score}}, {'_score': score, '_id': {'$lt': last_id}}]}
+
+
+def _hit(source, doc, score, terms):
+    body = doc.get(source['body']) if source['body'] else None
+    return {
+        'type': source['type'],
+        'id': str(doc['_id']),
+        'title': doc.get(source['title']),
+        'snippet': make_snippet(body, terms) if body else '',
+        'score': score,
+    }
+
+
+def _search_mongo(expanded, kinds, cursor, limit):
+    search = ' '.join(sorted({term for expansions in expanded for term in expansions}))
+    terms = set(search.split())
+    hits = []
+    for kind in kinds:
+        collection = SEARCH_TYPES[kind]
+        source = SEARCH_SOURCES[collection]
+        pipeline = [
+            {'$match': {'$text': {'$search': search}}},
+            {'$addFields': {'_score': {'$meta': 'textScore'}}},
+        ]
+        if cursor:
+            pipeline.append({'$match': _mongo_after_cursor(kind, cursor)})
+        pipeline += [
+            {'$sort': {'_score': -1, '_id': -1}},
+            {'$limit': limit + 1},
+        ]
+        for doc in db[collection].aggregate(pipeline):
+            hits.append(_hit(source, doc, doc['_score'], terms))
+    return hits
+
+
+def _search_memory(expanded, kinds, cursor, limit):
+    index = _snapshots.get_or_load('index', _build_index)
+    terms = {term for expansions in expanded for term in expansions}
+    hits = []
+    for (kind, doc_id), score in index.search(expanded).items():
+        if kind not in kinds:
+            continue
+        source = SEARCH_SOURCES[SEARCH_TYPES[kind]]
+        hits.append(_hit(source, index.docs[(kind, doc_id)], score, terms))
+    if cursor:
+        hits = [hit for hit in hits if _after(hit, cursor)]
+    return hits
+
+
+def _use_mongo():
+    if SEARCH_BACKEND == 'memory':
+        return False
+    return SEARCH_BACKEND == 'mongo' or type(db).__module__.startswith('pymongo')
+
+
+def _run(backend, vocabulary, words, kinds, cursor, limit):
+    expanded = [expansions for expansions in (vocabulary.expand(word) for word in words) if expansions]
+    return backend(expanded, kinds, cursor, limit) if expanded else []
+
+
+def search(query, types=None, limit=DEFAULT_SEARCH_LIMIT, cursor=None):
+    """Return (items, next_cursor) for a free-text query"""
+    words = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+    if not words:
+        return [], None
+    kinds = [kind for kind in SEARCH_TYPES if not types or kind in types]
+    limit = max(1, min(limit, MAX_SEARCH_LIMIT))
+    cursor = decode_cursor(cursor) if cursor else None
+
+    hits = None
+    if _use_mongo():
+        try:
+            hits = _run(_search_mongo, _vocabulary.get(), words, kinds, cursor, limit)
+        except (OperationFailure, NotImplementedError) as e:
+            # e.g. text indexes not created yet; the in-process index gives the same results shape
+            print(f"Text search unavailable, using in-process index: {e}")
+    if hits is None:
+        index = _snapshots.get_or_load('index', _build_index)
+        hits = _run(_search_memory, index.vocabulary, words, kinds, cursor, limit)
+    hits.sort(key=_sort_key)
+    page = hits[:limit]
+    next_cursor = encode_cursor(page[-1]) if len(hits) > limit else None
+    return page, next_cursor
+
+
+def make_snippet(text, terms, width=SNIPPET_CHARS):
+    """Cut a window of `width` characters around the first matching word"""
+    text = ' '.join(str(text).split())
+    if len(text) <= width:
+        return text
+    start = 0
+    for match in _TOKEN_RE.finditer(text):
+        word = match.group().casefold()
+        # Match stems loosely: "drives"/"driving" should point at "drive"
+        if any(word.startswith(term[:max(3, len(term) - 2)]) for term in terms):
+            start = match.start()
+            break
+    start = max(0, min(start - width // 4, len(text) - width))
+    if start:
+        space = text.find(' ', start)
+        start = space + 1 if 0 <= space < start + 20 else start
+    end = start + width
+    if end < len(text):
+        space = text.rfind(' ', start, end)
+        end = space if space > start + width // 2 else end
+    return ('…' if start else '') + text[start:end] + ('…' if end < len(text) else '')
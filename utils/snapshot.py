@@ -0,0 +1,242 @@
+"""
+Last-known-good snapshots of public GET responses.
+
+Every successful live response of a decorated route is stored (when it
+changed, or to refresh its timestamp) in one compact file:
+
+    b'NSSSNAP1' | header length (4 bytes, big endian) | JSON header | bodies
+
+The header maps request keys to (offset, length, content type, generated_at,
+digest, headers). The file is replaced atomically and memory-mapped for reads,
+so serving a snapshot is a dictionary lookup plus a slice.
+
+A circuit breaker watches Mongo through these routes: PyMongoErrors and slow
+calls open it, after which requests are answered from the snapshot with
+X-Snapshot-Age / X-Snapshot-Generated-At headers until a trial request
+succeeds against the live database again. Other errors (bad ids, route bugs)
+neither trip nor reset it, so clients can't open it with malformed requests.
+
+Snapshot keys use only the query parameters the public routes read
+(SNAPSHOT_PARAMS); requests carrying anything else are served live but never
+stored, so junk parameters can't force rewrites or evict real entries.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from datetime import datetime, timezone
+from functools import wraps
+from flask import request, make_response, jsonify
+from pymongo.errors import PyMongoError
+from utils.circuit_breaker import get_breaker
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines: no cross-process lock
+    fcntl = None
+
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), 'snapshots', 'public.snap'))
+SNAPSHOT_MAX_ENTRIES = int(os.getenv("SNAPSHOT_MAX_ENTRIES", "64"))
+# Rewrite an unchanged entry at most this often, just to refresh its timestamp
+SNAPSHOT_REFRESH_SECONDS = int(os.getenv("SNAPSHOT_REFRESH_SECONDS", "60"))
+SNAPSHOT_SLOW_SECONDS = float(os.getenv("SNAPSHOT_SLOW_SECONDS", "2"))
+SNAPSHOT_ENABLED = os.getenv("SNAPSHOT_ENABLED", "true").lower() != "false"
+
+MAGIC = b'NSSSNAP1'
+_HEADER_LENGTH = struct.Struct('>I')
+# Response headers worth replaying from a snapshot
+KEPT_HEADERS = ('X-Next-Cursor', 'ETag')
+# Query parameters the snapshotted routes read; anything else is not part of the key
+SNAPSHOT_PARAMS = {'preset', 'from', 'to', 'status', 'limit', 'cursor', 'sort', 'fields'}
+
+mongo_breaker = get_breaker('mongo', failure_threshold=3, reset_timeout=15, slow_call_seconds=SNAPSHOT_SLOW_SECONDS)
+
+
+class SnapshotStore:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mmap = None
+        self._index = {}
+        self._stat = None
+
+    # ---- reading ----
+
+    def _current_stat(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_ino, st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def _refresh_mapping(self):
+        """Re-map the file if another worker (or this one) replaced it"""
+        stat = self._current_stat()
+        if stat == self._stat:
+            return
+        old = self._mmap
+        self._mmap, self._index, self._stat = None, {}, stat
+        if stat is not None and stat[2] > len(MAGIC) + _HEADER_LENGTH.size:
+            with open(self.path, 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                self._index = self._parse_header(mapped)
+                self._mmap = mapped
+            except ValueError as e:
+                print(f"Ignoring unreadable snapshot file {self.path}: {e}")
+                mapped.close()
+        if old is not None:
+            old.close()
+
+    @staticmethod
+    def _parse_header(mapped):
+        if mapped[:len(MAGIC)] != MAGIC:
+            raise ValueError("bad magic")
+        start = len(MAGIC) + _HEADER_LENGTH.size
+        (length,) = _HEADER_LENGTH.unpack(mapped[len(MAGIC):start])
+        index = json.loads(mapped[start:start + length])
+        base = start + length
+        for entry in index.values():
+            entry['offset'] += base
+        return index
+
+    def get(self, key):
+        """Return (body bytes, entry metadata) or None"""
+        with self._lock:
+            self._refresh_mapping()
+            entry = self._index.get(key)
+            if entry is None or self._mmap is None:
+                return None
+            return self._mmap[entry['offset']:entry['offset'] + entry['length']], entry
+
+    # ---- writing ----
+
+    def needs_update(self, key, digest):
+        with self._lock:
+            self._refresh_mapping()
+            entry = self._index.get(key)
+        return (entry is None or entry['digest'] != digest
+                or time.time() - entry['generated_at'] >= SNAPSHOT_REFRESH_SECONDS)
+
+    def put(self, key, body, content_type, headers, digest):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path + '.lock', 'w') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            with self._lock:
+                # Merge with the latest file so entries written by other workers survive
+                self._refresh_mapping()
+                entries = {k: (self._mmap[e['offset']:e['offset'] + e['length']], e) for k, e in self._index.items()}
+            entries[key] = (body, {
+                'content_type': content_type,
+                'headers': headers,
+                'generated_at': time.time(),
+                'digest': digest,
+            })
+            if len(entries) > SNAPSHOT_MAX_ENTRIES:
+                for old_key in sorted(entries, key=lambda k: entries[k][1]['generated_at'])[:len(entries) - SNAPSHOT_MAX_ENTRIES]:
+                    del entries[old_key]
+            self._write(entries)
+
+    def _write(self, entries):
+        index, offset = {}, 0
+        for key, (body, meta) in entries.items():
+            meta = {k: v for k, v in meta.items() if k != 'offset'}
+            index[key] = dict(meta, offset=offset, length=len(body))
+            offset += len(body)
+        header = json.dumps(index, separators=(',', ':')).encode()
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(_HEADER_LENGTH.pack(len(header)))
+            f.write(header)
+            for body, _ in entries.values():
+                f.write(body)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+snapshot_store = SnapshotStore(SNAPSHOT_PATH)
+
+
+def _request_key():
+    """Return (key, storable): the key covers SNAPSHOT_PARAMS only"""
+    items = sorted(request.args.items(multi=True))
+    args = '&'.join(f"{k}={v}" for k, v in items if k in SNAPSHOT_PARAMS)
+    storable = all(k in SNAPSHOT_PARAMS for k, _ in items)
+    return (f"{request.path}?{args}" if args else request.path), storable
+
+
+def serve_snapshot(key):
+    found = snapshot_store.get(key)
+    if found is None:
+        return None
+    body, entry = found
+    response = make_response(body)
+    response.headers['Content-Type'] = entry['content_type']
+    for name, value in entry.get('headers', {}).items():
+        response.headers[name] = value
+    response.headers['X-Snapshot-Age'] = str(int(time.time() - entry['generated_at']))
+    response.headers['X-Snapshot-Generated-At'] = datetime.fromtimestamp(entry['generated_at'], timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    return response
+
+
+def _store(key, response):
+    body = response.get_data()
+    digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+    if snapshot_store.needs_update(key, digest):
+        headers = {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers}
+        try:
+            snapshot_store.put(key, body, response.content_type, headers, digest)
+        except OSError as e:
+            print(f"Could not write snapshot: {e}")
+
+
+def _unavailable():
+    response = jsonify({'error': 'Service temporarily unavailable. Please try again shortly.'})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(max(1, int(mongo_breaker.retry_after())))
+    return response
+
+
+def snapshot_fallback(f):
+    """Serve the last good response of a public GET while Mongo is failing or slow"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not SNAPSHOT_ENABLED:
+            return f(*args, **kwargs)
+        key, storable = _request_key()
+        if not mongo_breaker.allow():
+            return serve_snapshot(key) or _unavailable()
+
+        started = time.monotonic()
+        try:
+            response = make_response(f(*args, **kwargs))
+        except PyMongoError:
+            mongo_breaker.record_failure()
+            return serve_snapshot(key) or _unavailable()
+        except Exception:
+            _record_neutral(time.monotonic() - started)
+            raise
+        elapsed = time.monotonic() - started
+
+        if response.status_code >= 400:
+            # Not evidence about Mongo either way (unless it was slow)
+            _record_neutral(elapsed)
+            return response
+        mongo_breaker.record_success(elapsed)
+        if response.status_code == 200 and response.is_json and storable:
+            _store(key, response)
+        return response
+    return decorated_function
+
+
+def _record_neutral(elapsed):
+    if mongo_breaker.slow_call_seconds is not None and elapsed > mongo_breaker.slow_call_seconds:
+        mongo_breaker.record_failure()
+    else:
+        mongo_breaker.release()
@@ -0,0 +1,271 @@
+"""
+Materialized admin dashboard statistics.
+The `stats` document holds per-section counters (users by role/vertical,
+activities by status/month, photos per album, media count/bytes per kind).
+Write paths apply $inc deltas to it, so a dashboard read is a single document
+read. Key-less bulk change events (imports, clear-all, batches) flag the
+section instead and the next read recomputes it with one aggregation.
+"""
+import os
+from datetime import datetime, timedelta
+from urllib.parse import unquote
+from bson.objectid import ObjectId
+from pymongo import ASCENDING
+from db import db
+from utils.content_events import subscribe
+
+stats_col = db['stats']
+STATS_DOC_ID = 'dashboard'
+# Recompute even without change events (e.g. writes made by maintenance scripts)
+STATS_MAX_AGE = timedelta(minutes=int(os.getenv("STATS_MAX_AGE_MINUTES", "60")))
+RECENT_UPLOADS = 10
+
+# Section -> collections whose key-less (bulk) change events force a recompute.
+# record_media's key-less events are applied as deltas, so media has none.
+STATS_SOURCES = {
+    'users': ('users',),
+    'activities': ('activities',),
+    'albums': ('albums',),
+    'media': (),
+}
+
+
+def ensure_stats_indexes():
+    db['users'].create_index([('role', ASCENDING), ('vertical', ASCENDING)])
+
+
+def _field(value):
+    """Counter field name for a value (Mongo field names can't contain dots or start with $)"""
+    if value is None:
+        return '%'
+    return str(value).replace('%', '%25').replace('.', '%2E').replace('$', '%24')
+
+
+def _value(field):
+    return None if field == '%' else unquote(field)
+
+
+def _counts(counter):
+    """(value, count) pairs of a counter map, dropping values that went to zero"""
+    return [(_value(field), count) for field, count in (counter or {}).items() if count > 0]
+
+
+def _user_counters():
+    groups = db['users'].aggregate([
+        {'$group': {'_id': {'role': '$role', 'vertical': '$vertical'}, 'count': {'$sum': 1}}},
+    ])
+    counters = {'role': {}, 'vertical': {}}
+    for group in groups:
+        for name in ('role', 'vertical'):
+            value = group['_id'].get(name)
+            if name == 'role' or value:
+                counters[name][_field(value)] = counters[name].get(_field(value), 0) + group['count']
+    return counters
+
+
+def _user_deltas(user, sign):
+    deltas = {('role', user.get('role')): sign}
+    if user.get('vertical'):
+        deltas[('vertical', user['vertical'])] = sign
+    return deltas
+
+
+def _user_stats(counters):
+    by_role = sorted(_counts(counters.get('role')), key=lambda kv: str(kv[0]))
+    return {
+        'total': sum(count for _, count in by_role),
+        'by_role': [{'role': k, 'count': v} for k, v in by_role],
+        'by_vertical': [{'vertical': k, 'count': v} for k, v in sorted(_counts(counters.get('vertical')))],
+    }
+
+
+def _activity_counters():
+    result = next(iter(db['activities'].aggregate([
+        {'$facet': {
+            'by_status': [{'$group': {'_id': '$status', 'count': {'$sum': 1}}}],
+            'by_month': [
+                {'$match': {'date': {'$type': 'date'}}},
+                {'$group': {'_id': {'$dateToString': {'format': '%Y-%m', 'date': '$date'}}, 'count': {'$sum': 1}}},
+            ],
+        }},
+    ])), {})
+    return {
+        'status': {_field(g['_id']): g['count'] for g in result.get('by_status', [])},
+        'month': {_field(g['_id']): g['count'] for g in result.get('by_month', [])},
+    }
+
+
+def _activity_deltas(activity, sign):
+    deltas = {('status', activity.get('status')): sign}
+    if isinstance(activity.get('date'), datetime):
+        deltas[('month', activity['date'].strftime('%Y-%m'))] = sign
+    return deltas
+
+
+def _activity_stats(counters):
+    by_status = sorted(_counts(counters.get('status')), key=lambda kv: str(kv[0]))
+    return {
+        'total': sum(count for _, count in by_status),
+        'by_status': [{'status': k, 'count': v} for k, v in by_status],
+        'by_month': [{'month': k, 'count': v} for k, v in sorted(_counts(counters.get('month')))],
+    }
+
+
+def _album_counters():
+    albums = db['albums'].aggregate([
+        {'$project': {'_id': 0, 'name': 1, 'photos': {'$size': {'$ifNull': ['$photos', []]}}}},
+    ])
+    return {'photos': {_field(album.get('name')): album['photos'] for album in albums}}
+
+
+def _album_stats(counters):
+    # Every album has a key (created with 0), so empty albums are counted too
+    albums = [{'name': _value(field), 'photos': max(count, 0)} for field, count in counters.get('photos', {}).items()]
+    albums.sort(key=lambda album: (-album['photos'], str(album['name'])))
+    return {
+        'total': len(albums),
+        'photos': sum(album['photos'] for album in albums),
+        'per_album': albums,
+    }
+
+
+def _media_counters():
+    by_kind = list(db['media'].aggregate([
+        {'$group': {'_id': '$kind', 'count': {'$sum': 1}, 'bytes': {'$sum': {'$ifNull': ['$size', 0]}}}},
+    ]))
+    return {
+        'count': {_field(g['_id']): g['count'] for g in by_kind},
+        'bytes': {_field(g['_id']): g['bytes'] for g in by_kind},
+    }
+
+
+def _media_stats(counters):
+    sizes = counters.get('bytes') or {}
+    by_kind = sorted(
+        [{'kind': kind, 'count': count, 'bytes': sizes.get(_field(kind), 0)} for kind, count in _counts(counters.get('count'))],
+        key=lambda g: str(g['kind'])
+    )
+    # A plain sorted find so the created_at index serves it: bounded by RECENT_UPLOADS
+    recent = list(db['media'].find(
+        {}, {'_id': 0, 'asset_id': 1, 'backend': 1, 'kind': 1, 'url': 1, 'size': 1, 'created_at': 1}
+    ).sort('created_at', -1).limit(RECENT_UPLOADS))
+    for item in recent:
+        if isinstance(item.get('created_at'), datetime):
+            item['created_at'] = item['created_at'].isoformat()
+    return {
+        'count': sum(g['count'] for g in by_kind),
+        'total_bytes': sum(g['bytes'] for g in by_kind),
+        'by_kind': by_kind,
+        'recent_uploads': recent,
+    }
+
+
+# Section -> (full recompute of its counters, render counters as the API response)
+STATS_SECTIONS = {
+    'users': (_user_counters, _user_stats),
+    'activities': (_activity_counters, _activity_stats),
+    'albums': (_album_counters, _album_stats),
+    'media': (_media_counters, _media_stats),
+}
+STATS_DELTAS = {
+    'users': _user_deltas,
+    'activities': _activity_deltas,
+}
+
+
+# ==============================
+# INCREMENTAL UPDATES (write path)
+# ==============================
+
+def _apply(section, update):
+    # Only sections that have been computed once carry counters worth adjusting;
+    # a missing section is computed in full by the next read
+    try:
+        stats_col.update_one({'_id': STATS_DOC_ID, f'computed_at.{section}': {'$exists': True}}, update)
+    except Exception as e:
+        # Derived data; never fail the write because of it
+        print(f"Stats update failed: {e}")
+
+
+def _inc(section, deltas):
+    if deltas:
+        _apply(section, {'$inc': {f'counters.{section}.{group}.{_field(value)}': n for (group, value), n in deltas.items()}})
+
+
+def record_change(section, before=None, after=None):
+    """Move one user's/activity's contribution: `before` is subtracted and `after` added"""
+    deltas = {}
+    for doc, sign in ((before, -1), (after, 1)):
+        for key, n in (STATS_DELTAS[section](doc, sign) if doc else {}).items():
+            deltas[key] = deltas.get(key, 0) + n
+    _inc(section, deltas)
+
+
+def record_album_photos(name, delta):
+    """Photos pushed to (positive) or pulled from (negative) an album; 0 registers a new album"""
+    _inc('albums', {('photos', name): delta})
+
+
+def record_album_deleted(name):
+    _apply('albums', {'$unset': {f'counters.albums.photos.{_field(name)}': ''}})
+
+
+def record_media_change(kind, count, size=0):
+    """Media index entries added (positive) or removed (negative)"""
+    _inc('media', {('count', kind): count, ('bytes', kind): size})
+
+
+# ==============================
+# FULL RECOMPUTE (bulk changes)
+# ==============================
+
+def flag_stale(*sections):
+    """Make the next read recompute these sections (after bulk writes deltas can't describe)"""
+    if not sections:
+        return
+    # A fresh token per write lets a recompute tell whether another write raced it
+    token = ObjectId()
+    stats_col.update_one({'_id': STATS_DOC_ID}, {'$set': {f'stale.{name}': token for name in sections}}, upsert=True)
+
+
+def mark_stale(event):
+    """Key-less change events are bulk writes: flag the sections derived from the collection"""
+    if event.get('key') is not None:
+        return
+    flag_stale(*[name for name, sources in STATS_SOURCES.items() if event['collection'] in sources])
+
+
+def _recompute(name, stale_token):
+    counters = STATS_SECTIONS[name][0]()
+    now = datetime.utcnow()
+    stats_col.update_one(
+        {'_id': STATS_DOC_ID},
+        {'$set': {f'counters.{name}': counters, f'computed_at.{name}': now}},
+        upsert=True
+    )
+    if stale_token is not None:
+        # Only clear the flag if no bulk write arrived while we were computing
+        stats_col.update_one({'_id': STATS_DOC_ID, f'stale.{name}': stale_token}, {'$unset': {f'stale.{name}': ''}})
+    return counters, now
+
+
+def get_stats(refresh=False):
+    """Return the dashboard statistics from the summary document, recomputing only stale or missing sections"""
+    doc = stats_col.find_one({'_id': STATS_DOC_ID}) or {}
+    counters = doc.get('counters', {})
+    computed_at = doc.get('computed_at', {})
+    stale = doc.get('stale', {})
+    oldest_allowed = datetime.utcnow() - STATS_MAX_AGE
+
+    result = {'computed_at': {}}
+    for name, (_, render) in STATS_SECTIONS.items():
+        section, at = counters.get(name), computed_at.get(name)
+        if refresh or name in stale or section is None or at is None or at < oldest_allowed:
+            section, at = _recompute(name, stale.get(name))
+        result[name] = render(section)
+        result['computed_at'][name] = at.isoformat()
+    return result
+
+
+# The stats document is shared, so only the worker that made the write flags it
+subscribe(mark_stale, {c for sources in STATS_SOURCES.values() for c in sources}, local_only=True)
@@ -0,0 +1,117 @@
+"""
+Bulk user import helpers: CSV/NDJSON parsing, row validation and password
+hashing spread across a shared thread pool (hashlib's pbkdf2/scrypt release
+the GIL, so threads use every core without forking per request).
+"""
+import csv
+import io
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash
+from utils.validation import validate_email, validate_password, validate_role, validate_vertical, sanitize_input
+
+IMPORT_CHUNK_SIZE = 500
+IMPORT_FIELDS = ('email', 'password', 'role', 'vertical')
+HASH_WORKERS = int(os.getenv("IMPORT_HASH_WORKERS", str(os.cpu_count() or 2)))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="import-hash")
+    return _executor
+
+
+def detect_format(filename, content_type, requested=None):
+    if requested in ('csv', 'ndjson'):
+        return requested
+    if (filename or '').lower().endswith('.csv') or 'csv' in (content_type or ''):
+        return 'csv'
+    return 'ndjson'
+
+
+def iter_rows(stream, fmt):
+    """Yield (row_number, dict or None, error) from a binary CSV/NDJSON stream"""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        for number, row in enumerate(csv.DictReader(text), start=1):
+            yield number, {k.strip().lower(): (v or '').strip() for k, v in row.items() if k}, None
+        return
+    for number, line in enumerate(text, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield number, None, "Invalid JSON"
+            continue
+        if not isinstance(row, dict):
+            yield number, None, "Each line must be a JSON object"
+            continue
+        yield number, row, None
+
+
+def validate_row(row):
+    """Return (user fields, None) or (None, error message) for one import row"""
+    for field in ('email', 'password', 'role', 'vertical'):
+        if row.get(field) is not None and not isinstance(row[field], str):
+            return None, f"{field} must be a string"
+
+    email = (row.get('email') or '').strip().lower()
+    password = row.get('password') or ''
+    role = (row.get('role') or 'volunteer').strip()
+    vertical = (row.get('vertical') or '').strip()
+
+    for is_valid, error in (validate_email(email), validate_password(password), validate_role(role)):
+        if not is_valid:
+            return None, error
+
+    user = {'email': sanitize_input(email, 254), 'password': password, 'role': role}
+    if role == 'verticalhead':
+        is_valid, error = validate_vertical(vertical)
+        if not is_valid:
+            return None, error
+        user['vertical'] = sanitize_input(vertical, 50)
+    return user, None
+
+
+def _hash_one(args):
+    password, method, salt_length = args
+    return generate_password_hash(password, method=method, salt_length=salt_length)
+
+
+class PasswordHasher:
+    """Hashes batches of passwords on the shared import pool"""
+
+    def __init__(self, method, salt_length):
+        self.method = method
+        self.salt_length = salt_length
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass  # the pool outlives the request
+
+    def hash_many(self, passwords):
+        args = [(password, self.method, self.salt_length) for password in passwords]
+        return list(_get_executor().map(_hash_one, args))
+
+
+def chunked(iterable, size=IMPORT_CHUNK_SIZE):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk